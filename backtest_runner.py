@@ -1,26 +1,88 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-import sys, os, json
+import sys, os, json, time
 from datetime import datetime, timezone
 import pandas as pd
-from utils.backtest import fetch_benzinga_news_range, simulate_for_news, summarize
+from utils.backtest import fetch_benzinga_news_range, simulate_for_news, simulate_parallel, summarize
+from utils.sentiment_cache import get_cache
+from utils.news_archive import get_archive
+from utils.sweep import DEFAULT_GRID, PARAMS, METRICS, SweepData, param_grid, run_sweep
 
 def usage():
-    print("Usage: python backtest_runner.py YYYY-MM-DD YYYY-MM-DD [TICKERS_COMMA_SEP] [RVOL_THRESHOLD]")
+    print("Usage: python backtest_runner.py YYYY-MM-DD YYYY-MM-DD [TICKERS_COMMA_SEP] [RVOL_THRESHOLD] [--workers N]")
+    print("       sweep: ... [--sweep grid|random] [--samples N] [--seed N] [--rank-by METRIC]")
+    print("              [--param NAME=V1,V2,...] (repeatable; NAME in " + ", ".join(PARAMS) + ")")
     sys.exit(1)
 
+def pop_option(argv: list[str], name: str, default: str | None = None) -> str | None:
+    """Remove `--name VALUE` / `--name=VALUE` from argv and return VALUE."""
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            value = argv[i + 1]
+            del argv[i:i + 2]
+            return value
+        if arg.startswith(name + "="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return default
+
+def parse_grid(argv: list[str]) -> dict:
+    grid = dict(DEFAULT_GRID)
+    while True:
+        spec = pop_option(argv, "--param")
+        if spec is None:
+            return grid
+        name, _, values = spec.partition("=")
+        if name not in grid or not values:
+            usage()
+        cast = int if name in ("rvol_window", "lookback", "exit_bars") else float
+        grid[name] = [cast(v) for v in values.split(",") if v.strip()]
+
+def run_sweep_mode(arts, start, end, mode, argv):
+    grid = parse_grid(argv)
+    try:
+        samples = int(pop_option(argv, "--samples", "500"))
+        seed = int(pop_option(argv, "--seed", "0"))
+    except ValueError:
+        usage()
+    rank_by = pop_option(argv, "--rank-by", "total_pnl")
+    if rank_by not in METRICS:
+        usage()
+    combos = param_grid(grid, mode, samples=samples, seed=seed)
+    print(f"Loading bars once for {len(combos)} parameter combinations ({mode}) ...")
+    t = time.time()
+    data = SweepData(arts, max_exit_bars=max(grid["exit_bars"]))
+    print(f"{len(data)} bullish candidates loaded in {time.time() - t:.1f}s. Sweeping ...")
+    t = time.time()
+    ranked = run_sweep(data, combos, rank_by=rank_by)
+    print(f"Swept in {time.time() - t:.2f}s")
+
+    os.makedirs("data", exist_ok=True)
+    csv_path = f"data/sweep_{start}_{end}.csv"
+    ranked.to_csv(csv_path, index=False)
+    print(ranked.head(10).to_string(index=False))
+    print("Saved:", csv_path)
+
 def main():
-    if len(sys.argv) < 3:
+    argv = sys.argv[1:]
+    try:
+        workers = int(pop_option(argv, "--workers", "1"))
+    except ValueError:
+        usage()
+    sweep = pop_option(argv, "--sweep")
+    if sweep not in (None, "grid", "random"):
         usage()
-    start = sys.argv[1]
-    end   = sys.argv[2]
+    if len(argv) < 2:
+        usage()
+    start = argv[0]
+    end   = argv[1]
     tickers = None
     rvol_threshold = 1.5
-    if len(sys.argv) >= 4 and sys.argv[3].strip():
-        tickers = [t.strip().upper() for t in sys.argv[3].split(",")]
-    if len(sys.argv) >= 5 and sys.argv[4].strip():
+    if len(argv) >= 3 and argv[2].strip():
+        tickers = [t.strip().upper() for t in argv[2].split(",")]
+    if len(argv) >= 4 and argv[3].strip():
         try:
-            rvol_threshold = float(sys.argv[4])
+            rvol_threshold = float(argv[3])
         except:
             pass
 
@@ -30,9 +92,20 @@ def main():
 
     print(f"Fetching Benzinga news {start} → {end} ...")
     arts = fetch_benzinga_news_range(start_iso, end_iso, tickers=tickers)
-    print(f"Got {len(arts)} headlines. Simulating ...")
+    archive = get_archive().stats()
+    print(f"Got {len(arts)} headlines ({archive['requests']} API requests). Simulating ...")
+    if archive["failed_days"]:
+        print("⚠️ News incomplete for:", ", ".join(archive["failed_days"]), "(re-run to resume)")
+
+    if sweep:
+        run_sweep_mode(arts, start, end, sweep, argv)
+        return
 
-    df = simulate_for_news(arts, rvol_threshold=rvol_threshold)
+    if workers > 1:
+        print(f"Using {workers} worker processes (sharded by ticker)")
+        df = simulate_parallel(arts, rvol_threshold=rvol_threshold, workers=workers)
+    else:
+        df = simulate_for_news(arts, rvol_threshold=rvol_threshold)
     os.makedirs("data", exist_ok=True)
     csv_path = f"data/backtest_{start}_{end}.csv"
     df.to_csv(csv_path, index=False)
@@ -43,6 +116,7 @@ def main():
         json.dump(summary, f, indent=2)
 
     print("Summary:", summary)
+    print("Sentiment cache:", get_cache().stats())
     print("Saved:", csv_path, json_path)
 
 if __name__ == "__main__":
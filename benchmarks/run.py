@@ -0,0 +1,285 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse, json, platform, shutil, statistics, subprocess, tempfile, time
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+GROUPS = ("indicators", "ingest", "pipeline", "exit", "backtest")
+# unset for the run: nothing may reach Alpaca, Benzinga, SMTP or Telegram
+CREDENTIAL_ENV = ("ALPACA_API_KEY", "ALPACA_SECRET_KEY", "BENZINGA_API_KEY", "BENZINGA__API_KEY",
+                  "EMAIL_HOST", "EMAIL_USERNAME", "EMAIL_PASSWORD", "TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID")
+SIZES = {
+    "full": {"bars": (120, 1000), "ingest": ((100, 10_000), (1000, 100_000)), "pipeline_tickers": 20,
+             "exit": (10, 100, 1000), "backtest": (200, 1000)},
+    "quick": {"bars": (120,), "ingest": ((100, 1000),), "pipeline_tickers": 10,
+              "exit": (10, 100), "backtest": (100,)},
+}
+
+
+def isolate(tmp: str):
+    """Point the bot at a throwaway DB / bar store and drop credentials (before any bot import)."""
+    os.environ["BNBOT_DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ["BNBOT_BAR_DIR"] = os.path.join(tmp, "bars")
+    os.environ["BNBOT_NEWS_DIR"] = os.path.join(tmp, "news")
+    for key in CREDENTIAL_ENV:
+        os.environ.pop(key, None)
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Run setup() (untimed) then fn() (timed) `repeat` times; milliseconds."""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t) * 1000)
+    return {"runs": len(runs), "min_ms": round(min(runs), 3), "median_ms": round(statistics.median(runs), 3),
+            "mean_ms": round(statistics.fmean(runs), 3), "max_ms": round(max(runs), 3)}
+
+
+# -----------------------
+# Benchmark groups: each yields (name, params, fn, setup)
+# -----------------------
+def bench_indicators(market, sizes, seed):
+    from utils.price import calc_vwap, calc_rvol, breaks_recent_resistance
+    from utils.indicators import IndicatorState
+    from benchmarks.synthetic import tickers
+    syms = tickers(50)
+    for n in sizes["bars"]:
+        frames = [market.fetch([s], limit=n)[s] for s in syms]
+
+        def pandas_rules(frames=frames):
+            for df in frames:
+                calc_vwap(df).iloc[-1]
+                calc_rvol(df, 30)
+                breaks_recent_resistance(df, 20)
+
+        def streaming(frames=frames):
+            for df in frames:
+                IndicatorState.from_frame(df, 30, 20).snapshot()
+
+        params = {"tickers": len(frames), "bars": n}
+        yield f"indicators.pandas[bars={n}]", params, pandas_rules, None
+        yield f"indicators.streaming[bars={n}]", params, streaming, None
+
+
+def _prefill_news(conn, m: int, seed: int) -> int:
+    """Reset news to m synthetic rows (distinct headlines); returns the highest id."""
+    from utils.db import headline_hash
+    from benchmarks.synthetic import tickers
+    syms = tickers(500)
+    conn.execute("DELETE FROM news")
+    conn.executemany(
+        "INSERT INTO news (ticker, headline, sentiment, sentiment_score, sentiment_source, news_time, headline_hash) "
+        "VALUES (?, ?, NULL, NULL, 'benzinga', ?, ?)",
+        ((syms[i % len(syms)], f"prefill {seed} #{i}", f"2025-01-{1 + i % 28:02d} 06:30:00",
+          headline_hash(f"prefill {seed} #{i}")) for i in range(m)))
+    conn.commit()
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM news").fetchone()[0]
+
+
+def bench_ingest(market, sizes, seed):
+    from news_fetcher import save_news_rows, _parse_json_or_xml
+    from utils.db import get_conn
+    from utils.logging import flush_logs
+    from benchmarks.synthetic import tickers, make_articles, json_response, xml_response
+    conn = get_conn()
+    for n, m in sizes["ingest"]:
+        articles = make_articles(n, tickers(200), seed=seed, start_id=10**7)
+        top = _prefill_news(conn, m, seed)
+
+        def reset(top=top):
+            flush_logs()
+            conn.execute("DELETE FROM news WHERE id > ?", (top,))
+            conn.commit()
+
+        params = {"articles": n, "prefilled_rows": m}
+        for fmt, make in (("json", json_response), ("xml", xml_response)):
+            resp = make(articles)
+            yield (f"ingest.{fmt}[n={n},m={m}]", params,
+                   lambda resp=resp: (save_news_rows(_parse_json_or_xml(resp)), flush_logs()), reset)
+    conn.execute("DELETE FROM news")
+    conn.commit()
+
+
+def _reset_trading(conn):
+    from pipeline import WATERMARK_KEY
+    conn.execute("DELETE FROM trades")
+    conn.execute("DELETE FROM capital_usage")
+    conn.execute("DELETE FROM logs")
+    conn.execute("DELETE FROM settings WHERE key=?", (WATERMARK_KEY,))
+    conn.commit()
+
+
+def bench_pipeline(market, sizes, seed):
+    import pipeline
+    from news_fetcher import to_pt_str
+    from utils import bar_cache
+    from utils.db import get_conn, headline_hash
+    from benchmarks.synthetic import tickers, make_articles
+    conn = get_conn()
+    syms = tickers(sizes["pipeline_tickers"])
+    conn.execute("DELETE FROM news")
+    rows = []
+    for a in make_articles(pipeline.BATCH_SIZE, syms, seed=seed, dup_rate=0.0):
+        for s in a["stocks"]:
+            rows.append((s["name"], a["title"], a["sentiment"], to_pt_str(a["created"]), headline_hash(a["title"])))
+    conn.executemany("INSERT INTO news (ticker, headline, sentiment, sentiment_source, news_time, headline_hash) "
+                     "VALUES (?, ?, ?, 'benzinga', ?, ?)", rows[:pipeline.BATCH_SIZE])
+    conn.commit()
+
+    def cold():
+        _reset_trading(conn)
+        bar_cache.BAR_CACHE = bar_cache.BarCache(fetch=market.fetch)
+
+    params = {"rows": pipeline.BATCH_SIZE, "tickers": len(syms)}
+    yield f"pipeline.cycle_cold[rows={pipeline.BATCH_SIZE}]", params, pipeline.run_pipeline_once, cold
+    yield (f"pipeline.cycle_warm[rows={pipeline.BATCH_SIZE}]", params, pipeline.run_pipeline_once,
+           lambda: _reset_trading(conn))
+    _reset_trading(conn)
+
+
+def bench_exit(market, sizes, seed):
+    import numpy as np
+    import exit_worker
+    from utils import bar_cache
+    from utils.db import get_conn
+    from benchmarks.synthetic import tickers
+    conn = get_conn()
+    bar_cache.BAR_CACHE = bar_cache.BarCache(fetch=market.fetch)
+    for n in sizes["exit"]:
+        syms = tickers(min(n, 100))
+        rng = np.random.default_rng(seed + n)
+        last = {s: market.last_close(s) for s in syms}
+        trades = []
+        for i in range(n):
+            s = syms[i % len(syms)]
+            entry = last[s] * rng.uniform(0.9, 1.05)
+            trades.append((s, f"bench trade {i}", entry, entry * 100, entry * rng.uniform(1.0, 1.2)))
+
+        def setup(trades=trades):
+            _reset_trading(conn)
+            conn.executemany("INSERT INTO trades (ticker, headline, entry_price, entry_amount, entry_time, "
+                             "trailing_stop_loss, market_close_exit, peak_price) VALUES (?, ?, ?, ?, datetime('now'), 10.0, 1, ?)",
+                             trades)
+            conn.commit()
+
+        # market-close exits depend on the wall clock: recorded so runs can be compared fairly
+        params = {"open_trades": n, "tickers": len(syms),
+                  "market_close": exit_worker.is_market_close(exit_worker.now_pt())}
+        yield f"exit.cycle[open={n}]", params, exit_worker.process_open_trades, setup
+    _reset_trading(conn)
+
+
+def bench_backtest(market, sizes, seed):
+    from utils.backtest import simulate_for_news
+    from utils.bar_store import BarStore
+    from benchmarks.synthetic import tickers, make_articles
+    root = os.path.join(os.environ["BNBOT_BAR_DIR"], "backtest")
+    for n in sizes["backtest"]:
+        articles = make_articles(n, tickers(20), seed=seed)
+        params = {"articles": n, "tickers": 20}
+        yield (f"backtest.cold[articles={n}]", params,
+               lambda a=articles: simulate_for_news(a, store=BarStore(root, fetch=market.fetch)),
+               lambda: shutil.rmtree(root, ignore_errors=True))
+        yield (f"backtest.warm[articles={n}]", params,
+               lambda a=articles: simulate_for_news(a, store=BarStore(root, fetch=market.fetch)), None)
+
+
+# -----------------------
+# Results
+# -----------------------
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Median-vs-median ratio for every benchmark present in both runs."""
+    out = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = cur["median_ms"] / base["median_ms"]
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        out.append({"name": name, "baseline_ms": base["median_ms"], "current_ms": cur["median_ms"],
+                    "ratio": round(ratio, 3), "status": status})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline, seeded BnBot benchmarks (synthetic bars and news, temp DB)")
+    ap.add_argument("--only", default=",".join(GROUPS), help="comma-separated subset of: " + ", ".join(GROUPS))
+    ap.add_argument("--quick", action="store_true", help="smaller sizes, for a fast smoke run")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    ap.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    ap.add_argument("--save-baseline", action="store_true", help="also write the results to --baseline")
+    ap.add_argument("--threshold", type=float, default=0.2, help="relative change reported as slower/faster")
+    ap.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything is slower than baseline")
+    args = ap.parse_args()
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        ap.error(f"unknown group(s): {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp(prefix="bnbot-bench-")
+    isolate(tmp)
+    import numpy as np
+    import pandas as pd
+    import db_bootstrap  # creates the tables in the temp DB
+    from utils.logging import flush_logs
+    from utils.alerts import get_dispatcher
+    from benchmarks.synthetic import SyntheticMarket
+
+    size = "quick" if args.quick else "full"
+    market = SyntheticMarket(seed=args.seed)
+    bench = {"indicators": bench_indicators, "ingest": bench_ingest, "pipeline": bench_pipeline,
+             "exit": bench_exit, "backtest": bench_backtest}
+    report = {"meta": {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "git": _git_rev(),
+                       "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                       "platform": platform.platform(), "seed": args.seed, "size": size, "repeat": args.repeat},
+              "results": {}}
+    try:
+        for group in groups:
+            for name, params, fn, setup in bench[group](market, SIZES[size], args.seed):
+                if setup is not None:
+                    setup()
+                fn()  # warm-up: lazy imports, first bar fetch / store fill
+                res = measure(fn, args.repeat, setup)
+                report["results"][name] = {"params": params, **res}
+                print(f"{name:<40} median {res['median_ms']:>10.2f} ms   min {res['min_ms']:>10.2f} ms")
+    finally:
+        flush_logs()
+        get_dispatcher().flush(1.0)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Saved:", args.out)
+
+    regressions = []
+    if args.save_baseline:
+        shutil.copyfile(args.out, args.baseline)
+        print("Baseline saved:", args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print(f"\nvs baseline {baseline['meta'].get('git')} ({baseline['meta'].get('timestamp')}):")
+        for r in rows:
+            print(f"{r['name']:<40} {r['baseline_ms']:>10.2f} -> {r['current_ms']:>10.2f} ms  x{r['ratio']:<6} {r['status']}")
+        regressions = [r for r in rows if r["status"] == "slower"]
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import json, zlib
+from datetime import date, datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+import numpy as np
+import pandas as pd
+
+# Fixed synthetic calendar: weekdays from ANCHOR, regular session in UTC (no DST shift)
+ANCHOR = date(2025, 3, 3)
+SESSION_OPEN_UTC = (14, 30)
+BARS_PER_DAY = 78  # 5-minute bars, 09:30-16:00 ET
+SENTIMENTS = ("bullish", "bearish", "neutral")
+VERBS = ("beats", "misses", "raises", "cuts", "announces", "files", "expands", "launches")
+NOUNS = ("guidance", "Q3 revenue", "buyback", "FDA submission", "partnership", "dividend", "offering", "contract")
+
+
+def tickers(n: int) -> list[str]:
+    """n distinct, valid-looking symbols (AAAA, AAAB, ...), always the same for the same n."""
+    out = []
+    for i in range(n):
+        s = ""
+        for _ in range(4):
+            i, r = divmod(i, 26)
+            s = chr(65 + r) + s
+        out.append(s)
+    return out
+
+
+def _seed(seed: int, *parts) -> int:
+    return (seed * 1_000_003 + zlib.crc32("|".join(map(str, parts)).encode())) % 2**32
+
+
+def session_days(days: int) -> list[date]:
+    out, d = [], ANCHOR
+    while len(out) < days:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+class SyntheticMarket:
+    """Seeded OHLCV bars on a fixed timeline, shaped like utils.price output.
+
+    Every ticker gets its own random walk, generated once and sliced per request, so a
+    bar is the same whatever range it is requested through. A few volume/price spikes
+    make the entry rules fire now and then (on the latest bar for ~30% of tickers, so
+    live cycles place trades). fetch() is a drop-in for fetch_intraday_bars_multi
+    (BarCache / BarStore `fetch=`); `calls` counts requests.
+    """
+
+    def __init__(self, seed: int = 0, days: int = 20, timeframe_minutes: int = 5):
+        self.seed = seed
+        self.step = pd.Timedelta(minutes=timeframe_minutes)
+        per_day = BARS_PER_DAY * 5 // timeframe_minutes
+        opens = [pd.Timestamp(datetime(d.year, d.month, d.day, *SESSION_OPEN_UTC, tzinfo=timezone.utc))
+                 for d in session_days(days)]
+        self.times = pd.DatetimeIndex([o + i * self.step for o in opens for i in range(per_day)])
+        self._secs = self.times.as_unit("s").asi8  # epoch seconds whatever the index resolution
+        self._series: dict[str, pd.DataFrame] = {}
+        self.calls = 0
+
+    def series(self, ticker: str) -> pd.DataFrame:
+        df = self._series.get(ticker)
+        if df is None:
+            rng = np.random.default_rng(_seed(self.seed, "bars", ticker))
+            n = len(self.times)
+            ret = rng.normal(0.0002, 0.004, n)
+            spikes = rng.random(n) < 0.01
+            spikes[-1] = rng.random() < 0.3  # some tickers break out on the latest bar, so live entries fire
+            ret[spikes] += rng.normal(0.02, 0.01, spikes.sum())
+            close = rng.uniform(5, 200) * np.exp(np.cumsum(ret))
+            opn = np.concatenate([[close[0]], close[:-1]])
+            wick = np.abs(rng.normal(0, 0.002, (2, n))) * close
+            volume = np.round(rng.lognormal(9, 0.6, n) * np.where(spikes, rng.uniform(3, 8, n), 1.0))
+            df = pd.DataFrame({"time": self.times, "open": opn, "high": np.maximum(opn, close) + wick[0],
+                               "low": np.minimum(opn, close) - wick[1], "close": close, "volume": volume})
+            self._series[ticker] = df
+        return df
+
+    def fetch(self, tickers: list[str], start_iso: str | None = None, timeframe: str = "5Min",
+              limit: int | None = 300, end_iso: str | None = None, **_) -> dict[str, pd.DataFrame]:
+        self.calls += 1
+        lo = np.searchsorted(self._secs, pd.Timestamp(start_iso).timestamp(), "left") if start_iso else 0
+        hi = np.searchsorted(self._secs, pd.Timestamp(end_iso).timestamp(), "right") if end_iso else len(self._secs)
+        out = {}
+        for t in {(t or "").upper() for t in tickers} - {""}:
+            df = self.series(t).iloc[lo:hi]
+            if limit is not None:
+                df = df.tail(limit)
+            if not df.empty:
+                out[t] = df.reset_index(drop=True)
+        return out
+
+    def last_close(self, ticker: str) -> float:
+        return float(self.series(ticker)["close"].iloc[-1])
+
+
+def make_articles(n: int, symbols: list[str], seed: int = 0, days: int = 20, dup_rate: float = 0.1,
+                  start_id: int = 1) -> list[dict]:
+    """n Benzinga-shaped JSON articles spread over the synthetic session days.
+
+    Each has id, title, created/updated (RFC 2822, ET offset), 1-3 stocks and a
+    Benzinga sentiment tag (so scoring never needs FinBERT). About dup_rate of them
+    repeat an earlier headline for the same tickers, as syndicated stories do.
+    """
+    rng = np.random.default_rng(_seed(seed, "news", n, len(symbols)))
+    opens = [datetime(d.year, d.month, d.day, *SESSION_OPEN_UTC, tzinfo=timezone.utc) for d in session_days(days)]
+    out = []
+    for i in range(n):
+        if out and rng.random() < dup_rate:
+            src = out[int(rng.integers(len(out)))]
+            title, stocks = src["title"], src["stocks"]
+        else:
+            picks = rng.choice(len(symbols), size=min(len(symbols), int(rng.integers(1, 4))), replace=False)
+            stocks = [{"name": symbols[k]} for k in sorted(picks)]
+            title = f"{stocks[0]['name']} {VERBS[rng.integers(len(VERBS))]} {NOUNS[rng.integers(len(NOUNS))]} (#{start_id + i})"
+        at = opens[int(rng.integers(len(opens)))] + timedelta(minutes=int(rng.integers(0, 390)))
+        created = (at - timedelta(hours=5)).strftime("%a, %d %b %Y %H:%M:%S -0500")
+        out.append({"id": start_id + i, "title": title, "created": created, "updated": created,
+                    "stocks": stocks, "sentiment": SENTIMENTS[int(rng.integers(len(SENTIMENTS)))]})
+    return out
+
+
+def to_xml(articles: list[dict]) -> str:
+    """The same articles as a Benzinga XML payload (<result><item>...</item></result>)."""
+    items = []
+    for a in articles:
+        stocks = "".join(f"<item>{escape(s['name'])}</item>" for s in a["stocks"])
+        items.append(f"<item><id>{a['id']}</id><title>{escape(a['title'])}</title><created>{a['created']}</created>"
+                     f"<updated>{a['updated']}</updated><stocks>{stocks}</stocks></item>")
+    return "<?xml version=\"1.0\" encoding=\"UTF-8\"?><result>" + "".join(items) + "</result>"
+
+
+class SyntheticResponse:
+    """Just enough of requests.Response for news_fetcher._parse_json_or_xml."""
+
+    def __init__(self, text: str, status_code: int = 200):
+        self.text = text
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def json_response(articles: list[dict]) -> SyntheticResponse:
+    return SyntheticResponse(json.dumps(articles))
+
+
+def xml_response(articles: list[dict]) -> SyntheticResponse:
+    return SyntheticResponse(to_xml(articles))
@@ -1,12 +1,14 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-import os, sqlite3
+import os
 from datetime import datetime, timedelta
 import pandas as pd
 import pytz
 import db_bootstrap  # executes and creates tables on import
 import streamlit as st
-from utils.price import fetch_intraday_bars
+from utils.price import fetch_intraday_bars_multi
+from utils.db import get_conn
+from dashboard_data import DashboardData
 import logs_tab
 
 st.set_page_config(page_title="BnBot Dashboard", layout="wide")
@@ -18,38 +20,62 @@ def to_pt(ts):
     if ts is None or pd.isna(ts): return None
     return (pd.to_datetime(ts, utc=True).tz_convert(PAC).strftime("%Y-%m-%d %H:%M:%S"))
 
-def roi(entry, exit_):
-    if not entry or not exit_ or pd.isna(entry) or pd.isna(exit_) or entry == 0:
-        return None
-    return round((exit_ - entry) / entry * 100.0, 2)
+# Skipped/closed trades with ROI, reason and holding seconds computed in SQL. Filter with
+# trade_filters() and order by (COALESCE(exit_time, entry_time), id) to use ix_trades_finished.
+FINISHED_SQL = """
+  SELECT id, ticker, headline, sentiment, sentiment_score, entry_amount, entry_price,
+         entry_time AS "Entry Time (PT)", exit_price, exit_time AS "Exit Time (PT)",
+         CASE WHEN entry_price != 0 AND exit_price != 0
+              THEN ROUND((exit_price - entry_price) / entry_price * 100.0, 2) END AS "ROI (%)",
+         COALESCE(NULLIF(exit_reason, ''), skip_reason, '') AS "Exit/Skip Reason",
+         CAST(ROUND((julianday(exit_time) - julianday(entry_time)) * 86400) AS INTEGER) AS holding_s,
+         COALESCE(exit_time, entry_time) AS finished_at
+  FROM trades
+  WHERE (exit_price IS NOT NULL OR skip_reason IS NOT NULL)
+"""
+FINISHED_SHOW = ["ticker","headline","sentiment","sentiment_score","entry_amount","entry_price","Entry Time (PT)",
+                 "exit_price","Exit Time (PT)","ROI (%)","Exit/Skip Reason","Holding Time"]
+PAGE_SIZES = [25, 50, 100, 200]
 
-def holding(entry_ts, exit_ts):
-    if pd.isna(entry_ts) or pd.isna(exit_ts): return None
-    d = pd.to_datetime(exit_ts) - pd.to_datetime(entry_ts)
-    return str(d).split(".")[0]
+def trade_filters(ticker_csv: str, sentiment: str) -> tuple[str, list]:
+    """SQL (AND ...) and params for the ticker list / sentiment filters."""
+    sql, params = "", []
+    keep = [t for t in ticker_csv.split(",") if t]
+    if keep:
+        sql += f" AND ticker IN ({','.join('?' * len(keep))})"
+        params += keep
+    if sentiment != "All":
+        sql += " AND sentiment = ?"
+        params.append(sentiment)
+    return sql, params
 
-# DB
+def with_holding_time(df):
+    held = pd.to_timedelta(df.pop("holding_s"), unit="s")
+    df["Holding Time"] = held.astype(str).where(held.notna(), "")
+    return df
+
+# DB: read-only connection for queries, read-write one for settings/trade edits
 try:
-    conn = sqlite3.connect("data/trades.db", check_same_thread=False)
+    conn = get_conn(readonly=True)
     cur = conn.cursor()
+    wconn = get_conn()
+    wcur = wconn.cursor()
+    data = DashboardData(conn)  # cached reads, re-queried only when their tables change
 except Exception as e:
     st.error(f"Failed to connect to DB: {e}")
     st.stop()
 
-tab_today, tab_prev, tab_bt, tab_logs, tab_heatmap, tab_settings = st.tabs([
-    "🗓️ Today","📁 Skipped / Closed Trades","📉 Run Backtest","📜 Logs","🌡️ Heatmap","⚙️ Settings"
-])
-
-with tab_logs:
-	logs_tab.render(conn)
+# Only the selected section runs (st.tabs would execute every tab's queries on each rerun)
+SECTIONS = ["🗓️ Today","📁 Skipped / Closed Trades","📉 Run Backtest","📜 Logs","🌡️ Heatmap","⚙️ Settings"]
+section = st.radio("Section", SECTIONS, horizontal=True, label_visibility="collapsed", key="section")
 
 # --- SETTINGS TAB ---
-with tab_settings:
+if section == "⚙️ Settings":
     st.subheader("⚙️ Capital Settings")
-    cur.execute("SELECT value FROM settings WHERE key='capital_mode'"); mode = (cur.fetchone() or ["percent"])[0]
-    cur.execute("SELECT value FROM settings WHERE key='capital_value'"); value = float((cur.fetchone() or ["10"])[0])
-    cur.execute("SELECT value FROM settings WHERE key='account_size'"); acct  = float((cur.fetchone() or ["100000"])[0])
-    cur.execute("SELECT value FROM settings WHERE key='paper_trading'"); paper = (cur.fetchone() or ["true"])[0]
+    mode  = data.setting("capital_mode", "percent")
+    value = float(data.setting("capital_value", "10"))
+    acct  = float(data.setting("account_size", "100000"))
+    paper = data.setting("paper_trading", "true")
 
     c1,c2,c3,c4 = st.columns(4)
     mode_new = c1.selectbox("Capital mode", ["percent","dollar"], index=0 if mode=="percent" else 1)
@@ -58,59 +84,53 @@ with tab_settings:
     paper_new = c4.selectbox("Trading mode", ["paper","live"], index=0 if paper.lower()=="true" else 1)
 
     if st.button("Save Settings"):
-        cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('capital_mode',?)", (mode_new,))
-        cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('capital_value',?)", (str(value_new),))
-        cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('account_size',?)", (str(acct_new),))
-        cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('paper_trading',?)", ("true" if paper_new=="paper" else "false",))
-        conn.commit()
+        wcur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('capital_mode',?)", (mode_new,))
+        wcur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('capital_value',?)", (str(value_new),))
+        wcur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('account_size',?)", (str(acct_new),))
+        wcur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES('paper_trading',?)", ("true" if paper_new=="paper" else "false",))
+        wconn.commit()
         st.success("Settings saved.")
 
 # --- TODAY TAB ---
-if hasattr(st, "autorefresh"): st.autorefresh(interval=30_000, key="today_refresh")
-with tab_today:
+if section == "🗓️ Today":
+    if hasattr(st, "autorefresh"): st.autorefresh(interval=30_000, key="today_refresh")
     st.title("📈 BnBot Dashboard")
 
     # PnL summary (simple aggregation)
     st.markdown("#### PnL Summary")
-
-# Daily Capital Usage (by ticker)
-st.markdown("#### Capital Usage (Today)")
-try:
-    df_cap = pd.read_sql("""
-        SELECT ticker, SUM(amount) as used
-        FROM capital_usage
-        WHERE date = DATE('now')
-        GROUP BY ticker
-        ORDER BY used DESC
-    """, conn)
-    if df_cap.empty:
-        st.info("No capital usage recorded today.")
-    else:
-        st.dataframe(df_cap, use_container_width=True)
-except Exception as e:
-    st.info("Capital usage not available yet.")
-
     try:
-        dft = pd.read_sql("SELECT entry_price, exit_price FROM trades WHERE exit_price IS NOT NULL", conn)
-        total_pnl = 0.0
-        if not dft.empty:
-            dft["pnl"] = dft.apply(lambda r: (r["exit_price"]-r["entry_price"]) if pd.notna(r["exit_price"]) and pd.notna(r["entry_price"]) else 0.0, axis=1)
-            total_pnl = round(dft["pnl"].sum(), 2)
+        # rows missing a price contribute nothing (SUM skips NULL differences)
+        total_pnl = round(float(data.query(
+            "SELECT COALESCE(SUM(exit_price - entry_price), 0) AS pnl FROM trades WHERE exit_price IS NOT NULL",
+            ("trades",))["pnl"].iloc[0]), 2)
         c1,c2 = st.columns(2)
         c1.metric("Total PnL (All time)", f"${total_pnl:,.2f}")
         # Daily PnL
-        dfd = pd.read_sql("""
-            SELECT entry_price, exit_price FROM trades
+        day_pnl = round(float(data.query("""
+            SELECT COALESCE(SUM(exit_price - entry_price), 0) AS pnl FROM trades
             WHERE DATE(COALESCE(exit_time, entry_time)) = DATE('now')
-        """, conn)
-        day_pnl = 0.0
-        if not dfd.empty:
-            dfd["pnl"] = dfd.apply(lambda r: (r["exit_price"]-r["entry_price"]) if pd.notna(r["exit_price"]) and pd.notna(r["entry_price"]) else 0.0, axis=1)
-            day_pnl = round(dfd["pnl"].sum(), 2)
+        """, ("trades",))["pnl"].iloc[0]), 2)
         c2.metric("PnL (Today)", f"${day_pnl:,.2f}")
     except Exception as e:
         st.info("PnL metrics unavailable yet.")
 
+    # Daily Capital Usage (by ticker)
+    st.markdown("#### Capital Usage (Today)")
+    try:
+        df_cap = data.query("""
+            SELECT ticker, SUM(amount) as used
+            FROM capital_usage
+            WHERE date = DATE('now')
+            GROUP BY ticker
+            ORDER BY used DESC
+        """, ("capital_usage",))
+        if df_cap.empty:
+            st.info("No capital usage recorded today.")
+        else:
+            st.dataframe(df_cap, use_container_width=True)
+    except Exception as e:
+        st.info("Capital usage not available yet.")
+
     st.subheader("📰 Live News (Today)")
     try:
         q = """
@@ -120,7 +140,7 @@ except Exception as e:
         ORDER BY news_time DESC
         LIMIT 50
         """
-        df_news = pd.read_sql(q, conn)
+        df_news = data.query(q, ("news",))
         if not df_news.empty:
             df_news = df_news.rename(columns={
                 "news":"News Headline","sentiment":"Sentiment","sentiment_score":"Score","sentiment_source":"Sentiment Source"
@@ -136,7 +156,7 @@ except Exception as e:
     ticker_filter = fcol1.text_input("Filter by Ticker (e.g., AAPL,TSLA)").upper().replace(' ','')
     sent_filter = fcol2.selectbox("Filter by Sentiment", ["All","bullish","bearish","neutral"])
     try:
-        df_open = pd.read_sql("SELECT rowid as rid, * FROM trades WHERE exit_price IS NULL ORDER BY entry_time DESC", conn)
+        df_open = data.query("SELECT rowid as rid, * FROM trades WHERE exit_price IS NULL ORDER BY entry_time DESC", ("trades",))
         if not df_open.empty:
             if ticker_filter:
                 keep = [t.strip() for t in ticker_filter.split(',') if t.strip()]
@@ -148,8 +168,9 @@ except Exception as e:
             # Compute Unrealized PnL (on-demand)
             if st.button('Refresh Unrealized PnL'):
                 upnl = []
+                bars = fetch_intraday_bars_multi(df_open['ticker'].tolist(), timeframe='5Min', limit=10)
                 for _, r in df_open.iterrows():
-                    dfp = fetch_intraday_bars(r['ticker'], timeframe='5Min', limit=10)
+                    dfp = bars.get((r['ticker'] or '').upper())
                     if dfp is None or dfp.empty:
                         upnl.append(None)
                     else:
@@ -170,12 +191,12 @@ except Exception as e:
                 prev = pd.read_sql(f"SELECT trailing_stop_loss, market_close_exit FROM trades WHERE rowid={int(rid)}", conn)
                 prev_tsl = float(prev['trailing_stop_loss'].iloc[0]) if not prev.empty else None
                 prev_mkt = int(prev['market_close_exit'].iloc[0]) if not prev.empty else None
-                cur.execute("UPDATE trades SET trailing_stop_loss=?, market_close_exit=? WHERE rowid=?",
+                wcur.execute("UPDATE trades SET trailing_stop_loss=?, market_close_exit=? WHERE rowid=?",
                             (new_tsl, 1 if mkt_toggle=="Enabled" else 0, int(rid)))
                 # Log event
-                cur.execute("INSERT INTO trade_events(trade_id, event, old_value, new_value, ts) VALUES(?,?,?,?, datetime('now'))",
+                wcur.execute("INSERT INTO trade_events(trade_id, event, old_value, new_value, ts) VALUES(?,?,?,?, datetime('now'))",
                             (int(rid), 'tsl_or_moc_change', str({'tsl': prev_tsl, 'moc': prev_mkt}), str({'tsl': new_tsl, 'moc': 1 if mkt_toggle=='Enabled' else 0})))
-                conn.commit()
+                wconn.commit()
                 st.success("Updated.")
 
             # Manual exit
@@ -184,9 +205,9 @@ except Exception as e:
             if st.button("Confirm Manual Exit"):
                 # For demo: set exit at same price
                 ep = float(df_open.loc[df_open["rid"]==rid2,"entry_price"].iloc[0])
-                cur.execute("UPDATE trades SET exit_price=?, exit_time=datetime('now'), exit_reason=? WHERE rowid=?",
-                            (ep, "manual_exit", int(rid2)))
-                conn.commit()
+                wcur.execute("UPDATE trades SET exit_price=?, exit_time=datetime('now'), exit_reason=? WHERE rowid=?",
+                             (ep, "manual_exit", int(rid2)))
+                wconn.commit()
                 st.success("Trade closed manually.")
         else:
             st.info("No open trades.")
@@ -198,59 +219,63 @@ except Exception as e:
     t_filter2 = f2c1.text_input("Filter by Ticker (Today)", key='t2').upper().replace(' ','')
     s_filter2 = f2c2.selectbox("Filter by Sentiment (Today)", ["All","bullish","bearish","neutral"], key='s2')
     try:
-        q = """
-        SELECT * FROM trades
-        WHERE (exit_price IS NOT NULL OR skip_reason IS NOT NULL)
-          AND DATE(COALESCE(exit_time, entry_time)) = DATE('now')
-        ORDER BY COALESCE(exit_time, entry_time) DESC
-        """
-        df_today = pd.read_sql(q, conn)
+        where, params = trade_filters(t_filter2, s_filter2)
+        q = FINISHED_SQL + " AND COALESCE(exit_time, entry_time) >= DATE('now')" + where + \
+            " ORDER BY COALESCE(exit_time, entry_time) DESC, id DESC"
+        df_today = data.query(q, ("trades",), tuple(params))
         if not df_today.empty:
-            if t_filter2:
-                keep = [t.strip() for t in t_filter2.split(',') if t.strip()]
-                df_today = df_today[df_today['ticker'].isin(keep)] if keep else df_today
-            if s_filter2 != 'All':
-                df_today = df_today[df_today['sentiment'] == s_filter2]
-            df_today["Entry Time (PT)"] = df_today["entry_time"]
-            df_today["Exit Time (PT)"] = df_today["exit_time"]
-            df_today["ROI (%)"] = df_today.apply(lambda r: roi(r.get("entry_price"), r.get("exit_price")), axis=1)
-            df_today["Holding Time"] = df_today.apply(lambda r: None if pd.isna(r.get("exit_time")) else (pd.to_datetime(r.get("exit_time")) - pd.to_datetime(r.get("entry_time"))), axis=1)
-            df_today["Holding Time"] = df_today["Holding Time"].astype(str).str.replace("NaT","")
-            df_today["Exit/Skip Reason"] = df_today[["exit_reason","skip_reason"]].fillna("").agg(lambda x: x[0] or x[1], axis=1)
-            show = ["ticker","headline","sentiment","sentiment_score","entry_amount","entry_price","Entry Time (PT)",
-                    "exit_price","Exit Time (PT)","ROI (%)","Exit/Skip Reason","Holding Time"]
-            st.dataframe(df_today[show], use_container_width=True)
+            st.dataframe(with_holding_time(df_today)[FINISHED_SHOW], use_container_width=True)
         else:
             st.info("No skipped or closed trades today.")
     except Exception as e:
         st.warning(f"Error loading today's skipped/closed trades: {e}")
 
-with tab_prev:
+if section == "📁 Skipped / Closed Trades":
     st.subheader("📁 Skipped / Closed Trades (Previous)")
+    f3c1, f3c2, f3c3, f3c4 = st.columns(4)
+    t_filter3 = f3c1.text_input("Filter by Ticker", key='t3').upper().replace(' ','')
+    s_filter3 = f3c2.selectbox("Filter by Sentiment", ["All","bullish","bearish","neutral"], key='s3')
+    order = f3c3.selectbox("Sort", ["Newest first","Oldest first"], key='o3')
+    page_size = f3c4.selectbox("Rows per page", PAGE_SIZES, index=1, key='p3')
+
+    # keyset pagination: a stack of page-start cursors (finished_at, id), so every page is
+    # one index range scan of page_size + 1 rows however long the history; filters restart at page 1
+    view = (t_filter3, s_filter3, order, page_size)
+    if st.session_state.get("prev_view") != view:
+        st.session_state.prev_view = view
+        st.session_state.prev_cursors = [None]
+    cursors = st.session_state.prev_cursors
+    desc = order == "Newest first"
     try:
-        q = """
-        SELECT * FROM trades
-        WHERE (exit_price IS NOT NULL OR skip_reason IS NOT NULL)
-          AND DATE(COALESCE(exit_time, entry_time)) < DATE('now')
-        ORDER BY COALESCE(exit_time, entry_time) DESC
-        """
-        df_prev = pd.read_sql(q, conn)
+        where, params = trade_filters(t_filter3, s_filter3)
+        q = FINISHED_SQL + where
+        if cursors[-1] is None or not desc:
+            q += " AND COALESCE(exit_time, entry_time) < DATE('now')"
+        if cursors[-1] is not None:
+            # SQLite doesn't start an index range at a row-value comparison, only at the plain
+            # timestamp bound. Newest first, that bound replaces the DATE('now') one (a cursor
+            # is from before today): given two upper bounds SQLite ranges on the first only.
+            q += f" AND COALESCE(exit_time, entry_time) {'<=' if desc else '>='} ?"
+            q += f" AND (COALESCE(exit_time, entry_time), id) {'<' if desc else '>'} (?, ?)"
+            params += [cursors[-1][0], *cursors[-1]]
+        direction = "DESC" if desc else "ASC"
+        q += f" ORDER BY COALESCE(exit_time, entry_time) {direction}, id {direction} LIMIT ?"
+        df_prev = data.query(q, ("trades",), tuple(params) + (page_size + 1,))
+        has_next = len(df_prev) > page_size
+        df_prev = df_prev.head(page_size)
         if not df_prev.empty:
-            df_prev["Entry Time (PT)"] = df_prev["entry_time"]
-            df_prev["Exit Time (PT)"] = df_prev["exit_time"]
-            df_prev["ROI (%)"] = df_prev.apply(lambda r: roi(r.get("entry_price"), r.get("exit_price")), axis=1)
-            df_prev["Holding Time"] = df_prev.apply(lambda r: None if pd.isna(r.get("exit_time")) else (pd.to_datetime(r.get("exit_time")) - pd.to_datetime(r.get("entry_time"))), axis=1)
-            df_prev["Holding Time"] = df_prev["Holding Time"].astype(str).str.replace("NaT","")
-            df_prev["Exit/Skip Reason"] = df_prev[["exit_reason","skip_reason"]].fillna("").agg(lambda x: x[0] or x[1], axis=1)
-            show = ["ticker","headline","sentiment","sentiment_score","entry_amount","entry_price","Entry Time (PT)",
-                    "exit_price","Exit Time (PT)","ROI (%)","Exit/Skip Reason","Holding Time"]
-            st.dataframe(df_prev[show], use_container_width=True)
+            st.dataframe(with_holding_time(df_prev)[FINISHED_SHOW], use_container_width=True)
         else:
             st.info("No older skipped/closed trades.")
+        nc1, nc2, nc3 = st.columns([1, 1, 4])
+        nc1.button("◀ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+        last = (df_prev["finished_at"].iloc[-1], int(df_prev["id"].iloc[-1])) if has_next else None
+        nc2.button("Next ▶", disabled=not has_next, on_click=cursors.append, args=(last,))
+        nc3.caption(f"Page {len(cursors)}")
     except Exception as e:
         st.warning(f"Error loading previous skipped/closed trades: {e}")
 
-with tab_bt:
+if section == "📉 Run Backtest":
     st.subheader("📉 Run Backtest")
     from_dt = st.date_input("From Date", value=datetime.today() - timedelta(days=7))
     to_dt   = st.date_input("To Date",   value=datetime.today())
@@ -281,20 +306,19 @@ with tab_bt:
     else:
         st.info("Run a backtest to see results here.")
 
-import logs_tab
-with tab_logs:
-    logs_tab.render(conn)
+if section == "📜 Logs":
+    logs_tab.render(data)
 
-with tab_heatmap:
+if section == "🌡️ Heatmap":
     st.subheader("🌡️ News Sentiment Heatmap (7 days)")
     try:
-        df_h = pd.read_sql("""
+        df_h = data.query("""
             SELECT ticker, DATE(news_time) as day, AVG(COALESCE(sentiment_score,0)) as avg_score
             FROM news
             WHERE DATE(news_time) >= DATE('now','-6 days')
             GROUP BY ticker, day
             ORDER BY day DESC
-        """, conn)
+        """, ("news",))
         if df_h.empty:
             st.info("No data for heatmap yet.")
         else:
@@ -303,5 +327,3 @@ with tab_heatmap:
             st.dataframe(pv, use_container_width=True)
     except Exception as e:
         st.warning(f"Could not render heatmap: {e}")
-
-conn.close()
@@ -0,0 +1,40 @@
+# dashboard_data.py
+import sys, os
+sys.path.insert(0, os.path.dirname(__file__))
+from datetime import datetime, timezone
+import pandas as pd
+import streamlit as st
+from utils.db import table_versions
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _read(path: str, sql: str, params: tuple, key: tuple, _conn) -> pd.DataFrame:
+    # `key` only feeds the cache key: the versions of the tables read, plus the UTC day
+    return pd.read_sql(sql, _conn, params=params)
+
+
+class DashboardData:
+    """Read-side cache for one dashboard rerun.
+
+    table_versions (change counters bumped by triggers, see utils.db) is read once per
+    rerun; query() results are cached on the SQL, its params, the current UTC day
+    (for DATE('now') filters) and the versions of just the tables it reads. A rerun
+    in which those tables did not change reuses the cached frame without touching
+    SQLite. Without the counters (old schema) every query goes straight to the DB.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.path = conn.execute("PRAGMA database_list").fetchone()[2]
+        self.versions = table_versions(conn)
+        self.day = datetime.now(timezone.utc).date().isoformat()
+
+    def query(self, sql: str, tables: tuple[str, ...], params: tuple = ()) -> pd.DataFrame:
+        if self.versions is None:
+            return pd.read_sql(sql, self.conn, params=params)
+        key = (self.day,) + tuple(self.versions.get(t, 0) for t in tables)
+        return _read(self.path, sql, tuple(params), key, _conn=self.conn)
+
+    def setting(self, key: str, default: str) -> str:
+        df = self.query("SELECT value FROM settings WHERE key=?", ("settings",), (key,))
+        return df["value"].iloc[0] if not df.empty else default
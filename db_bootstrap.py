@@ -1,8 +1,9 @@
 # db_bootstrap.py
-import os, sqlite3
+import os
+from utils.db import get_conn, apply_migrations
 
 os.makedirs("data", exist_ok=True)
-conn = sqlite3.connect("data/trades.db")
+conn = get_conn()  # also switches the file to WAL journal mode
 cur = conn.cursor()
 
 # Logs
@@ -83,7 +84,19 @@ CREATE TABLE IF NOT EXISTS trade_events (
 )
 """)
 
+# Sentiment cache (content-hash keyed, shared by pipeline + backtester)
+cur.execute("""
+CREATE TABLE IF NOT EXISTS sentiment_cache (
+  key TEXT PRIMARY KEY,
+  label TEXT,
+  score REAL,
+  source TEXT,
+  model_version TEXT,
+  created_at TEXT
+)
+""")
+
 conn.commit()
-conn.close()
+apply_migrations(conn)
 
 # Importing this module is enough to ensure the DB exists.
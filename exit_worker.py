@@ -1,69 +1,225 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-import time, os, sqlite3
+import time, os, threading
 from datetime import datetime
+import numpy as np
 import pytz
-from utils.price import fetch_intraday_bars
-from utils.alerts import send_email, send_telegram
+from utils.bar_cache import get_bars
+from utils.db import get_conn
+from utils.alerts import queue_alert
+from utils.stream import AlpacaStream
+from utils.scheduler import AdaptiveScheduler, EXIT_INTERVALS
 import db_bootstrap  # executes and creates tables on import
 
-DB_PATH = "data/trades.db"
 PAC = pytz.timezone("US/Pacific")
 
 def now_pt():
     return datetime.now(PAC)
 
+OPEN_TRADES_SQL = """
+  SELECT rowid, ticker, entry_price, trailing_stop_loss, market_close_exit, peak_price
+  FROM trades
+  WHERE exit_price IS NULL AND skip_reason IS NULL
+"""
+
+def is_market_close(now) -> bool:
+    # 12:59:30 PT (close ~1pm PT for regular session)
+    return now.hour > 12 or (now.hour == 12 and now.minute >= 59)
+
+def tsl_triggered(peak_price, last_price, tsl) -> bool:
+    drop_pct = (peak_price - last_price) / peak_price * 100.0 if peak_price else 0.0
+    return drop_pct >= float(tsl if tsl is not None else 10.0)
+
+EXIT_SQL = "UPDATE trades SET exit_price=?, exit_time=datetime('now'), exit_reason=? WHERE rowid=?"
+PEAK_SQL = "UPDATE trades SET peak_price=? WHERE rowid=?"
+
+def exit_alert(ticker, price, reason, tsl=None):
+    if reason == "market_close":
+        body = f"🔔 EXIT (Market Close) {ticker}\nExit Price: {price:.2f}"
+        subject = f"BnBot Exit (MOC) {ticker}"
+    else:
+        body = f"🔻 EXIT (TSL) {ticker}\nExit Price: {price:.2f}\nTSL: {tsl}%"
+        subject = f"BnBot Exit (TSL) {ticker}"
+    return subject, body
+
+def close_trade(cur, rid, ticker, price, reason, tsl=None):
+    cur.execute(EXIT_SQL, (price, reason, rid))
+    return exit_alert(ticker, price, reason, tsl)
+
+def send_exit_alert(subject, body):
+    queue_alert(subject, body, kind="exit")
+
+def evaluate_exits(entry, peak, last, tsl, mkt_flag, market_close: bool):
+    """Vectorized tsl_triggered/market-close check over arrays of open trades (None -> NaN).
+
+    Returns (new_peak, drop_pct, tsl_hit, moc) with the same rules as the per-trade path:
+    the peak falls back to entry then last price, TSL defaults to 10%, and a missing
+    or zero market_close_exit flag counts as enabled.
+    """
+    base = np.where(np.isnan(peak) | (peak == 0), entry, peak)
+    base = np.where(np.isnan(base) | (base == 0), last, base)
+    new_peak = np.maximum(base, last)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drop_pct = np.where(new_peak != 0, (new_peak - last) / new_peak * 100.0, 0.0)
+    tsl_hit = drop_pct >= np.where(np.isnan(tsl), 10.0, tsl)
+    flag = np.where(np.isnan(mkt_flag) | (mkt_flag == 0), 1.0, np.trunc(mkt_flag))
+    moc = ~tsl_hit & (flag == 1) & market_close
+    return new_peak, drop_pct, tsl_hit, moc
+
 def process_open_trades():
-    conn = sqlite3.connect(DB_PATH)
+    """One TSL/market-close pass over open trades; returns exits + peak updates made (the burst signal)."""
+    conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute("SELECT rowid, ticker, entry_price, trailing_stop_loss, market_close_exit, peak_price FROM trades WHERE exit_price IS NULL")
+    cur.execute(OPEN_TRADES_SQL)
     rows = cur.fetchall()
-    for rid, ticker, entry_price, tsl, mkt_flag, peak in rows:
-        # Fetch last price
-        df = fetch_intraday_bars(ticker, timeframe="5Min", limit=10)
-        if df is None or df.empty:
-            continue
-        last_price = float(df["close"].iloc[-1])
-
-        # Update peak price
-        peak_price = max(peak or entry_price or last_price, last_price)
-        cur.execute("UPDATE trades SET peak_price=? WHERE rowid=?", (peak_price, rid))
-
-        # Trailing stop logic
-        if tsl is None:
-            tsl = 10.0
-        drop_pct = (peak_price - last_price) / peak_price * 100.0 if peak_price else 0.0
-        if drop_pct >= float(tsl):
-            # Exit at last price
-            cur.execute("UPDATE trades SET exit_price=?, exit_time=datetime('now'), exit_reason=? WHERE rowid=?",
-                        (last_price, f"tsl_{tsl}%", rid))
-            conn.commit()
-            body = f"🔻 EXIT (TSL) {ticker}\nExit Price: {last_price:.2f}\nTSL: {tsl}%"
-            send_email(f"BnBot Exit (TSL) {ticker}", body)
-            send_telegram(body)
-            continue
-
-        # Market close exit
-        now = now_pt()
-        if int(mkt_flag or 1) == 1:
-            # 12:59:30 PT (close ~1pm PT for regular session)
-            if now.hour > 12 or (now.hour == 12 and now.minute >= 59):
-                cur.execute("UPDATE trades SET exit_price=?, exit_time=datetime('now'), exit_reason=? WHERE rowid=?",
-                            (last_price, "market_close", rid))
-                conn.commit()
-                body = f"🔔 EXIT (Market Close) {ticker}\nExit Price: {last_price:.2f}"
-                send_email(f"BnBot Exit (MOC) {ticker}", body)
-                send_telegram(body)
+    if not rows:
+        return 0
+    # Fetch last prices for every open ticker in one batched request
+    bars = get_bars([r[1] for r in rows], timeframe="5Min", limit=10)
+    last_by_ticker = {sym: float(df["close"].iloc[-1]) for sym, df in bars.items() if df is not None and not df.empty}
+
+    rids, tickers, entry, tsl, mkt_flag, peak = zip(*rows)
+    last = np.array([last_by_ticker.get((t or "").upper(), np.nan) for t in tickers], dtype=float)
+    priced = ~np.isnan(last)
+    if not priced.any():
+        return 0
+    idx = np.flatnonzero(priced)
+    entry = np.array(entry, dtype=float)[idx]
+    peak = np.array(peak, dtype=float)[idx]
+    new_peak, _, tsl_hit, moc = evaluate_exits(
+        entry, peak, last[idx], np.array(tsl, dtype=float)[idx], np.array(mkt_flag, dtype=float)[idx],
+        is_market_close(now_pt()),
+    )
+
+    changed = np.isnan(peak) | (new_peak != peak)
+    peak_updates = [(float(new_peak[k]), rids[i]) for k, i in enumerate(idx) if changed[k]]
+    exits, alerts = [], []
+    for k in np.flatnonzero(tsl_hit | moc):
+        i = idx[k]
+        price = float(last[i])
+        if tsl_hit[k]:
+            pct = 10.0 if tsl[i] is None else tsl[i]
+            reason = f"tsl_{pct}%"
+        else:
+            pct, reason = None, "market_close"
+        exits.append((price, reason, rids[i]))
+        alerts.append(exit_alert(tickers[i], price, reason, pct))
 
+    # one transaction for every peak update and exit; alerts go out after the commit
+    cur.executemany(PEAK_SQL, peak_updates)
+    cur.executemany(EXIT_SQL, exits)
     conn.commit()
-    conn.close()
+    for alert in alerts:
+        send_exit_alert(*alert)
+    return len(exits) + len(peak_updates)
+
+
+class StreamingExitEngine:
+    """Per-tick trailing-stop evaluation on a PriceStream.
+
+    sync() mirrors open rows of `trades` into memory and adds/removes stream
+    subscriptions as trades open and close; on_trade() runs the TSL check for
+    every tick of a subscribed ticker. Market-close exits use the last tick price,
+    or the last 5-minute bar close for tickers that have not ticked yet.
+    """
+
+    def __init__(self, stream, sync_interval: float = 5.0):
+        self.stream = stream
+        self.sync_interval = sync_interval
+        self.open: dict[str, dict] = {}  # ticker -> {rowid: [entry_price, tsl, mkt_flag, peak]}
+        self.last_price: dict[str, float] = {}
+        self._lock = threading.Lock()
+        stream.on_trade(self.on_trade)
+
+    def sync(self):
+        fresh: dict[str, dict] = {}
+        with self._lock:
+            conn = get_conn()
+            cur = conn.cursor()
+            cur.execute(OPEN_TRADES_SQL)
+            rows = cur.fetchall()
+            for rid, ticker, entry_price, tsl, mkt_flag, peak in rows:
+                sym = (ticker or "").upper()
+                known = self.open.get(sym, {}).get(rid)
+                # keep a peak seen in memory that may not be persisted yet
+                if known and known[3] is not None and (peak is None or known[3] > peak):
+                    peak = known[3]
+                fresh.setdefault(sym, {})[rid] = [entry_price, tsl, mkt_flag, peak]
+            self.open = fresh
+        self.stream.subscribe(set(fresh) - self.stream.symbols)
+        self.stream.unsubscribe(self.stream.symbols - set(fresh))
+
+    def on_trade(self, symbol, price, ts=None):
+        alerts = []
+        with self._lock:
+            self.last_price[symbol] = price
+            trades = self.open.get(symbol)
+            if not trades:
+                return
+            conn = get_conn()
+            cur = conn.cursor()
+            for rid, t in list(trades.items()):
+                entry_price, tsl, mkt_flag, peak = t
+                peak_price = max(peak or entry_price or price, price)
+                if peak_price != peak:
+                    t[3] = peak_price
+                    cur.execute(PEAK_SQL, (peak_price, rid))
+                tsl = 10.0 if tsl is None else tsl
+                if tsl_triggered(peak_price, price, tsl):
+                    alerts.append(close_trade(cur, rid, symbol, price, f"tsl_{tsl}%", tsl))
+                    del trades[rid]
+            conn.commit()
+        for alert in alerts:
+            send_exit_alert(*alert)
+
+    def check_market_close(self):
+        if not is_market_close(now_pt()):
+            return
+        with self._lock:
+            unpriced = [sym for sym, trades in self.open.items() if trades and sym not in self.last_price]
+        fallback = {}
+        if unpriced:
+            bars = get_bars(unpriced, timeframe="5Min", limit=10)
+            fallback = {sym: float(df["close"].iloc[-1]) for sym, df in bars.items() if df is not None and not df.empty}
+        alerts = []
+        with self._lock:
+            conn = get_conn()
+            cur = conn.cursor()
+            for sym, trades in self.open.items():
+                price = self.last_price.get(sym, fallback.get(sym))
+                if price is None:
+                    continue
+                for rid, (_, _, mkt_flag, _) in list(trades.items()):
+                    if int(mkt_flag or 1) == 1:
+                        alerts.append(close_trade(cur, rid, sym, price, "market_close"))
+                        del trades[rid]
+            conn.commit()
+        for alert in alerts:
+            send_exit_alert(*alert)
+
+    def run(self):
+        self.stream.start()
+        while True:
+            try:
+                self.sync()
+                self.check_market_close()
+            except Exception as e:
+                print("Exit worker error:", e)
+            time.sleep(self.sync_interval)
 
 if __name__ == "__main__":
-    print("🧮 Exit worker running every 10s (TSL + Market Close)")
-    while True:
+    if "--stream" in sys.argv:
+        print("🧮 Exit worker streaming trades (per-tick TSL + Market Close)")
+        StreamingExitEngine(AlpacaStream()).run()
+    print("🧮 Exit worker running (TSL + Market Close, market-hours schedule)")
+
+    def cycle():
         try:
-            process_open_trades()
+            return process_open_trades()
         except Exception as e:
             print("Exit worker error:", e)
-        time.sleep(10)
+            return None
+
+    # burst_threshold: a cycle with many exits/new peaks (a fast market) tightens the interval
+    AdaptiveScheduler("exit", EXIT_INTERVALS, burst_threshold=20).run(cycle)
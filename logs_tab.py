@@ -7,12 +7,16 @@ import streamlit as st
 import pytz
 from datetime import timezone
 import importlib
+import json
 
 PT = pytz.timezone("US/Pacific")
 
 
-def render(conn):
-    """Render the Logs tab: auto-refresh, poller health, latest API calls, DB status, and debug actions."""
+def render(data):
+    """Render the Logs tab: auto-refresh, poller health, latest API calls, DB status, and debug actions.
+
+    `data` is the dashboard's DashboardData: queries are re-run only when their tables change.
+    """
 
     # --- Auto-refresh (user-controlled) ---
     colA, colB = st.columns([1, 2])
@@ -30,7 +34,7 @@ def render(conn):
           ORDER BY id DESC
           LIMIT 1
         """
-        df = pd.read_sql(q, conn)
+        df = data.query(q, ("logs",))
         if df.empty:
             ok, msg = False, "no responses yet"
         else:
@@ -51,7 +55,7 @@ def render(conn):
           ORDER BY id DESC
           LIMIT 10
         """
-        df_calls = pd.read_sql(q_calls, conn)
+        df_calls = data.query(q_calls, ("logs",))
         if df_calls.empty:
             st.info("No recent Benzinga API activity logged.")
         else:
@@ -64,17 +68,17 @@ def render(conn):
 
     # --- DB Status (row counts)
     try:
-        def _count(sql):
+        def _count(sql, table):
             try:
-                return pd.read_sql(sql, conn).iloc[0, 0]
+                return data.query(sql, (table,)).iloc[0, 0]
             except Exception:
                 return 0
 
-        news_cnt     = _count("SELECT COUNT(*) AS n FROM news")
-        logs_cnt     = _count("SELECT COUNT(*) AS n FROM logs")
-        open_cnt     = _count("SELECT COUNT(*) AS n FROM trades WHERE exit_price IS NULL AND skip_reason IS NULL")
-        closed_cnt   = _count("SELECT COUNT(*) AS n FROM trades WHERE exit_price IS NOT NULL")
-        skipped_cnt  = _count("SELECT COUNT(*) AS n FROM trades WHERE skip_reason IS NOT NULL")
+        news_cnt     = _count("SELECT COUNT(*) AS n FROM news", "news")
+        logs_cnt     = _count("SELECT COUNT(*) AS n FROM logs", "logs")
+        open_cnt     = _count("SELECT COUNT(*) AS n FROM trades WHERE exit_price IS NULL AND skip_reason IS NULL", "trades")
+        closed_cnt   = _count("SELECT COUNT(*) AS n FROM trades WHERE exit_price IS NOT NULL", "trades")
+        skipped_cnt  = _count("SELECT COUNT(*) AS n FROM trades WHERE skip_reason IS NOT NULL", "trades")
 
         st.markdown(
             f"**DB Status:** "
@@ -87,6 +91,29 @@ def render(conn):
     except Exception as e:
         st.info(f"DB status unavailable: {e}")
 
+    # --- Sentiment cache counters (cumulative per pipeline process)
+    try:
+        df_sc = data.query("""
+            SELECT timestamp, message
+            FROM logs
+            WHERE component='sentiment' AND event='CACHE_STATS'
+            ORDER BY id DESC
+            LIMIT 1
+        """, ("logs",))
+        if df_sc.empty:
+            st.caption("Sentiment cache: no stats yet.")
+        else:
+            s = json.loads(df_sc["message"].iloc[0])
+            st.markdown(
+                f"**Sentiment cache:** "
+                f"hits (mem) `{s.get('hits_mem', 0)}` • "
+                f"hits (db) `{s.get('hits_db', 0)}` • "
+                f"misses `{s.get('misses', 0)}` • "
+                f"hit rate `{s.get('hit_rate', 0.0)}%`"
+            )
+    except Exception as e:
+        st.info(f"Sentiment cache stats unavailable: {e}")
+
     st.markdown("---")
 
     # --- Manual one-poll trigger
@@ -108,13 +135,13 @@ def render(conn):
 
         # Last parsed sample
         try:
-            df_ps = pd.read_sql("""
+            df_ps = data.query("""
                 SELECT timestamp, message
                 FROM logs
                 WHERE component='benzinga' AND event='PARSED_SAMPLE'
                 ORDER BY id DESC
                 LIMIT 1
-            """, conn)
+            """, ("logs",))
             if df_ps.empty:
                 c1.info("No PARSED_SAMPLE yet. Run the poller or click 'Run one poll now'.")
             else:
@@ -125,13 +152,13 @@ def render(conn):
 
         # Ingest breakdown
         try:
-            df_br = pd.read_sql("""
+            df_br = data.query("""
                 SELECT timestamp, message
                 FROM logs
                 WHERE component='benzinga' AND event='INGEST_SUMMARY_DETAILED'
                 ORDER BY id DESC
                 LIMIT 1
-            """, conn)
+            """, ("logs",))
             if df_br.empty:
                 c2.info("No INGEST_SUMMARY_DETAILED yet.")
             else:
@@ -143,12 +170,12 @@ def render(conn):
         st.markdown("---")
         # Last 5 news rows
         try:
-            df_last_news = pd.read_sql("""
+            df_last_news = data.query("""
                 SELECT ticker, headline, news_time
                 FROM news
                 ORDER BY id DESC
                 LIMIT 5
-            """, conn)
+            """, ("news",))
             if df_last_news.empty:
                 st.info("news table is empty.")
             else:
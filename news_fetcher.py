@@ -1,8 +1,7 @@
 import os
 import time
 import json
-import sqlite3
-import requests
+from collections import OrderedDict
 import pytz
 import xmltodict
 
@@ -10,9 +9,11 @@ from datetime import timezone
 from dateutil import parser
 
 # If your project already has this helper, keep it:
-from utils.logging import log_db  # writes to logs table (timestamp, level, component, event, message, ticker)
-
-DB_PATH = "data/trades.db"
+from utils import http_client
+from utils.db import get_conn, apply_migrations, headline_hash, get_setting, set_setting
+from utils.scheduler import AdaptiveScheduler, NEWS_INTERVALS
+from utils.logging import log_db, flush_logs  # writes to logs table (timestamp, level, component, event, message, ticker)
+import db_bootstrap  # executes and creates tables on import
 
 # Read Benzinga key from Streamlit secrets/env; fallback string is harmless for local dev
 BENZINGA_API_KEY = (
@@ -33,7 +34,7 @@ PT = pytz.timezone("US/Pacific")
 # -----------------------
 def ensure_tables():
     os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_conn()
     cur = conn.cursor()
     cur.execute("""
         CREATE TABLE IF NOT EXISTS logs (
@@ -58,7 +59,7 @@ def ensure_tables():
         )
     """)
     conn.commit()
-    conn.close()
+    apply_migrations(conn)
 
 
 # -----------------------
@@ -164,9 +165,11 @@ def _parse_json_or_xml(resp) -> list[dict]:
             stocks = it.get("stocks")
             articles.append(
                 {
+                    "id": it.get("id"),
                     "title": title,
                     "headline": title,
                     "created": created,
+                    "updated": it.get("updated") or created,
                     "stocks": stocks,  # keep raw; extract_tickers() can handle dict/list/str
                 }
             )
@@ -184,16 +187,15 @@ def save_news_rows(articles: list[dict]) -> int:
     Skips:
       - missing headline/time
       - missing/unknown tickers
-      - duplicate (ticker, headline)
+      - duplicate (ticker, headline) via the unique (ticker, headline_hash) index
+    The page is normalized in memory and written with one INSERT OR IGNORE executemany.
     Emits an INGEST_SUMMARY_DETAILED log with counters.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    conn = get_conn()
 
-    inserted = 0
+    rows = []
     seen = 0
     no_ticker = 0
-    duplicates = 0
     time_parse_err = 0
 
     for a in articles:
@@ -216,23 +218,22 @@ def save_news_rows(articles: list[dict]) -> int:
             no_ticker += 1
             continue
 
+        h = headline_hash(headline)
         for ticker in tickers:
-            cur.execute("SELECT 1 FROM news WHERE ticker=? AND headline=?", (ticker, headline))
-            if cur.fetchone():
-                duplicates += 1
-                continue
-
-            cur.execute(
-                """
-                INSERT INTO news (ticker, headline, sentiment, sentiment_score, sentiment_source, news_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (ticker, headline, None, None, "benzinga", news_time_pt),
-            )
-            inserted += 1
-
+            rows.append((ticker, headline, None, None, "benzinga", news_time_pt, h))
+
+    # single transaction; duplicates are whatever the unique index ignored. rowcount, not
+    # total_changes: the latter also counts the table_versions trigger's writes
+    cur = conn.executemany(
+        """
+        INSERT OR IGNORE INTO news (ticker, headline, sentiment, sentiment_score, sentiment_source, news_time, headline_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
     conn.commit()
-    conn.close()
+    inserted = max(cur.rowcount, 0) if rows else 0
+    duplicates = len(rows) - inserted
 
     # Detailed ingest log for the Logs tab
     log_db(
@@ -252,33 +253,115 @@ def save_news_rows(articles: list[dict]) -> int:
     return inserted
 
 
+# -----------------------
+# Cursor (incremental polling)
+# -----------------------
+CURSOR_KEY = "benzinga_cursor"   # settings row: {"updated": epoch seconds, "id": last article id}
+PAGE_SIZE = 50
+MAX_PAGES_PER_POLL = 20          # catch-up cap per poll; the persisted cursor resumes the rest
+RECENT_IDS_MAX = 5000
+
+_recent_ids: OrderedDict = OrderedDict()  # article id -> updated epoch (LRU)
+
+
+def load_cursor() -> dict | None:
+    raw = get_setting(CURSOR_KEY)
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def save_cursor(cursor: dict):
+    set_setting(CURSOR_KEY, json.dumps(cursor))
+
+
+def article_updated_epoch(a: dict) -> int | None:
+    ts = a.get("updated") or a.get("created") or a.get("published") or ""
+    if not ts:
+        return None
+    try:
+        dt = parser.parse(ts)
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _article_id(a: dict):
+    aid = a.get("id")
+    try:
+        return int(aid) if aid is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_known(articles: list[dict]) -> list[dict]:
+    """Drop articles whose (id, updated) was already ingested by this process."""
+    fresh = []
+    for a in articles:
+        aid = _article_id(a)
+        upd = article_updated_epoch(a)
+        if aid is not None and aid in _recent_ids and _recent_ids[aid] == upd:
+            _recent_ids.move_to_end(aid)
+            continue
+        fresh.append(a)
+    return fresh
+
+
+def remember_articles(articles: list[dict]):
+    for a in articles:
+        aid = _article_id(a)
+        if aid is None:
+            continue
+        _recent_ids[aid] = article_updated_epoch(a)
+        _recent_ids.move_to_end(aid)
+    while len(_recent_ids) > RECENT_IDS_MAX:
+        _recent_ids.popitem(last=False)
+
+
+def advance_cursor(cursor: dict | None, articles: list[dict]) -> dict | None:
+    best = (cursor["updated"], cursor.get("id") or 0) if cursor else None
+    for a in articles:
+        upd = article_updated_epoch(a)
+        if upd is None:
+            continue
+        key = (upd, _article_id(a) or 0)
+        if best is None or key > best:
+            best = key
+    return {"updated": best[0], "id": best[1]} if best else cursor
+
+
+def _is_empty_payload(resp) -> bool:
+    try:
+        data = resp.json()
+    except Exception:
+        return False
+    return data == [] or (isinstance(data, dict) and not data.get("articles"))
+
+
 # -----------------------
 # One-shot fetch
 # -----------------------
 def fetch_and_log_once():
-    ensure_tables()
-
-    url = "https://api.benzinga.com/api/v2/news"
-    params = {
-        "token": BENZINGA_API_KEY,
-        "pagesize": 50,
-        "display_tickers": "true",
-        "format": "json",  # prefer JSON
-    }
-    if TICKER_FILTER:
-        params["tickers"] = TICKER_FILTER
+    """Poll Benzinga once (all pages newer than the cursor). Returns rows inserted, None on error."""
+    try:
+        return _fetch_and_log_once()
+    finally:
+        flush_logs()  # one write for the whole poll
 
-    headers = {"Accept": "application/json"}
 
-    # Log REQUEST
+def _request_page(url: str, params: dict, headers: dict, cursor_mode: bool):
+    """GET one page with REQUEST/RESPONSE logging. Returns the article list, or None on error."""
     try:
         log_db("API", "benzinga", "REQUEST", json.dumps({"url": url, "params": params}))
         start = time.time()
-        resp = requests.get(url, params=params, headers=headers, timeout=20)
+        resp = http_client.get(url, params=params, headers=headers, timeout=20)
         elapsed_ms = int((time.time() - start) * 1000)
     except Exception as e:
         log_db("ERROR", "benzinga", "REQUEST_ERROR", f"{type(e).__name__}: {e}")
-        return
+        return None
 
     # Parse
     articles = _parse_json_or_xml(resp)
@@ -307,7 +390,7 @@ def fetch_and_log_once():
             "RESPONSE_ERROR",
             json.dumps({"status": resp.status_code, "body": resp.text[:800]}),
         )
-        return
+        return None
 
     if articles:
         try:
@@ -315,35 +398,93 @@ def fetch_and_log_once():
             log_db("DEBUG", "benzinga", "PARSED_SAMPLE", json.dumps(sample))
         except Exception:
             pass
-    else:
+    elif not (cursor_mode and _is_empty_payload(resp)):
         log_db(
             "ERROR",
             "benzinga",
             "PARSE_ERROR",
             json.dumps({"error": "No articles parsed", "body_snip": resp.text[:800]}),
         )
-        return
+        return None
+    return articles
+
+
+def _fetch_and_log_once():
+    ensure_tables()
+
+    url = "https://api.benzinga.com/api/v2/news"
+    params = {
+        "token": BENZINGA_API_KEY,
+        "pagesize": PAGE_SIZE,
+        "display_tickers": "true",
+        "format": "json",  # prefer JSON
+    }
+    if TICKER_FILTER:
+        params["tickers"] = TICKER_FILTER
+
+    headers = {"Accept": "application/json"}
 
+    # With a cursor: only items updated since it, oldest first, paging until caught up.
+    # Without one (first run): the latest page, which then seeds the cursor.
+    cursor = load_cursor()
+    if cursor:
+        params["updatedSince"] = cursor["updated"]
+        params["sort"] = "updated:asc"
+
+    total = 0
+    latest = cursor
+    for page in range(MAX_PAGES_PER_POLL if cursor else 1):
+        p = params.copy()
+        if page > 0:
+            p["page"] = page
+        articles = _request_page(url, p, headers, cursor_mode=bool(cursor))
+        if articles is None:
+            return None
+
+        fresh = filter_known(articles)
+        if fresh:
+            try:
+                inserted = save_news_rows(fresh)
+                log_db("INFO", "benzinga", "INGEST_SUMMARY", f"Inserted {inserted} news rows.")
+                total += inserted
+            except Exception as e:
+                log_db(
+                    "ERROR",
+                    "benzinga",
+                    "PARSE_ERROR",
+                    json.dumps({"error": f"{type(e).__name__}: {e}", "skipped_known": len(articles) - len(fresh)}),
+                )
+                return None
+        remember_articles(articles)
+
+        # persist after every page so a restart resumes without a gap
+        new_cursor = advance_cursor(latest, articles)
+        if new_cursor and new_cursor != latest:
+            save_cursor(new_cursor)
+            latest = new_cursor
+        if len(articles) < PAGE_SIZE:
+            break
+    return total
+
+
+_polls = 0
+
+
+def poll_once():
+    """One scheduled poll: rows inserted, or None so the scheduler backs off."""
+    global _polls
+    _polls += 1
+    if _polls % 60 == 0:
+        log_db("INFO", "http", "HTTP_STATS", json.dumps(http_client.get_client().stats()))
     try:
-        inserted = save_news_rows(articles)
-        log_db("INFO", "benzinga", "INGEST_SUMMARY", f"Inserted {inserted} news rows.")
+        return fetch_and_log_once()
     except Exception as e:
-        log_db(
-            "ERROR",
-            "benzinga",
-            "PARSE_ERROR",
-            json.dumps({"error": f"{type(e).__name__}: {e}", "body_snip": resp.text[:800]}),
-        )
-        return
+        # Final guard: never crash the loop
+        log_db("ERROR", "benzinga", "UNHANDLED", f"{type(e).__name__}: {e}")
+        return None
 
 
 if __name__ == "__main__":
     ensure_tables()
-    print("🚀 Polling Benzinga every 10s")
-    while True:
-        try:
-            fetch_and_log_once()
-        except Exception as e:
-            # Final guard: never crash the loop
-            log_db("ERROR", "benzinga", "UNHANDLED", f"{type(e).__name__}: {e}")
-        time.sleep(10)
\ No newline at end of file
+    print("🚀 Polling Benzinga (market-hours schedule)")
+    AdaptiveScheduler("news", NEWS_INTERVALS, burst_threshold=10).run(poll_once)
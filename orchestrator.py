@@ -0,0 +1,135 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(__file__))
+import asyncio, json, time, argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from news_fetcher import ensure_tables, poll_once
+from pipeline import run_pipeline_once, BATCH_SIZE
+from exit_worker import process_open_trades
+from utils.sentiment import warmup
+from utils.scheduler import AdaptiveScheduler, NEWS_INTERVALS, PIPELINE_INTERVALS, EXIT_INTERVALS
+from utils.logging import log_db, flush_logs
+from utils.alerts import get_dispatcher
+from utils.db import close_conns
+import db_bootstrap  # executes and creates tables on import
+
+COMPONENTS = ("ingest", "decide", "exit")
+LATENCY_WINDOW = 1000  # recent decision latencies kept in memory
+
+
+class Orchestrator:
+    """Runs ingest, decide and exit as asyncio tasks in one process.
+
+    Each component keeps its own single-thread executor (and so its own SQLite
+    connection and FinBERT/HTTP state) and its market-hours AdaptiveScheduler.
+    A news poll that inserts rows puts an event on the decide queue, which wakes
+    the pipeline straight away instead of at its next tick; a decide cycle that
+    evaluated rows wakes the exit task the same way. News-to-decision latency
+    (insert committed -> pipeline cycle done) is logged as DECISION_LATENCY, off
+    the event loop; the last LATENCY_WINDOW values are kept in latencies_ms.
+    """
+
+    def __init__(self, components=COMPONENTS):
+        self.components = tuple(components)
+        self.executors = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"bnbot-{name}")
+                          for name in self.components}
+        self.decide_q: asyncio.Queue | None = None
+        self.exit_q: asyncio.Queue | None = None
+        self.latencies_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    async def _wait(q: asyncio.Queue | None, timeout: float) -> list:
+        """Sleep up to `timeout`, returning early with every queued event once one arrives."""
+        if q is None:
+            await asyncio.sleep(timeout)
+            return []
+        try:
+            events = [await asyncio.wait_for(q.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not q.empty():
+            events.append(q.get_nowait())
+        return events
+
+    async def ingest(self):
+        sched = AdaptiveScheduler("news", NEWS_INTERVALS, burst_threshold=10)
+        while True:
+            inserted, wait = await sched.run_once_async(poll_once, self.executors["ingest"])
+            if inserted and self.decide_q is not None:
+                self.decide_q.put_nowait((inserted, time.monotonic()))
+            await asyncio.sleep(wait)
+
+    async def decide(self):
+        sched = AdaptiveScheduler("pipeline", PIPELINE_INTERVALS, burst_threshold=10)
+        await asyncio.get_running_loop().run_in_executor(self.executors["decide"], warmup)
+        pending, decided = [], 0
+        while True:
+            processed, wait = await sched.run_once_async(run_pipeline_once, self.executors["decide"])
+            # a cycle takes the oldest BATCH_SIZE rows, so pending inserts are only known to be
+            # decided once a successful cycle comes back short (backlog drained); a failed
+            # cycle (None) keeps them for the retry
+            if processed is not None:
+                decided += processed
+                if processed < BATCH_SIZE:
+                    if pending:
+                        now = time.monotonic()
+                        lat = [round((now - t) * 1000, 1) for _, t in pending]
+                        self.latencies_ms.extend(lat)
+                        await asyncio.to_thread(self._log_latency, sum(n for n, _ in pending), decided, lat)
+                    pending, decided = [], 0
+            if processed and self.exit_q is not None:
+                self.exit_q.put_nowait(processed)
+            if processed == BATCH_SIZE:
+                continue  # more rows past the watermark: keep draining
+            pending.extend(await self._wait(self.decide_q, wait))
+
+    @staticmethod
+    def _log_latency(inserted: int, processed: int, lat: list[float]):
+        log_db("INFO", "orchestrator", "DECISION_LATENCY", json.dumps(
+            {"inserted": inserted, "processed": processed, "max_ms": max(lat), "min_ms": min(lat)}))
+        flush_logs()
+
+    async def exit(self):
+        sched = AdaptiveScheduler("exit", EXIT_INTERVALS, burst_threshold=20)
+        while True:
+            _, wait = await sched.run_once_async(process_open_trades, self.executors["exit"])
+            await self._wait(self.exit_q, wait)
+
+    async def run(self):
+        if "decide" in self.components:
+            self.decide_q = asyncio.Queue() if "ingest" in self.components else None
+            self.exit_q = asyncio.Queue() if "exit" in self.components else None
+        tasks = [asyncio.create_task(getattr(self, name)(), name=name) for name in self.components]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    def shutdown(self):
+        for ex in self.executors.values():
+            ex.submit(close_conns)
+            ex.shutdown(wait=True)
+        flush_logs()
+        get_dispatcher().flush(10.0)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run BnBot ingest, decide and exit in one process")
+    ap.add_argument("--only", default=",".join(COMPONENTS),
+                    help="comma-separated subset of: " + ", ".join(COMPONENTS))
+    args = ap.parse_args()
+    components = [c.strip() for c in args.only.split(",") if c.strip()]
+    unknown = set(components) - set(COMPONENTS)
+    if unknown:
+        ap.error(f"unknown component(s): {', '.join(sorted(unknown))}")
+
+    ensure_tables()
+    print(f"🚀 BnBot orchestrator running: {', '.join(components)}")
+    orch = Orchestrator(components)
+    try:
+        asyncio.run(orch.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        orch.shutdown()
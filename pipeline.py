@@ -1,12 +1,14 @@
-import os, sqlite3, math
+import os, math, json, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from utils.sentiment import score_sentiment
-from utils.price import fetch_intraday_bars, calc_vwap, calc_rvol, breaks_recent_resistance
-from utils.db import get_setting, record_capital_usage
+from utils.sentiment import score_sentiment_batch, benzinga_sentiment
+from utils.sentiment_cache import get_cache
+from utils.logging import log_db, flush_logs
+from utils.indicators import get_book
+from utils.bar_cache import get_bars
+from utils.db import get_conn, get_setting, record_capital_usage
 from utils.broker import get_account_balance_alpaca
-from utils.alerts import send_email, send_telegram
-
-DB_PATH = "data/trades.db"
+from utils.alerts import queue_alert, get_dispatcher
 
 def now_iso():
     return datetime.now(timezone.utc).isoformat()
@@ -24,84 +26,179 @@ def get_account_params():
 def latest_price_from_df(df):
     return float(df["close"].iloc[-1])
 
-def try_place_trade(cur, ticker, headline, sentiment, score, source, entry_price, per_trade_usd):
+def try_place_trade(cur, ticker, headline, sentiment, score, source, entry_price, per_trade_usd, news_id=None):
     # For simplicity: buy 'amount' dollars worth at entry_price
     shares = max(1, math.floor(per_trade_usd / max(entry_price, 0.01)))
     notional = shares * entry_price
 
     # Insert trade
     cur.execute("""
-      INSERT INTO trades (ticker, headline, sentiment, sentiment_score, sentiment_source,
+      INSERT INTO trades (news_id, ticker, headline, sentiment, sentiment_score, sentiment_source,
                           entry_price, entry_amount, entry_time, trailing_stop_loss, market_close_exit, peak_price)
-      VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), 10.0, 1, ?)
-    """, (ticker, headline, sentiment, score, source, entry_price, notional, entry_price))
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 10.0, 1, ?)
+    """, (news_id, ticker, headline, sentiment, score, source, entry_price, notional, entry_price))
     record_capital_usage(ticker, notional)
 
     # Alerts
     body = f"✅ ENTRY {ticker}\nPrice: {entry_price:.2f}\nNotional: ${notional:,.2f}\nSentiment: {sentiment} ({score}) via {source}\nHeadline: {headline}"
-    send_email(f"BnBot Entry {ticker}", body)
-    send_telegram(body)
+    queue_alert(f"BnBot Entry {ticker}", body, kind="entry")
 
-def log_skip(cur, ticker, headline, reason, sentiment, score, source):
+def log_skip(cur, news_id, ticker, headline, reason, sentiment, score, source):
     cur.execute("""
-      INSERT INTO trades (ticker, headline, sentiment, sentiment_score, sentiment_source, entry_time, skip_reason)
-      VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
-    """, (ticker, headline, sentiment, score, source, reason))
+      INSERT INTO trades (news_id, ticker, headline, sentiment, sentiment_score, sentiment_source, entry_time, skip_reason)
+      VALUES (?, ?, ?, ?, ?, ?, datetime('now'), ?)
+    """, (news_id, ticker, headline, sentiment, score, source, reason))
     body = f"⛔ SKIP {ticker}\nReason: {reason}\nSentiment: {sentiment} ({score}) via {source}\nHeadline: {headline}"
-    send_email(f"BnBot Skip {ticker}", body)
-    send_telegram(body)
+    queue_alert(f"BnBot Skip {ticker}", body, kind="skip")
 
-def run_pipeline_once():
-    acct, per_trade = get_account_params()
-    bal = get_account_balance_alpaca() or {"buying_power": acct}
-    available = float(bal.get("buying_power", acct))
+WATERMARK_KEY = "pipeline_news_watermark"
+BATCH_SIZE = 50  # news rows evaluated per cycle
+
+def get_watermark(cur) -> int:
+    """Highest news.id already evaluated. Starts at the newest news_id linked in trades."""
+    cur.execute("SELECT value FROM settings WHERE key=?", (WATERMARK_KEY,))
+    row = cur.fetchone()
+    if row:
+        return int(row[0])
+    cur.execute("SELECT COALESCE(MAX(news_id), 0) FROM trades")
+    return int(cur.fetchone()[0])
+
+PIPELINE_WORKERS = int(os.getenv("BNBOT_PIPELINE_WORKERS", "4"))
+BAR_CHUNK = 10  # tickers per concurrent bar request
+# fetch bars for tickers whose Benzinga tag already passes the sentiment gate while the rest
+# is scored; set BNBOT_PREFETCH_BARS=0 to fetch every bullish ticker only after scoring
+PREFETCH_BARS = os.getenv("BNBOT_PREFETCH_BARS", "1") != "0"
+
+# per-stage milliseconds of the last cycle that had rows (also logged as PIPELINE_TIMINGS)
+LAST_TIMINGS: dict = {}
+
+_pool = None
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+    return _pool
 
-    conn = sqlite3.connect(DB_PATH)
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def _submit_bars(pool, tickers) -> dict:
+    symbols = sorted({(t or "").upper().strip() for t in tickers} - {""})
+    return {pool.submit(get_bars, symbols[i:i + BAR_CHUNK], timeframe="5Min", limit=120): symbols[i:i + BAR_CHUNK]
+            for i in range(0, len(symbols), BAR_CHUNK)}
+
+def run_pipeline_once():
+    """Evaluate news past the watermark; returns how many rows were processed."""
+    t0 = time.perf_counter()
+    timings = {}
+    conn = get_conn()
     cur = conn.cursor()
 
-    # Fetch latest unprocessed news (not used in trades table yet)
+    # Only news that arrived after the watermark (news.id is monotonic); the NOT EXISTS
+    # guard (indexed on trades.news_id) covers a cycle that stopped before saving it.
+    watermark = get_watermark(cur)
     cur.execute("""
       SELECT n.id, n.ticker, n.headline, n.sentiment, n.sentiment_score, n.sentiment_source, n.news_time
       FROM news n
-      WHERE n.id NOT IN (SELECT COALESCE(news_id,0) FROM trades)
-      ORDER BY n.news_time DESC
-      LIMIT 50
-    """)
+      WHERE n.id > ?
+        AND NOT EXISTS (SELECT 1 FROM trades t WHERE t.news_id = n.id)
+      ORDER BY n.id
+      LIMIT ?
+    """, (watermark, BATCH_SIZE))
     rows = cur.fetchall()
+    if not rows:
+        flush_logs()
+        return 0
+    timings["select_ms"] = _ms(t0)
+    new_watermark = max(r[0] for r in rows)
+    # evaluate the freshest headlines first within the batch (id breaks ties: deterministic)
+    rows.sort(key=lambda r: (r[6] or "", r[0]), reverse=True)
+
+    acct, per_trade = get_account_params()
+    pool = _get_pool()
+    # network-bound stages run on the pool while sentiment is scored here:
+    # the balance lookup and one bar request per small chunk of tickers,
+    # so one slow Alpaca response only holds up its own chunk
+    t = time.perf_counter()
+    bal_future = pool.submit(get_account_balance_alpaca)
+    benzinga = [{"sentiment": r[3]} if r[3] else None for r in rows]
+    prefetched = set()
+    if PREFETCH_BARS:
+        # a Benzinga tag wins in scoring, so these tickers are bullish whatever the model says
+        prefetched = {(r[1] or "").upper() for r, b in zip(rows, benzinga)
+                      if (benzinga_sentiment(b) or ("",))[0] == "bullish"}
+    bar_futures = _submit_bars(pool, prefetched)
+
+    # sentiment for the whole poll in one batch (with benzinga prefer)
+    scored = score_sentiment_batch([r[2] for r in rows], benzinga)
+    timings["sentiment_ms"] = _ms(t)
+
+    bullish = {(r[1] or "").upper() for r, s in zip(rows, scored) if s[0] in ("bullish","very bullish")}
+    t = time.perf_counter()
+    bar_futures.update(_submit_bars(pool, bullish - prefetched))
+
+    # indicators once per bullish ticker, as each chunk of bars lands
+    indicators = {}
+    t_ind = 0.0
+    for fut in as_completed(bar_futures):
+        try:
+            bars = fut.result()
+        except Exception as e:
+            log_db("ERROR", "pipeline", "BARS_ERROR", f"{type(e).__name__}: {e}")
+            continue
+        ti = time.perf_counter()
+        for sym, df in bars.items():
+            if sym in bullish:
+                indicators[sym] = (get_book(rvol_window=30, lookback=20).evaluate(sym, df), float(df["close"].iloc[-1]))
+        t_ind += time.perf_counter() - ti
+    # bars_ms: waiting for bars once scoring is done (prefetched chunks may have landed
+    # already); stages don't overlap, so they add up to the cycle's critical path
+    timings["bars_ms"] = round(_ms(t) - t_ind * 1000, 1)
+    timings["indicators_ms"] = round(t_ind * 1000, 1)
+
+    bal = bal_future.result() or {"buying_power": acct}
+    available = float(bal.get("buying_power", acct))
 
-    for news_id, ticker, headline, bz_sent, bz_score, bz_source, news_time in rows:
-        # sentiment (with benzinga prefer)
-        sentiment, score, source = score_sentiment(headline, {"sentiment": bz_sent} if bz_sent else None)
+    # decisions and writes: serialized, in the sorted order above
+    t = time.perf_counter()
+    for (news_id, ticker, headline, bz_sent, bz_score, bz_source, news_time), (sentiment, score, source) in zip(rows, scored):
         if sentiment not in ("bullish","very bullish"):
-            log_skip(cur, ticker, headline, "Sentiment not bullish", sentiment, score, source)
+            log_skip(cur, news_id, ticker, headline, "Sentiment not bullish", sentiment, score, source)
             continue
 
-        # fetch price data
-        df = fetch_intraday_bars(ticker, timeframe="5Min", limit=120)
-        if df is None:
-            log_skip(cur, ticker, headline, "No price data", sentiment, score, source)
+        evaluated = indicators.get((ticker or "").upper())
+        if evaluated is None:
+            log_skip(cur, news_id, ticker, headline, "No price data", sentiment, score, source)
             continue
 
-        # indicators
-        vwap = calc_vwap(df).iloc[-1]
-        rvol = calc_rvol(df, window=30)
-        above_vwap = df["close"].iloc[-1] > vwap
-        resistance_break = breaks_recent_resistance(df, lookback=20)
+        ind, entry_price = evaluated
+        rvol = ind["rvol"]
+        above_vwap = ind["close"] > ind["vwap"]
+        resistance_break = ind["breaks_resistance"]
         if not (above_vwap and rvol > 1.5 and resistance_break):
-            log_skip(cur, ticker, headline, "VWAP/RVOL/Resistance not met", sentiment, score, source)
+            log_skip(cur, news_id, ticker, headline, "VWAP/RVOL/Resistance not met", sentiment, score, source)
             continue
 
         # place trade
-        entry_price = df["close"].iloc[-1]
         # Check available capital
         if per_trade > available:
-            log_skip(cur, ticker, headline, f"Insufficient capital: need ${per_trade:,.2f}, have ${available:,.2f}", sentiment, score, source)
+            log_skip(cur, news_id, ticker, headline, f"Insufficient capital: need ${per_trade:,.2f}, have ${available:,.2f}", sentiment, score, source)
             continue
-        try_place_trade(cur, ticker, headline, sentiment, score, source, entry_price, per_trade_usd=per_trade)
+        # news_id goes in with the trade row; the capital_usage row joins this cycle's transaction
+        try_place_trade(cur, ticker, headline, sentiment, score, source, entry_price, per_trade_usd=per_trade, news_id=news_id)
         available -= per_trade
 
-        # link news_id to trade
-        cur.execute("UPDATE trades SET news_id=? WHERE rowid=last_insert_rowid()", (news_id,))
-
+    cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES(?,?)", (WATERMARK_KEY, str(new_watermark)))
     conn.commit()
-    conn.close()
+    timings["decide_ms"] = _ms(t)
+    timings["total_ms"] = _ms(t0)
+    timings["rows"] = len(rows)
+    LAST_TIMINGS.clear()
+    LAST_TIMINGS.update(timings)
+
+    log_db("INFO", "pipeline", "PIPELINE_TIMINGS", json.dumps(timings))
+    log_db("INFO", "sentiment", "CACHE_STATS", json.dumps(get_cache().stats()))
+    log_db("INFO", "alerts", "QUEUE_STATS", json.dumps(get_dispatcher().stats()))
+    flush_logs()
+    return len(rows)
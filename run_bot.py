@@ -1,14 +1,19 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-import time
 from pipeline import run_pipeline_once
+from utils.scheduler import AdaptiveScheduler, PIPELINE_INTERVALS
+from utils.sentiment import warmup
 import db_bootstrap  # executes and creates tables on import
 
 if __name__ == "__main__":
-    print("🚀 BnBot pipeline running every 10 seconds")
-    while True:
+    print("🚀 BnBot pipeline running (market-hours schedule)")
+    warmup()  # load FinBERT once, before the first headline
+
+    def cycle():
         try:
-            run_pipeline_once()
+            return run_pipeline_once()
         except Exception as e:
             print(f"❌ Pipeline error: {e}")
-        time.sleep(10)
+            return None
+
+    AdaptiveScheduler("pipeline", PIPELINE_INTERVALS, burst_threshold=10).run(cycle)
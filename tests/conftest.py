@@ -0,0 +1,9 @@
+import os, sys, tempfile
+
+# Point every module at a throwaway database before anything imports utils.db
+_tmp = tempfile.mkdtemp(prefix="bnbot-tests-")
+os.environ["BNBOT_DB_PATH"] = os.path.join(_tmp, "trades.db")
+for var in ("TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID", "EMAIL_HOST", "EMAIL_USERNAME", "EMAIL_PASSWORD"):
+    os.environ.pop(var, None)
+os.chdir(_tmp)  # db_bootstrap creates ./data
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
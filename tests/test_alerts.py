@@ -0,0 +1,32 @@
+import threading
+from utils import alerts
+from utils.alerts import AlertDispatcher
+
+
+def test_coalesce_merges_only_adjacent_runs():
+    d = AlertDispatcher(digest_threshold=3)
+    batch = [("skip", "s1", "a"), ("skip", "s2", "b"), ("skip", "s3", "c"),
+             ("exit", "x1", "exit AAA"),
+             ("skip", "s4", "d"), ("skip", "s5", "e"),
+             ("entry", "e1", "entry BBB")]
+    out = d._coalesce(batch)
+    assert [s for s, _ in out] == ["BnBot Skip digest (3)", "x1", "s4", "s5", "e1"]
+    assert out[0][1] == "3 skip alerts\n\na\n\nb\n\nc"
+    assert d.coalesced == 2
+
+
+def test_get_dispatcher_is_a_singleton_across_threads(monkeypatch):
+    monkeypatch.setattr(alerts, "_dispatcher", None)
+    seen, go = [], threading.Event()
+
+    def grab():
+        go.wait()
+        seen.append(alerts.get_dispatcher())
+
+    threads = [threading.Thread(target=grab) for _ in range(8)]
+    for t in threads:
+        t.start()
+    go.set()
+    for t in threads:
+        t.join()
+    assert len({id(d) for d in seen}) == 1
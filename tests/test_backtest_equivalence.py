@@ -0,0 +1,88 @@
+"""simulate_exits / summarize against the per-trade loops they replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+from utils.backtest import simulate_exits, summarize, EXIT_BARS
+
+
+def legacy_exit(entry, closes, tsl_pct):
+    peak = entry
+    for px in closes:
+        px = float(px)
+        peak = max(peak, px)
+        if (peak - px) / peak * 100.0 >= tsl_pct:
+            return px, True
+    return float(closes[-1]), False
+
+
+def legacy_summary(df):
+    if df is None or df.empty:
+        return {"trades": 0, "wins": 0, "win_rate": 0.0, "avg_roi": 0.0, "total_pnl": 0.0, "max_drawdown": 0.0}
+    closed = df[df["result"]=="closed"].copy()
+    wins = (closed["roi"] > 0).sum() if "roi" in closed else 0
+    trades = len(closed)
+    win_rate = round((wins / trades * 100.0), 2) if trades else 0.0
+    avg_roi = round(closed["roi"].mean(), 2) if trades else 0.0
+    total_pnl = round((closed["exit_price"] - closed["entry_price"]).sum(), 2) if trades else 0.0
+    max_drawdown = 0.0
+    if trades:
+        eq = (closed["exit_price"] - closed["entry_price"]).cumsum()
+        peak = 0.0
+        for v in eq:
+            peak = max(peak, v)
+            max_drawdown = max(max_drawdown, peak - v)
+    return {"trades": trades, "wins": int(wins), "win_rate": win_rate, "avg_roi": avg_roi,
+            "total_pnl": total_pnl, "max_drawdown": round(max_drawdown, 2)}
+
+
+def fixture_paths(n=400, seed=11):
+    """Hand-written edge cases plus seeded random walks of varying length (1..EXIT_BARS bars)."""
+    cases = [
+        (100.0, [89.0]),                      # stops on the first bar
+        (100.0, [110.0, 99.0]),               # exactly 10% off the peak
+        (100.0, [101.0, 102.0, 103.0]),       # never stops: timed exit
+        (50.0, [50.0]),                       # flat single bar
+        (20.0, [25.0, 30.0, 26.9, 27.5]),     # stops after a new high
+    ]
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        entry = float(rng.uniform(5, 200))
+        k = int(rng.integers(1, EXIT_BARS + 1))
+        cases.append((entry, list(entry * np.exp(np.cumsum(rng.normal(0, 0.03, k))))))
+    entries = np.array([c[0] for c in cases])
+    paths = np.full((len(cases), EXIT_BARS), np.nan)
+    for i, (_, closes) in enumerate(cases):
+        paths[i, :len(closes)] = closes
+    return cases, entries, paths
+
+
+@pytest.mark.parametrize("tsl_pct", [0.5, 5.0, 10.0, 25.0])
+def test_simulate_exits_matches_per_trade_loop(tsl_pct):
+    cases, entries, paths = fixture_paths()
+    exit_px, tsl_hit = simulate_exits(entries, paths, tsl_pct)
+    for i, (entry, closes) in enumerate(cases):
+        assert (exit_px[i], bool(tsl_hit[i])) == legacy_exit(entry, closes, tsl_pct)
+
+
+def result_frame(seed):
+    rng = np.random.default_rng(seed)
+    n = 60
+    entry = rng.uniform(5, 100, n)
+    exit_px = entry * (1 + rng.normal(0, 0.05, n))
+    result = np.where(rng.random(n) < 0.7, "closed", "skipped")
+    return pd.DataFrame({"entry_price": entry, "exit_price": exit_px,
+                         "roi": np.round((exit_px - entry) / entry * 100.0, 2), "result": result})
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_summarize_matches_per_trade_loop(seed):
+    df = result_frame(seed)
+    assert summarize(df) == legacy_summary(df)
+
+
+def test_summarize_edge_cases():
+    losses = pd.DataFrame({"entry_price": [10.0, 10.0], "exit_price": [9.0, 8.0], "roi": [-10.0, -20.0],
+                           "result": ["closed", "closed"]})
+    skipped = pd.DataFrame({"entry_price": [None], "exit_price": [None], "roi": [None], "result": ["skipped"]})
+    for df in (losses, skipped, pd.DataFrame(), None):
+        assert summarize(df) == legacy_summary(df)
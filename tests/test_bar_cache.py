@@ -0,0 +1,54 @@
+import pandas as pd
+from utils.bar_cache import BarCache
+
+T0 = pd.Timestamp("2025-03-03 14:30", tz="UTC")
+
+
+class Feed:
+    """Fake multi-symbol fetch: `bars` per ticker, `down` tickers fail (omitted, like a non-200 chunk)."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.down = set()
+        self.calls = []
+
+    def __call__(self, tickers, start_iso=None, timeframe="5Min", limit=None, **kw):
+        self.calls.append((tuple(tickers), start_iso))
+        out = {}
+        for t in tickers:
+            if t in self.down or t not in self.bars:
+                continue
+            n = self.bars[t]
+            df = pd.DataFrame({"time": [T0 + pd.Timedelta(minutes=5 * i) for i in range(n)], "close": [float(i) for i in range(n)]})
+            if start_iso:
+                df = df[df["time"] >= pd.Timestamp(start_iso)]
+            out[t] = df.tail(limit).reset_index(drop=True) if limit else df
+        return out
+
+
+def test_failed_refresh_leaves_ticker_out_instead_of_serving_old_bars():
+    feed = Feed({"AAA": 10, "BBB": 10})
+    cache = BarCache(fetch=feed)
+    assert set(cache.get_many(["AAA", "BBB"], limit=5)) == {"AAA", "BBB"}
+
+    feed.bars["AAA"] = feed.bars["BBB"] = 11
+    feed.down = {"AAA"}
+    out = cache.get_many(["AAA", "BBB"], limit=5)
+    assert set(out) == {"BBB"}
+    assert out["BBB"]["close"].iloc[-1] == 10.0
+    assert cache.stats()["stale"] == 1
+
+    feed.down = set()  # recovers on the next call, through the same delta
+    out = cache.get_many(["AAA"], limit=5)
+    assert out["AAA"]["close"].tolist() == [6.0, 7.0, 8.0, 9.0, 10.0]
+
+
+def test_warm_deltas_are_grouped_by_last_bar():
+    feed = Feed({"AAA": 50, "BBB": 50, "QUIET": 3})
+    cache = BarCache(fetch=feed)
+    cache.get_many(["AAA", "BBB", "QUIET"], limit=3)
+    feed.calls.clear()
+    cache.get_many(["AAA", "BBB", "QUIET"], limit=3)
+    starts = {tickers: start for tickers, start in feed.calls}
+    assert starts == {("AAA", "BBB"): "2025-03-03T18:35:00Z", ("QUIET",): "2025-03-03T14:40:00Z"}
+    assert cache.stats()["delta_fetches"] == 2
@@ -0,0 +1,34 @@
+from datetime import date
+import pandas as pd
+from utils.bar_store import BarStore
+
+
+def frame(day: str, n: int = 3):
+    times = pd.date_range(f"{day} 14:30", periods=n, freq="5min", tz="UTC")
+    return pd.DataFrame({"time": times, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 100.0})
+
+
+def test_failed_group_is_counted_and_retried_empty_days_are_stored(tmp_path):
+    calls = []
+
+    def fetch(tickers, start_iso=None, end_iso=None, **kw):
+        calls.append(tuple(tickers))
+        if "BAD" in tickers:
+            raise RuntimeError("Alpaca bars HTTP 500")
+        return {"AAA": frame("2025-03-03")} if "AAA" in tickers else {}
+
+    store = BarStore(root=str(tmp_path), fetch=fetch)
+    spans = {"AAA": (pd.Timestamp("2025-03-03 15:00", tz="UTC"), pd.Timestamp("2025-03-04 20:00", tz="UTC")),
+             "EMPTY": (pd.Timestamp("2025-03-05 15:00", tz="UTC"), pd.Timestamp("2025-03-05 20:00", tz="UTC")),
+             "BAD": (pd.Timestamp("2025-03-06 15:00", tz="UTC"), pd.Timestamp("2025-03-06 20:00", tz="UTC"))}
+    assert store.fill(spans) == 3
+    assert store.failures == 1
+    assert store.has_day("EMPTY", "5Min", date(2025, 3, 5))  # valid but empty: stored
+    assert not store.has_day("BAD", "5Min", date(2025, 3, 6))
+    assert len(store.load("AAA", "2025-03-03", "2025-03-05", fill=False)) == 3
+    assert store.load("EMPTY", "2025-03-05", "2025-03-06", fill=False).empty
+
+    calls.clear()
+    store.fill(spans)
+    assert calls == [("BAD",)]  # only the failed group is fetched again
+    assert store.stats()["failures"] == 2
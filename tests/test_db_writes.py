@@ -0,0 +1,33 @@
+from utils.db import get_conn, record_capital_usage, set_setting
+from utils.logging import LogBuffer
+from utils.sentiment_cache import SentimentCache
+
+
+def count(table, where="1"):
+    return get_conn().execute(f"SELECT COUNT(*) FROM {table} WHERE {where}").fetchone()[0]
+
+
+def test_helpers_do_not_commit_the_callers_transaction():
+    conn = get_conn()
+    conn.execute("DELETE FROM capital_usage"); conn.commit()
+    before = count("logs")
+    conn.execute("INSERT INTO settings(key, value) VALUES ('half_done', '1')")
+    record_capital_usage("AAA", 100.0)
+    set_setting("other", "x")
+    buf = LogBuffer(batch_size=1, drop_levels=set())
+    buf.write(("2025-01-01T00:00:00+00:00", "ERROR", "test", "EVT", "msg", None))
+    SentimentCache().put_many({"k": ("bullish", 0.9, "finbert", "v1")})
+    assert conn.in_transaction
+    conn.rollback()
+    assert count("settings", "key IN ('half_done', 'other')") == 0
+    assert count("capital_usage") == 0
+    assert count("logs") == before
+
+
+def test_helpers_commit_on_their_own_outside_a_transaction():
+    conn = get_conn()
+    conn.commit()
+    record_capital_usage("BBB", 50.0)
+    assert not conn.in_transaction
+    conn.rollback()
+    assert count("capital_usage", "ticker='BBB'") == 1
@@ -0,0 +1,86 @@
+"""evaluate_exits / process_open_trades against the per-trade loop they replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+import exit_worker
+from exit_worker import evaluate_exits, tsl_triggered
+from utils.db import get_conn
+
+# (ticker, entry_price, trailing_stop_loss, market_close_exit, peak_price, last close)
+TRADES = [
+    ("AAA", 100.0, 10.0, 1, 100.0, 95.0),     # small dip: holds
+    ("BBB", 100.0, 10.0, 1, 120.0, 108.0),    # exactly 10% off the peak: TSL
+    ("CCC", 100.0, None, 1, None, 89.0),      # no TSL/peak: 10% default from entry
+    ("DDD", 100.0, 5.0, 0, 0.0, 104.0),       # zero peak falls back to entry; new high
+    ("EEE", None, 10.0, None, None, 50.0),    # no entry/peak: last price is the peak
+    ("FFF", 80.0, 15.0, 2, 90.0, 85.0),       # flag 2: never market-close
+    ("GGG", 80.0, 15.0, 1.7, 90.0, 85.0),     # flag truncates to 1
+    ("HHH", 10.0, 0.0, 1, 10.0, 10.0),        # 0% TSL fires on any price
+    ("III", None, 10.0, 1, None, 0.0),        # zero everything
+    ("JJJ", 25.0, 2.5, 1, 30.0, 29.4),        # 2% off: holds under 2.5%
+]
+
+
+def legacy(entry, tsl, mkt_flag, peak, last, market_close):
+    """The pre-vectorization per-trade rules: (peak_price, reason or None)."""
+    peak_price = max(peak or entry or last, last)
+    if tsl is None:
+        tsl = 10.0
+    if tsl_triggered(peak_price, last, tsl):
+        return peak_price, f"tsl_{tsl}%"
+    if int(mkt_flag or 1) == 1 and market_close:
+        return peak_price, "market_close"
+    return peak_price, None
+
+
+def arrays():
+    cols = list(zip(*TRADES))
+    return [np.array(c, dtype=float) for c in cols[1:]]
+
+
+@pytest.mark.parametrize("market_close", [False, True])
+def test_evaluate_exits_matches_per_trade_rules(market_close):
+    entry, tsl, flag, peak, last = arrays()
+    new_peak, _, tsl_hit, moc = evaluate_exits(entry, peak, last, tsl, flag, market_close)
+    for k, (_, e, t, f, p, l) in enumerate(TRADES):
+        peak_price, reason = legacy(e, t, f, p, l, market_close)
+        assert new_peak[k] == peak_price
+        assert bool(tsl_hit[k]) == (reason is not None and reason.startswith("tsl_"))
+        assert bool(moc[k]) == (reason == "market_close")
+
+
+@pytest.mark.parametrize("market_close", [False, True])
+def test_process_open_trades_matches_per_trade_rules(monkeypatch, market_close):
+    sent = []
+    monkeypatch.setattr(exit_worker, "send_exit_alert", lambda subject, body: sent.append(subject))
+    monkeypatch.setattr(exit_worker, "is_market_close", lambda now: market_close)
+    closes = {t[0]: t[5] for t in TRADES}
+    monkeypatch.setattr(exit_worker, "get_bars", lambda tickers, **kw: {
+        s: pd.DataFrame({"close": [1.0, closes[s]]}) for s in tickers if s in closes})
+
+    conn = get_conn()
+    conn.execute("DELETE FROM trades")
+    rids = []
+    for ticker, entry, tsl, flag, peak, _ in TRADES + [("NOBARS", 10.0, 10.0, 1, 10.0, None)]:
+        cur = conn.execute("INSERT INTO trades (ticker, entry_time, entry_price, trailing_stop_loss, market_close_exit, "
+                           "peak_price) VALUES (?, datetime('now'), ?, ?, ?, ?)", (ticker, entry, tsl, flag, peak))
+        rids.append(cur.lastrowid)
+    conn.commit()
+
+    activity = exit_worker.process_open_trades()
+    expected_alerts, expected_activity = [], 0
+    for rid, (ticker, e, t, f, p, l) in zip(rids, TRADES):
+        peak_price, reason = legacy(e, t, f, p, l, market_close)
+        expected_activity += (reason is not None) + (p is None or peak_price != p)
+        row = conn.execute("SELECT exit_price, exit_reason, peak_price FROM trades WHERE rowid=?", (rid,)).fetchone()
+        assert row[2] == peak_price
+        assert row[:2] == ((l, reason) if reason else (None, None))
+        if reason:
+            expected_alerts.append(f"BnBot Exit ({'MOC' if reason == 'market_close' else 'TSL'}) {ticker}")
+    # a ticker without bars is left untouched, as before
+    assert conn.execute("SELECT exit_price, peak_price FROM trades WHERE rowid=?", (rids[-1],)).fetchone() == (None, 10.0)
+    assert sent == expected_alerts
+    assert activity == expected_activity  # exits + peak updates: the scheduler's burst signal
+
+    # a quiet cycle over the same (still open) book is no activity, however many trades are open
+    assert exit_worker.process_open_trades() == 0
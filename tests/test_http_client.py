@@ -0,0 +1,62 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from utils.http_client import HttpClient
+
+
+class Resp:
+    def __init__(self, status):
+        self.status_code = status
+        self.headers = {}
+
+
+def client(monkeypatch, outcomes):
+    c = HttpClient(retries=3, backoff=0.0)
+    calls = []
+
+    def request(method, url, **kw):
+        calls.append(method)
+        out = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(out, Exception):
+            raise out
+        return Resp(out)
+
+    monkeypatch.setattr(c._session("example.test"), "request", request)
+    return c, calls
+
+
+def refused():
+    return requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "refused")))
+
+
+def test_get_retries_timeouts_and_5xx(monkeypatch):
+    c, calls = client(monkeypatch, [requests.ReadTimeout(), 502, 200])
+    assert c.get("https://example.test/x").status_code == 200
+    assert calls == ["GET"] * 3
+
+
+@pytest.mark.parametrize("outcome", [503, requests.ReadTimeout(), requests.ConnectionError("reset by peer")])
+def test_post_not_retried_once_it_may_have_been_sent(monkeypatch, outcome):
+    c, calls = client(monkeypatch, [outcome, 200])
+    if isinstance(outcome, Exception):
+        with pytest.raises(type(outcome)):
+            c.post("https://example.test/send")
+    else:
+        assert c.post("https://example.test/send").status_code == outcome
+    assert calls == ["POST"]
+
+
+@pytest.mark.parametrize("outcome", [429, requests.ConnectTimeout()])
+def test_post_retried_when_never_delivered(monkeypatch, outcome):
+    c, calls = client(monkeypatch, [outcome, 200])
+    assert c.post("https://example.test/send").status_code == 200
+    assert calls == ["POST"] * 2
+
+
+def test_post_retries_refused_connection_and_opt_in(monkeypatch):
+    c, calls = client(monkeypatch, [refused(), 200])
+    assert c.post("https://example.test/send").status_code == 200
+    assert len(calls) == 2
+    c, calls = client(monkeypatch, [500, 200])
+    assert c.post("https://example.test/send", idempotent=True).status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from utils.indicators import IndicatorBook, IndicatorState
+from utils.price import calc_vwap, calc_rvol, breaks_recent_resistance
+
+
+def bars(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))
+    return pd.DataFrame({
+        "time": pd.date_range("2025-03-03 14:30", periods=n, freq="5min", tz="UTC"),
+        "close": close,
+        "high": close * (1 + np.abs(rng.normal(0, 0.003, n))),
+        "volume": np.round(rng.lognormal(9, 0.6, n)),
+    })
+
+
+def expected(df):
+    return calc_vwap(df).iloc[-1], calc_rvol(df, 30), bool(breaks_recent_resistance(df, 20))
+
+
+@pytest.fixture
+def steps(monkeypatch):
+    count = [0]
+    update = IndicatorState.update
+
+    def counting(self, *a):
+        count[0] += 1
+        return update(self, *a)
+
+    monkeypatch.setattr(IndicatorState, "update", counting)
+    return count
+
+
+def test_sliding_window_matches_pandas_with_constant_steps(steps):
+    df, limit = bars(), 100
+    book = IndicatorBook(30, 20)
+    book.update("AAA", df.iloc[:limit])
+    steps[0] = 0
+    for end in range(limit + 1, len(df) + 1):
+        frame = df.iloc[:end].tail(limit).reset_index(drop=True)
+        snap = book.evaluate("AAA", frame)
+        vwap, rvol, brk = expected(frame)
+        assert math.isclose(snap["vwap"], vwap, rel_tol=1e-9)
+        assert snap["rvol"] == pytest.approx(rvol, rel=1e-12)
+        assert snap["breaks_resistance"] == brk
+        assert book._states["AAA"].count == limit
+    # the last bar again plus the new one, never the whole window
+    assert steps[0] == 2 * (len(df) - limit)
+
+
+def test_forming_bar_is_replaced_not_appended():
+    df = bars(60)
+    book = IndicatorBook(30, 20)
+    book.update("AAA", df)
+    revised = df.copy()
+    revised.loc[revised.index[-1], ["close", "volume"]] = [revised["close"].iloc[-1] * 1.01, 1.0]
+    snap = book.evaluate("AAA", revised)
+    vwap, rvol, brk = expected(revised)
+    assert math.isclose(snap["vwap"], vwap, rel_tol=1e-12)
+    assert snap["rvol"] == pytest.approx(rvol, rel=1e-12)
+    assert snap["breaks_resistance"] == brk
+
+
+def test_gap_or_rewrite_rebuilds(steps):
+    df = bars(200)
+    book = IndicatorBook(30, 20)
+    book.update("AAA", df.iloc[:100])
+    steps[0] = 0
+    book.update("AAA", df.iloc[120:200].reset_index(drop=True))  # last seen bar is gone: gap
+    assert steps[0] == 80
+    steps[0] = 0
+    book.update("AAA", df.iloc[50:200].reset_index(drop=True))  # reaches back before the state
+    assert steps[0] == 150
+    assert book._states["AAA"].count == 150
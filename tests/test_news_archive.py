@@ -0,0 +1,65 @@
+import json, os
+from datetime import date
+from utils import news_archive
+from utils.news_archive import NewsArchive, DONE_FILE
+
+DAY = date(2025, 3, 3)
+
+
+class Resp:
+    status_code = 200
+
+    def __init__(self, articles):
+        self._articles = articles
+
+    def json(self):
+        return self._articles
+
+
+def archive(tmp_path, total):
+    """Archive over a fake Benzinga that has `total` articles for DAY, pagesize 2."""
+    calls = []
+
+    def get(url, params=None, **kw):
+        page = params.get("page", 0)
+        calls.append(page)
+        return Resp([{"id": i, "title": f"t{i}"} for i in range(page * 2, min(total, page * 2 + 2))])
+
+    return NewsArchive(root=str(tmp_path), pagesize=2, workers=1, rate=0, get=get), calls
+
+
+def test_pages_saved_before_the_day_ended_are_refetched(tmp_path):
+    arc, calls = archive(tmp_path, total=5)
+    d = arc.day_dir("all_p2", DAY)
+    os.makedirs(d)
+    # a run during the day saw 2 articles: a full page and an empty (short) one
+    with open(os.path.join(d, "page_0000.json"), "w") as f:
+        json.dump({"fetched_at": "2025-03-03T18:00:00+00:00", "articles": [{"id": 0}, {"id": 1}]}, f)
+    with open(os.path.join(d, "page_0001.json"), "w") as f:
+        json.dump({"fetched_at": "2025-03-03T18:00:00+00:00", "articles": []}, f)
+    with open(os.path.join(d, "page_0003.json"), "w") as f:
+        json.dump([{"id": 99}], f)  # stale page past the new last one
+
+    out = arc.fetch_range(DAY, DAY)
+    assert calls == [0, 1, 2]
+    assert [a["id"] for a in out] == [0, 1, 2, 3, 4]
+    assert arc.is_complete("all_p2", DAY)
+    assert not os.path.exists(os.path.join(d, "page_0003.json"))
+
+    calls.clear()
+    assert [a["id"] for a in arc.fetch_range(DAY, DAY)] == [0, 1, 2, 3, 4]
+    assert calls == []
+
+
+def test_day_capped_at_max_pages_is_reported_not_completed(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_archive, "MAX_PAGES_PER_DAY", 3)
+    arc, calls = archive(tmp_path, total=100)
+    out = arc.fetch_range(DAY, DAY)
+    assert len(out) == 6
+    assert arc.failed_days == [DAY.isoformat()]
+    assert not os.path.exists(os.path.join(arc.day_dir("all_p2", DAY), DONE_FILE))
+
+    calls.clear()
+    arc.fetch_range(DAY, DAY)  # final pages are reused; still reported as truncated
+    assert calls == []
+    assert arc.failed_days == [DAY.isoformat()]
@@ -0,0 +1,34 @@
+import json
+from news_fetcher import save_news_rows, ensure_tables
+from utils.db import get_conn
+from utils.logging import flush_logs
+
+
+def article(i, title, *stocks):
+    return {"id": i, "title": title, "created": "Mon, 03 Mar 2025 10:00:00 -0500", "stocks": [{"name": s} for s in stocks]}
+
+
+def last_summary():
+    flush_logs()
+    row = get_conn().execute("SELECT message FROM logs WHERE event='INGEST_SUMMARY_DETAILED' ORDER BY id DESC LIMIT 1").fetchone()
+    return json.loads(row[0])
+
+
+def test_save_news_rows_counts_rows_not_trigger_writes():
+    ensure_tables()  # migrated schema, with the table_versions triggers on news
+    conn = get_conn()
+    conn.execute("DELETE FROM news"); conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name='tv_news_insert'").fetchone()[0] == 1
+
+    assert save_news_rows([article(1, "AAA beats", "AAA"), article(2, "BBB misses", "BBB"),
+                           article(3, "Both rally", "AAA", "BBB")]) == 4
+    s = last_summary()
+    assert (s["seen"], s["inserted"], s["duplicates"]) == (3, 4, 0)
+
+    # one repeat of an (ticker, headline) pair, one new ticker on an old headline, one new article
+    assert save_news_rows([article(4, "AAA beats", "AAA"), article(5, "BBB misses", "BBB", "CCC"),
+                           article(6, "DDD launches", "DDD")]) == 2
+    s = last_summary()
+    assert (s["seen"], s["inserted"], s["duplicates"]) == (3, 2, 2)
+    assert save_news_rows([]) == 0
+    assert conn.execute("SELECT COUNT(*) FROM news").fetchone()[0] == 6
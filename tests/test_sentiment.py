@@ -0,0 +1,72 @@
+import threading, time
+from utils import sentiment
+from utils.sentiment import SentimentBatcher, score_sentiment_batch, MODEL_VERSION
+from utils.sentiment_cache import SentimentCache, headline_key
+
+
+def fake_scoring(monkeypatch, delay=0.0):
+    batches = []
+
+    def score(headlines, items):
+        batches.append(list(headlines))
+        time.sleep(delay)
+        return [("bullish", float(h.split()[-1]), "fake") for h in headlines]
+
+    monkeypatch.setattr(sentiment, "score_sentiment_batch", score)
+    return batches
+
+
+def test_batcher_groups_by_max_batch_and_keeps_submission_order(monkeypatch):
+    batches = fake_scoring(monkeypatch)
+    b = SentimentBatcher(max_batch=4, max_wait=0.5)
+    futs = [b.submit(f"headline {i}") for i in range(10)]
+    assert [f.result(timeout=5)[1] for f in futs] == [float(i) for i in range(10)]
+    assert [len(x) for x in batches] == [4, 4, 2]
+    assert [h for x in batches for h in x] == [f"headline {i}" for i in range(10)]
+
+
+def test_batcher_flushes_after_max_wait(monkeypatch):
+    batches = fake_scoring(monkeypatch)
+    b = SentimentBatcher(max_batch=100, max_wait=0.05)
+    t0 = time.monotonic()
+    assert b.score("lone 1", timeout=5) == ("bullish", 1.0, "fake")
+    assert time.monotonic() - t0 < 1.0
+    assert b.score("later 2", timeout=5)[1] == 2.0
+    assert batches == [["lone 1"], ["later 2"]]
+
+
+def test_concurrent_submits_each_get_their_own_result(monkeypatch):
+    batches = fake_scoring(monkeypatch, delay=0.01)
+    b = SentimentBatcher(max_batch=8, max_wait=0.05)
+    results, go = {}, threading.Event()
+
+    def worker(i):
+        go.wait()
+        results[i] = b.score(f"h {i}", timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    go.set()
+    for t in threads:
+        t.join()
+    assert all(results[i][1] == float(i) for i in range(40))
+    assert all(len(x) <= 8 for x in batches) and len(batches) < 40
+    assert sorted(h for x in batches for h in x) == sorted(f"h {i}" for i in range(40))
+
+
+def test_fallback_is_not_cached_and_old_fallback_rows_are_ignored(monkeypatch):
+    cache = SentimentCache()
+    monkeypatch.setattr(sentiment, "get_cache", lambda: cache)
+    monkeypatch.setattr(sentiment._finbert, "score_batch", lambda texts: None)  # FinBERT unavailable
+    monkeypatch.setattr(sentiment, "_vader_score", lambda h: ("neutral", 0.05, "vader"))
+    stale = headline_key("Old headline", None, MODEL_VERSION)
+    cache.put_many({stale: ("bearish", -0.3, "vader", MODEL_VERSION)})  # written before the fix
+
+    out = score_sentiment_batch(["Old headline", "New headline", "Tagged"], [None, None, {"sentiment": "Bullish"}])
+    assert out == [("neutral", 0.05, "vader"), ("neutral", 0.05, "vader"), ("bullish", 0.8, "benzinga")]
+    assert headline_key("New headline", None, MODEL_VERSION) not in cache.get_many([headline_key("New headline", None, MODEL_VERSION)])
+
+    monkeypatch.setattr(sentiment._finbert, "score_batch", lambda texts: [0.5] * len(texts))
+    assert score_sentiment_batch(["Old headline"]) == [("bullish", 0.5, "finbert")]
+    assert cache.get_many([stale])[stale] == ("bullish", 0.5, "finbert", MODEL_VERSION)
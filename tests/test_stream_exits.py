@@ -0,0 +1,94 @@
+import time
+import pandas as pd
+import pytest
+import exit_worker
+from utils.db import get_conn
+from utils.stream import ReplayStream
+
+
+@pytest.fixture
+def alerts(monkeypatch):
+    sent = []
+    monkeypatch.setattr(exit_worker, "send_exit_alert", lambda subject, body: sent.append(subject))
+    return sent
+
+
+def open_trade(ticker, entry=100.0, tsl=10.0, mkt_flag=1):
+    conn = get_conn()
+    cur = conn.execute("DELETE FROM trades")
+    cur.execute("INSERT INTO trades (ticker, entry_time, entry_price, trailing_stop_loss, market_close_exit) "
+                "VALUES (?, datetime('now'), ?, ?, ?)", (ticker, entry, tsl, mkt_flag))
+    conn.commit()
+    return cur.lastrowid
+
+
+def trade(rid):
+    return get_conn().execute("SELECT exit_price, exit_reason, peak_price FROM trades WHERE rowid=?", (rid,)).fetchone()
+
+
+def wait_for(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_tick_triggers_trailing_stop(alerts):
+    rid = open_trade("AAA")
+    stream = ReplayStream()
+    engine = exit_worker.StreamingExitEngine(stream)
+    stream.connect()
+    engine.sync()
+    assert stream.symbols == {"AAA"}
+
+    stream.push("AAA", 120.0)
+    stream.push("BBB", 1.0)  # not subscribed: never delivered
+    stream.replay()
+    assert trade(rid) == (None, None, 120.0)
+
+    stream.push("AAA", 107.5)  # 10.4% below the 120 peak
+    stream.replay()
+    assert trade(rid)[:2] == (107.5, "tsl_10.0%")
+    assert alerts == ["BnBot Exit (TSL) AAA"]
+    assert stream.ticks == 2
+
+
+def test_exit_after_reconnect_resubscribes(alerts):
+    rid = open_trade("CCC")
+    stream = ReplayStream()
+    engine = exit_worker.StreamingExitEngine(stream)
+    stream.start()
+    try:
+        engine.sync()
+        assert wait_for(lambda: stream._server_symbols == {"CCC"})
+
+        stream.disconnect()
+        stream.push("CCC", 50.0)  # queued until the loop has reconnected and resubscribed
+        assert wait_for(lambda: trade(rid)[0] is not None)
+        assert stream.reconnects == 1
+        assert stream._server_symbols == {"CCC"}
+        assert trade(rid)[:2] == (50.0, "tsl_10.0%")
+        assert alerts == ["BnBot Exit (TSL) CCC"]
+    finally:
+        stream.stop()
+
+
+def test_market_close_falls_back_to_last_bar(alerts, monkeypatch):
+    rid = open_trade("DDD")
+    calls = []
+
+    def fake_bars(tickers, **kw):
+        calls.append(sorted(tickers))
+        return {"DDD": pd.DataFrame({"close": [98.0, 99.5]})}
+
+    monkeypatch.setattr(exit_worker, "get_bars", fake_bars)
+    monkeypatch.setattr(exit_worker, "is_market_close", lambda now: True)
+    stream = ReplayStream()
+    engine = exit_worker.StreamingExitEngine(stream)
+    engine.sync()  # no tick ever arrives for DDD
+    engine.check_market_close()
+    assert calls == [["DDD"]]
+    assert trade(rid)[:2] == (99.5, "market_close")
+    assert alerts == ["BnBot Exit (MOC) DDD"]
@@ -0,0 +1,54 @@
+"""run_sweep against summarize(simulate_for_news(...)) for every parameter combination."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from benchmarks.synthetic import SyntheticMarket, session_days, tickers, SESSION_OPEN_UTC
+from utils.backtest import simulate_for_news, summarize
+from utils.bar_store import BarStore
+from utils.sweep import SweepData, param_grid, run_sweep, METRICS
+
+GRID = {
+    "rvol_threshold": [0.5, 2.0],
+    "rvol_window": [3, 45],
+    "lookback": [2, 30],
+    "tsl_pct": [1.0, 5.0],
+    "exit_bars": [5, 20],
+}
+# minutes after each open (5-minute bars): on the first session the early ones leave
+# fewer closed bars than rvol_window + 1 / lookback, so the short-history fallbacks run
+OFFSETS = [7, 17, 37, 52, 93, 233, 377]
+
+
+def articles():
+    syms = tickers(4)
+    out, i = [], 0
+    for day_no, d in enumerate(session_days(2)):
+        open_utc = datetime(d.year, d.month, d.day, *SESSION_OPEN_UTC, tzinfo=timezone.utc)
+        for off in OFFSETS:
+            for k, sym in enumerate(syms):
+                i += 1
+                at = open_utc + timedelta(minutes=off + 3 * k)
+                created = (at - timedelta(hours=5)).strftime("%a, %d %b %Y %H:%M:%S -0500")
+                out.append({"id": i, "title": f"{sym} headline {i}", "created": created, "stocks": [{"name": sym}],
+                            "sentiment": "bearish" if i % 7 == 0 else "bullish"})
+    return out
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return BarStore(root=str(tmp_path_factory.mktemp("bars")), fetch=SyntheticMarket(seed=5, days=3).fetch)
+
+
+def test_run_sweep_matches_simulate_for_news(store):
+    arts = articles()
+    combos = param_grid(GRID)
+    data = SweepData(arts, max(GRID["exit_bars"]), store=store)
+    assert (data.count < 3 + 1).any() and (data.count <= 30).any()  # short histories are covered
+    swept = run_sweep(data, combos).set_index(list(GRID))
+    traded = 0
+    for c in combos:
+        expected = summarize(simulate_for_news(arts, rvol_threshold=c["rvol_threshold"], store=store, tsl_pct=c["tsl_pct"],
+                                               rvol_window=c["rvol_window"], lookback=c["lookback"], exit_bars=c["exit_bars"]))
+        got = swept.loc[tuple(c[p] for p in GRID)]
+        assert {m: got[m] for m in METRICS} == expected, c
+        traded += expected["trades"] > 0
+    assert traded > len(combos) // 2  # the fixture actually trades
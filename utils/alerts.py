@@ -1,23 +1,32 @@
-import os, smtplib, ssl, json, requests
+import os, smtplib, ssl, json, time, queue, threading, atexit
+from itertools import groupby
 from email.mime.text import MIMEText
+from . import http_client
 
-def send_email(subject: str, body: str):
+def _email_config():
     host = os.getenv("EMAIL_HOST", "")
     port = int(os.getenv("EMAIL_PORT", "587"))
     user = os.getenv("EMAIL_USERNAME", "")
     pwd  = os.getenv("EMAIL_PASSWORD", "")
     to   = os.getenv("EMAIL_TO") or os.getenv("EMAIL_RECEIVER") or user
-    if not host or not user or not pwd or not to:
-        return False
+    return host, port, user, pwd, to
+
+def _build_email(subject: str, body: str, user: str, to: str) -> str:
     msg = MIMEText(body, "plain")
     msg["Subject"] = subject
     msg["From"] = user
     msg["To"] = to
+    return msg.as_string()
+
+def send_email(subject: str, body: str):
+    host, port, user, pwd, to = _email_config()
+    if not host or not user or not pwd or not to:
+        return False
     context = ssl.create_default_context()
     with smtplib.SMTP(host, port) as server:
         server.starttls(context=context)
         server.login(user, pwd)
-        server.sendmail(user, [to], msg.as_string())
+        server.sendmail(user, [to], _build_email(subject, body, user, to))
     return True
 
 def send_telegram(text: str):
@@ -26,5 +35,169 @@ def send_telegram(text: str):
     if not token or not chat:
         return False
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    r = requests.post(url, json={"chat_id": chat, "text": text})
+    r = http_client.post(url, json={"chat_id": chat, "text": text})
     return r.status_code == 200
+
+
+class AlertDispatcher:
+    """Background alert queue: enqueue() never blocks the trading path.
+
+    A worker thread drains the queue every `flush_interval` seconds, coalesces
+    consecutive runs of the same kind (e.g. skips) into one digest once a run has at
+    least `digest_threshold` alerts, sends email over one reused SMTP session and
+    rate-limits Telegram to one message per `telegram_interval` seconds.
+    When the queue is full, new alerts are dropped and counted.
+    """
+
+    def __init__(self, maxsize: int = 1000, flush_interval: float = 2.0, digest_threshold: int = 3,
+                 telegram_interval: float = 1.0, smtp_idle: float = 60.0, digest_kinds=("skip",)):
+        self._q: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.flush_interval = flush_interval
+        self.digest_threshold = digest_threshold
+        self.telegram_interval = telegram_interval
+        self.smtp_idle = smtp_idle
+        self.digest_kinds = set(digest_kinds)
+        self._smtp = None
+        self._smtp_used = 0.0
+        self._last_telegram = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, 10.0)
+
+    def enqueue(self, subject: str, body: str, kind: str = "info") -> bool:
+        self._ensure_started()
+        try:
+            self._q.put_nowait((kind, subject, body))
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float | None = None):
+        """Wait until everything queued so far has been sent (or timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._q.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self) -> dict:
+        return {"depth": self._q.qsize(), "enqueued": self.enqueued, "dropped": self.dropped,
+                "sent": self.sent, "coalesced": self.coalesced, "errors": self.errors}
+
+    def _coalesce(self, batch):
+        """Turn a drained batch into outgoing (subject, body) messages, preserving order.
+
+        Only adjacent alerts of a digest kind are merged, so nothing is sent ahead of
+        an alert that was queued before it.
+        """
+        out = []
+        for kind, run in groupby(batch, key=lambda a: a[0]):
+            items = [(subject, body) for _, subject, body in run]
+            if kind in self.digest_kinds and len(items) >= self.digest_threshold:
+                subject = f"BnBot {kind.title()} digest ({len(items)})"
+                body = f"{len(items)} {kind} alerts\n\n" + "\n\n".join(b for _, b in items)
+                out.append((subject, body))
+                self.coalesced += len(items) - 1
+            else:
+                out.extend(items)
+        return out
+
+    def _run(self):
+        while True:
+            first = self._q.get()
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            for subject, body in self._coalesce(batch):
+                self._deliver(subject, body)
+            for _ in batch:
+                self._q.task_done()
+            if self._smtp is not None and time.monotonic() - self._smtp_used > self.smtp_idle:
+                self._close_smtp()
+
+    def _deliver(self, subject: str, body: str):
+        ok = False
+        try:
+            ok = self._send_email(subject, body) or ok
+        except Exception:
+            self.errors += 1
+        try:
+            ok = self._send_telegram(body) or ok
+        except Exception:
+            self.errors += 1
+        if ok:
+            self.sent += 1
+
+    def _close_smtp(self):
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send_email(self, subject: str, body: str) -> bool:
+        host, port, user, pwd, to = _email_config()
+        if not host or not user or not pwd or not to:
+            return False
+        msg = _build_email(subject, body, user, to)
+        for attempt in range(2):
+            if self._smtp is None:
+                server = smtplib.SMTP(host, port, timeout=30)
+                server.starttls(context=ssl.create_default_context())
+                server.login(user, pwd)
+                self._smtp = server
+            try:
+                self._smtp.sendmail(user, [to], msg)
+                self._smtp_used = time.monotonic()
+                return True
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None  # session timed out server-side; reconnect once
+                if attempt:
+                    raise
+        return False
+
+    def _send_telegram(self, text: str) -> bool:
+        wait = self._last_telegram + self.telegram_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_telegram = time.monotonic()
+        return send_telegram(text if len(text) <= 4000 else text[:3990] + "\n…")
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher() -> AlertDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AlertDispatcher()
+    return _dispatcher
+
+def queue_alert(subject: str, body: str, kind: str = "info") -> bool:
+    """Hand an alert to the background dispatcher (email + Telegram); never blocks."""
+    return get_dispatcher().enqueue(subject, body, kind)
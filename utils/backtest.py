@@ -1,122 +1,227 @@
-import os, json, math, time, requests
+import os, json, math, time
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
 from dateutil import parser
-from .sentiment import score_sentiment
-from .price import fetch_intraday_bars, calc_vwap, calc_rvol, breaks_recent_resistance
-
-BENZINGA_API_KEY = (
-    os.getenv("BENZINGA_API_KEY")
-    or os.getenv("BENZINGA__API_KEY")
-    or "YOUR_BENZINGA_API_KEY"
-)
+from concurrent.futures import ProcessPoolExecutor
+from .news_archive import get_archive
+from .sentiment import score_sentiment_batch
+from .sentiment_cache import SentimentCache, get_cache, set_cache
+from .bar_store import BarStore, get_store
+from .indicators import IndicatorState
 
 def fetch_benzinga_news_range(start_iso: str, end_iso: str, tickers: list[str] | None = None, pagesize: int = 100) -> list[dict]:
-    """Fetch Benzinga news within [start,end]. Returns list of articles with title, created, stocks."""
-    url = "https://api.benzinga.com/api/v2/news"
-    params = {
-        "token": BENZINGA_API_KEY,
-        "pagesize": pagesize,
-        "display_tickers": "true",
-        "date": f"{start_iso},{end_iso}",
-        # optional: "channels": "general"
-    }
-    if tickers:
-        params["tickers"] = ",".join([t.upper() for t in tickers])
+    """Fetch Benzinga news within [start,end] (whole days) through the on-disk NewsArchive.
+
+    Days already archived are read from disk; only missing days/pages hit the API.
+    Returns list of articles with title, created, stocks.
+    """
+    archive = get_archive()
+    archive.pagesize = pagesize
+    start = parser.isoparse(start_iso).date()
+    end = parser.isoparse(end_iso).date()
+    return archive.fetch_range(start, end, tickers)
+
+def _article_tickers(stocks) -> list[str]:
     out = []
-    page = 0
-    while True:
-        p = params.copy()
-        if page > 0:
-            p["page"] = page
-        r = requests.get(url, params=p, timeout=30)
-        if r.status_code != 200:
-            break
-        data = r.json()
-        # normalize
-        articles = data.get("articles") if isinstance(data, dict) else (data if isinstance(data, list) else [])
-        if not articles:
-            break
-        out.extend(articles)
-        if len(articles) < pagesize:
-            break
-        page += 1
-        if page > 50:  # safety cap
-            break
+    for t in stocks if isinstance(stocks, list) else [stocks]:
+        if isinstance(t, dict):
+            t = t.get("symbol") or t.get("name")
+        if isinstance(t, str) and t.strip():
+            out.append(t.upper().strip())
     return out
 
-def simulate_for_news(articles: list[dict], rvol_threshold: float = 1.5, timeframe: str = "5Min"):
-    """Simulate entries using same rules against Alpaca bars around news timestamps.
-    Returns a DataFrame of simulated trades with ROI and reason when skipped.
-    """
-    rows = []
-    for a in articles:
+def _news_ts(created: str) -> pd.Timestamp | None:
+    try:
+        ts = pd.Timestamp(parser.parse(created))
+    except Exception:
+        return None
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+HISTORY_BARS = 120          # bars fed to the entry indicators (as the live pipeline's get_bars limit)
+EXIT_BARS = 20              # bars after entry before the timed exit
+LOOKBACK = pd.Timedelta(days=5)   # calendar span that covers HISTORY_BARS across a weekend
+HORIZON = pd.Timedelta(days=2)
+
+def _usable(articles: list[dict], indices: list[int] | None = None) -> list[tuple]:
+    """(article index, article, headline, tickers, news timestamp) for every article that can be simulated."""
+    usable = []
+    for idx, a in zip(indices if indices is not None else range(len(articles)), articles):
         headline = a.get("title") or a.get("headline") or ""
         created = a.get("created") or a.get("published") or a.get("time") or ""
         stocks = a.get("stocks") or a.get("tickers") or []
-        if not headline or not created or not stocks:
-            continue
-        # sentiment (prefer benzinga tag)
-        label, score, source = score_sentiment(headline, {"sentiment": a.get("sentiment")} if a.get("sentiment") else None)
-
-        for t in stocks:
-            ticker = (t or "").upper().strip()
-            if not ticker:
+        at = _news_ts(created) if created else None
+        if headline and at is not None and stocks:
+            usable.append((idx, a, headline, _article_tickers(stocks), at))
+    return usable
+
+def _score(usable: list[tuple]) -> list[tuple]:
+    # sentiment for every headline in one batch (prefer benzinga tag)
+    return score_sentiment_batch([u[2] for u in usable],
+                                 [{"sentiment": u[1].get("sentiment")} if u[1].get("sentiment") else None for u in usable])
+
+def simulate_exits(entries: np.ndarray, paths: np.ndarray, tsl_pct: float = 10.0) -> tuple[np.ndarray, np.ndarray]:
+    """Trailing-stop exits for a batch of entries at once.
+
+    paths is (n, bars) of closes after each entry, NaN-padded on the right. The peak is
+    the running max of the entry and the closes so far; a trade exits at the first close
+    whose drawdown from that peak is >= tsl_pct, else at its last close (timed exit).
+    Returns (exit_price, tsl_hit).
+    """
+    peaks = np.fmax.accumulate(np.concatenate([entries[:, None], paths], axis=1), axis=1)[:, 1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hit = (peaks - paths) / peaks * 100.0 >= tsl_pct
+    tsl_hit = hit.any(axis=1)
+    rows = np.arange(len(entries))
+    last = np.maximum((~np.isnan(paths)).sum(axis=1) - 1, 0)
+    exit_idx = np.where(tsl_hit, hit.argmax(axis=1), last)
+    return paths[rows, exit_idx], tsl_hit
+
+def _simulate_rows(usable: list[tuple], scored: list[tuple], rvol_threshold: float, timeframe: str,
+                   store: BarStore, tsl_pct: float, only: set | None = None, rvol_window: int = 30,
+                   lookback: int = 20, exit_bars: int = EXIT_BARS) -> list[dict]:
+    """Result rows for (article, ticker) pairs, each tagged with its serial position in "_order"."""
+    # fill the bar store once per ticker for the span of all its articles
+    spans = {}
+    for _, _, _, tickers, at in usable:
+        for ticker in tickers:
+            if only is not None and ticker not in only:
+                continue
+            lo, hi = spans.get(ticker, (at, at))
+            spans[ticker] = (min(lo, at), max(hi, at))
+    store.fill({t: (lo - LOOKBACK, hi + HORIZON) for t, (lo, hi) in spans.items()}, timeframe)
+
+    rows = []
+    candidates = []  # (row index, entry price, closes after entry) for rows that passed the entry rules
+    for (idx, a, headline, tickers, at), (label, score, source) in zip(usable, scored):
+        for pos, ticker in enumerate(tickers):
+            if only is not None and ticker not in only:
                 continue
-            # Fetch bars (last day window around news)
-            df = fetch_intraday_bars(ticker, timeframe=timeframe, limit=240)
-            if df is None or df.empty:
-                rows.append(dict(ticker=ticker, headline=headline, sentiment=label, sentiment_score=score,
-                                 sentiment_source=source, entry_price=None, exit_price=None, roi=None,
+            base = dict(_order=(idx, pos), ticker=ticker, headline=headline, sentiment=label, sentiment_score=score,
+                        sentiment_source=source)
+            hist, future = store.window(ticker, at, LOOKBACK, HORIZON, timeframe=timeframe, fill=False)
+            if hist.empty:
+                rows.append(dict(base, entry_price=None, exit_price=None, roi=None,
                                  result="skipped", reason="No price data"))
                 continue
-            # Entry rules
-            vwap = calc_vwap(df).iloc[-1]
-            rvol = calc_rvol(df, window=30)
-            resistance = breaks_recent_resistance(df, lookback=20)
-            above_vwap = df["close"].iloc[-1] > vwap
+            # Entry rules on the bars known at news time
+            ind = IndicatorState.from_frame(hist.tail(HISTORY_BARS), rvol_window=rvol_window, lookback=lookback).snapshot()
+            rvol = ind["rvol"]
+            resistance = ind["breaks_resistance"]
+            above_vwap = ind["close"] > ind["vwap"]
             if not (label in ("bullish","very bullish") and above_vwap and rvol > rvol_threshold and resistance):
-                rows.append(dict(ticker=ticker, headline=headline, sentiment=label, sentiment_score=score,
-                                 sentiment_source=source, entry_price=None, exit_price=None, roi=None,
+                rows.append(dict(base, entry_price=None, exit_price=None, roi=None,
                                  result="skipped", reason="Rules not met"))
                 continue
-            # Simulate entry at last close and simple TSL 10% then flat exit after 20 bars
-            entry = float(df["close"].iloc[-1])
-            peak = entry
-            exit_px = None
-            for i in range(1, min(20, len(df))):
-                px = float(df["close"].iloc[-i])
-                peak = max(peak, px)
-                if (peak - px) / peak >= 0.10:  # 10% TSL
-                    exit_px = px
-                    reason = "TSL 10%"
-                    break
-            if exit_px is None:
-                exit_px = float(df["close"].iloc[-1])
-                reason = "Timed exit"
-            r = round((exit_px - entry) / entry * 100.0, 2) if entry else None
-            rows.append(dict(ticker=ticker, headline=headline, sentiment=label, sentiment_score=score,
-                             sentiment_source=source, entry_price=entry, exit_price=exit_px, roi=r,
-                             result="closed", reason=reason))
-    return pd.DataFrame(rows)
+            if future.empty:
+                rows.append(dict(base, entry_price=None, exit_price=None, roi=None,
+                                 result="skipped", reason="No bars after news"))
+                continue
+            # Enter at the last close before the news; exits are simulated below, all at once
+            candidates.append((len(rows), float(hist["close"].iloc[-1]), future["close"].to_numpy(dtype=float)[:exit_bars]))
+            rows.append(base)
+
+    if candidates:
+        entries = np.array([c[1] for c in candidates])
+        paths = np.full((len(candidates), exit_bars), np.nan)
+        for k, (_, _, closes) in enumerate(candidates):
+            paths[k, :len(closes)] = closes
+        exit_px, tsl_hit = simulate_exits(entries, paths, tsl_pct)
+        for (i, entry, _), px, hit in zip(candidates, exit_px.tolist(), tsl_hit.tolist()):
+            r = round((px - entry) / entry * 100.0, 2) if entry else None
+            rows[i].update(entry_price=entry, exit_price=px, roi=r, result="closed",
+                           reason=f"TSL {tsl_pct:g}%" if hit else "Timed exit")
+    return rows
+
+def _frame(rows: list[dict]) -> pd.DataFrame:
+    """Rows in serial (article, ticker) order, without the ordering tag."""
+    rows = sorted(rows, key=lambda r: r["_order"])
+    return pd.DataFrame([{k: v for k, v in r.items() if k != "_order"} for r in rows])
+
+def simulate_for_news(articles: list[dict], rvol_threshold: float = 1.5, timeframe: str = "5Min",
+                      store: BarStore | None = None, tsl_pct: float = 10.0, rvol_window: int = 30,
+                      lookback: int = 20, exit_bars: int = EXIT_BARS):
+    """Simulate entries using same rules against Alpaca bars around news timestamps.
+
+    Bars come from the local BarStore, sliced at each article's `created` time: entry
+    rules see only bars that had closed by then, entry is at the last of those closes, and
+    the exit walks forward through the following `exit_bars` bars (TSL, else timed exit).
+    Returns a DataFrame of simulated trades with ROI and reason when skipped.
+    """
+    usable = _usable(articles)
+    rows = _simulate_rows(usable, _score(usable), rvol_threshold, timeframe, store or get_store(), tsl_pct,
+                          rvol_window=rvol_window, lookback=lookback, exit_bars=exit_bars)
+    return _frame(rows)
+
+# -----------------------
+# Parallel (process pool, sharded by ticker)
+# -----------------------
+def _worker_init(db_path: str | None):
+    # workers only read the sentiment cache the parent filled
+    set_cache(SentimentCache(db_path=db_path, readonly=True))
+
+def _run_shard(args) -> list[dict]:
+    indices, articles, tickers, rvol_threshold, timeframe, tsl_pct = args
+    usable = _usable(articles, indices)
+    return _simulate_rows(usable, _score(usable), rvol_threshold, timeframe, get_store(), tsl_pct, only=set(tickers))
+
+def shard_tickers(usable: list[tuple], n: int) -> list[list[str]]:
+    """Split tickers into n shards of similar work (article count), deterministically."""
+    load = {}
+    for _, _, _, tickers, _ in usable:
+        for t in tickers:
+            load[t] = load.get(t, 0) + 1
+    shards = [[] for _ in range(n)]
+    weight = [0] * n
+    for t in sorted(load, key=lambda t: (-load[t], t)):
+        k = min(range(n), key=lambda k: (weight[k], k))
+        shards[k].append(t)
+        weight[k] += load[t]
+    return [s for s in shards if s]
+
+def simulate_parallel(articles: list[dict], rvol_threshold: float = 1.5, timeframe: str = "5Min",
+                      workers: int = 2, tsl_pct: float = 10.0) -> pd.DataFrame:
+    """simulate_for_news across a process pool; the result is identical for any worker count.
+
+    Headlines are scored once here (filling the SQLite sentiment cache); each worker opens
+    that cache read-only, loads its own tickers' bars from the BarStore and returns tagged
+    rows, which are merged back into serial order.
+    """
+    usable = _usable(articles)
+    if workers <= 1 or not usable:
+        return simulate_for_news(articles, rvol_threshold, timeframe, tsl_pct=tsl_pct)
+    _score(usable)
+    shards = shard_tickers(usable, workers)
+    jobs = []
+    for shard in shards:
+        members = set(shard)
+        # only the articles that mention one of the shard's tickers, with their global index
+        mine = [(u[0], u[1]) for u in usable if members.intersection(u[3])]
+        jobs.append(([i for i, _ in mine], [a for _, a in mine], shard, rvol_threshold, timeframe, tsl_pct))
+    rows = []
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_worker_init,
+                             initargs=(get_cache().db_path,)) as pool:
+        for part in pool.map(_run_shard, jobs):
+            rows.extend(part)
+    return _frame(rows)
+
+def summary_from_arrays(entry: np.ndarray, exit_px: np.ndarray, roi: np.ndarray) -> dict:
+    """summarize() metrics for closed trades given in chronological (serial) order."""
+    trades = len(entry)
+    if not trades:
+        return {"trades": 0, "wins": 0, "win_rate": 0.0, "avg_roi": 0.0, "total_pnl": 0.0, "max_drawdown": 0.0}
+    pnl = exit_px - entry
+    wins = int((roi > 0).sum())
+    # crude drawdown approximation: equity vs its running peak (which starts at 0)
+    eq = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(eq, 0.0))
+    return {"trades": trades, "wins": wins, "win_rate": float(np.round(wins / trades * 100.0, 2)),
+            "avg_roi": float(np.round(np.nanmean(roi), 2)), "total_pnl": float(np.round(pnl.sum(), 2)),
+            "max_drawdown": round(max(0.0, float((peak - eq).max())), 2)}
 
 def summarize(df: pd.DataFrame) -> dict:
     if df is None or df.empty:
-        return {"trades": 0, "wins": 0, "win_rate": 0.0, "avg_roi": 0.0, "total_pnl": 0.0, "max_drawdown": 0.0}
-    closed = df[df["result"]=="closed"].copy()
-    wins = (closed["roi"] > 0).sum() if "roi" in closed else 0
-    trades = len(closed)
-    win_rate = round((wins / trades * 100.0), 2) if trades else 0.0
-    avg_roi = round(closed["roi"].mean(), 2) if trades else 0.0
-    total_pnl = round((closed["exit_price"] - closed["entry_price"]).sum(), 2) if trades else 0.0
-    # crude drawdown approximation
-    max_drawdown = 0.0
-    if trades:
-        eq = (closed["exit_price"] - closed["entry_price"]).cumsum()
-        peak = 0.0
-        for v in eq:
-            peak = max(peak, v)
-            dd = (peak - v)
-            max_drawdown = max(max_drawdown, dd)
-    return {"trades": trades, "wins": int(wins), "win_rate": win_rate, "avg_roi": avg_roi,
-            "total_pnl": total_pnl, "max_drawdown": round(max_drawdown, 2)}
+        return summary_from_arrays(np.empty(0), np.empty(0), np.empty(0))
+    closed = df[df["result"]=="closed"]
+    return summary_from_arrays(closed["entry_price"].to_numpy(dtype=float), closed["exit_price"].to_numpy(dtype=float),
+                               closed["roi"].to_numpy(dtype=float))
@@ -0,0 +1,98 @@
+import time, threading
+from collections import OrderedDict
+import pandas as pd
+from .price import fetch_intraday_bars_multi
+
+
+class BarCache:
+    """In-process bar store keyed by (ticker, timeframe).
+
+    The first request for a key backfills `limit` bars; later requests only ask Alpaca for
+    bars from the last cached timestamp onwards (via start_iso, one request per distinct
+    last timestamp, so a quiet ticker doesn't widen everyone's window). The delta includes
+    the last cached bar, so a still-forming bar is replaced by its updated version, and a
+    healthy response always contains the ticker: one that is missing (HTTP error, partial
+    result) is left out of the result, as without the cache, instead of serving bars that
+    may be many minutes old. Entries unused for `ttl` seconds expire; at most `max_entries`
+    keys are kept (LRU).
+    """
+
+    def __init__(self, ttl: float = 900.0, max_entries: int = 500, max_bars: int = 500, fetch=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bars = max_bars
+        self.fetch = fetch or fetch_intraday_bars_multi
+        self._entries: OrderedDict = OrderedDict()  # (ticker, timeframe) -> {"df", "depth", "used"}
+        self._lock = threading.Lock()
+        self.backfills = 0
+        self.delta_fetches = 0
+        self.stale = 0  # warm tickers left out because their refresh failed
+
+    def _evict(self, now: float):
+        for key in [k for k, e in self._entries.items() if now - e["used"] > self.ttl]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _merge(self, old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        first_new = new["time"].iloc[0]
+        df = pd.concat([old[old["time"] < first_new], new], ignore_index=True)
+        df = df.drop_duplicates("time", keep="last").sort_values("time")
+        return df.tail(self.max_bars).reset_index(drop=True)
+
+    def get_many(self, tickers: list[str], timeframe: str = "5Min", limit: int = 120) -> dict[str, pd.DataFrame]:
+        """Return {TICKER: last `limit` bars}; tickers without data are omitted."""
+        symbols = sorted({(t or "").upper().strip() for t in tickers} - {""})
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            cold, warm = [], []
+            for sym in symbols:
+                e = self._entries.get((sym, timeframe))
+                (warm if e is not None and e["depth"] >= limit else cold).append(sym)
+            by_start: dict = {}
+            for sym in warm:
+                by_start.setdefault(self._entries[(sym, timeframe)]["df"]["time"].iloc[-1], []).append(sym)
+
+        fetched_cold = self.fetch(cold, timeframe=timeframe, limit=limit) if cold else {}
+        fetched_warm = {}
+        for start, group in by_start.items():
+            start_iso = start.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+            fetched_warm.update(self.fetch(group, start_iso=start_iso, timeframe=timeframe, limit=self.max_bars))
+
+        with self._lock:
+            if cold: self.backfills += 1
+            self.delta_fetches += len(by_start)
+            self.stale += len(set(warm) - set(fetched_warm))
+            for sym, df in fetched_cold.items():
+                self._entries[(sym, timeframe)] = {"df": df.tail(self.max_bars).reset_index(drop=True), "depth": limit, "used": now}
+            for sym, df in fetched_warm.items():
+                e = self._entries.get((sym, timeframe))
+                if e is None:
+                    continue
+                e["df"] = self._merge(e["df"], df)
+            out = {}
+            for sym in symbols:
+                if sym not in fetched_cold and sym not in fetched_warm:
+                    continue  # no fresh data this call
+                key = (sym, timeframe)
+                e = self._entries.get(key)
+                if e is None:
+                    continue
+                e["used"] = now
+                self._entries.move_to_end(key)
+                out[sym] = e["df"].tail(limit).reset_index(drop=True)
+            self._evict(now)
+        return out
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "backfills": self.backfills, "delta_fetches": self.delta_fetches,
+                "stale": self.stale}
+
+
+BAR_CACHE = BarCache()
+
+
+def get_bars(tickers: list[str], timeframe: str = "5Min", limit: int = 120) -> dict[str, pd.DataFrame]:
+    """Bars for many tickers through the process-wide BarCache."""
+    return BAR_CACHE.get_many(tickers, timeframe=timeframe, limit=limit)
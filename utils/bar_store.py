@@ -0,0 +1,195 @@
+import os, re, threading
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+from .price import fetch_intraday_bars_multi
+from .scheduler import is_trading_day
+
+PT = pytz.timezone("US/Pacific")
+BAR_DIR = os.getenv("BNBOT_BAR_DIR", os.path.join("data", "bars"))
+# rows of each day file; time is epoch seconds (UTC), every column float64
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    m = re.fullmatch(r"(\d+)(Min|T|Hour|H|Day|D)", timeframe)
+    if not m:
+        raise ValueError(f"unsupported timeframe: {timeframe}")
+    n, unit = int(m.group(1)), m.group(2)
+    return n * {"Min": 60, "T": 60, "Hour": 3600, "H": 3600, "Day": 86400, "D": 86400}[unit]
+
+
+def _ts(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+
+def _pt_day(ts) -> date:
+    return _ts(ts).tz_convert(PT).date()
+
+
+def _day_bounds_utc(first: date, last: date) -> tuple[str, str]:
+    start = PT.localize(datetime.combine(first, datetime.min.time()))
+    end = PT.localize(datetime.combine(last + timedelta(days=1), datetime.min.time())) - timedelta(seconds=1)
+    fmt = "%Y-%m-%dT%H:%M:%SZ"
+    return start.astimezone(pytz.utc).strftime(fmt), end.astimezone(pytz.utc).strftime(fmt)
+
+
+def _to_columns(df: pd.DataFrame) -> np.ndarray:
+    secs = (df["time"] - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+    return np.vstack([secs] + [df[c].to_numpy(dtype=np.float64) for c in COLUMNS[1:]])
+
+
+def _to_frame(arr: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame({c: np.asarray(arr[i]) for i, c in enumerate(COLUMNS)})
+    df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
+    return df
+
+
+class BarStore:
+    """On-disk historical bars, one column-major float64 .npy per ticker and PT trading day.
+
+    Layout: {root}/{timeframe}/{TICKER}/{YYYY-MM-DD}.npy holding a (6, n) array of
+    time/open/high/low/close/volume, read back memory-mapped. Missing days are filled
+    from Alpaca on demand with start/end ranges (one multi-symbol request per span).
+    Only days before today (PT) are stored; days without bars are stored empty so they
+    are not fetched again. Today's bars are fetched live and never persisted. A group
+    whose fetch fails is counted in `failures` and retried on the next fill().
+    """
+
+    def __init__(self, root: str | None = None, fetch=None):
+        self.root = root or BAR_DIR
+        self.fetch = fetch or fetch_intraday_bars_multi
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.failures = 0
+        self.days_written = 0
+        self.days_read = 0
+
+    def path(self, ticker: str, timeframe: str, day: date) -> str:
+        return os.path.join(self.root, timeframe, ticker.upper(), f"{day.isoformat()}.npy")
+
+    def has_day(self, ticker: str, timeframe: str, day: date) -> bool:
+        return os.path.exists(self.path(ticker, timeframe, day))
+
+    def _write_day(self, ticker: str, timeframe: str, day: date, arr: np.ndarray):
+        path = self.path(ticker, timeframe, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr, dtype=np.float64))
+        os.replace(tmp, path)  # atomic: concurrent readers/writers never see a partial file
+        self.days_written += 1
+
+    def _read_day(self, ticker: str, timeframe: str, day: date) -> np.ndarray | None:
+        path = self.path(ticker, timeframe, day)
+        if not os.path.exists(path):
+            return None
+        self.days_read += 1
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:  # some numpy versions can't mmap a zero-length array
+            return np.load(path)
+
+    @staticmethod
+    def _days(start: date, end: date) -> list[date]:
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    def missing_days(self, ticker: str, timeframe: str, start: date, end: date) -> list[date]:
+        """Past days in [start, end] without a day file."""
+        last = min(end, datetime.now(PT).date() - timedelta(days=1))
+        return [d for d in self._days(start, last) if not self.has_day(ticker, timeframe, d)] if start <= last else []
+
+    def fill(self, spans: dict, timeframe: str = "5Min") -> int:
+        """Make sure every ticker's (start, end) span is on disk; returns days written.
+
+        Tickers whose missing days cover the same range share one request. Non-trading
+        days are written empty without asking Alpaca, and so are trading days Alpaca
+        returned no bars for. A group whose fetch raises (HTTP error, no keys) is
+        counted in `failures` and nothing is written for it, so it is retried next time.
+        """
+        groups: dict[tuple, list] = {}
+        for ticker, (start, end) in spans.items():
+            ticker = (ticker or "").upper().strip()
+            if not ticker:
+                continue
+            missing = self.missing_days(ticker, timeframe, _pt_day(start), _pt_day(end))
+            for d in [d for d in missing if not is_trading_day(d)]:
+                self._write_day(ticker, timeframe, d, np.empty((len(COLUMNS), 0)))
+            missing = [d for d in missing if is_trading_day(d)]
+            if missing:
+                groups.setdefault((missing[0], missing[-1]), []).append((ticker, missing))
+
+        written = 0
+        for (first, last), members in groups.items():
+            start_iso, end_iso = _day_bounds_utc(first, last)
+            with self._lock:
+                self.fetches += 1
+            try:
+                frames = self.fetch([t for t, _ in members], start_iso=start_iso, timeframe=timeframe, limit=None,
+                                    end_iso=end_iso, strict=True)
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                print(f"Bar store: fetch {first}..{last} for {len(members)} tickers failed ({type(e).__name__}: {e})")
+                continue
+            for ticker, missing in members:
+                df = frames.get(ticker)
+                by_day = {}
+                if df is not None and not df.empty:
+                    days = df["time"].dt.tz_convert(PT).dt.date
+                    by_day = {d: g for d, g in df.groupby(days)}
+                for d in missing:
+                    g = by_day.get(d)
+                    self._write_day(ticker, timeframe, d,
+                                    _to_columns(g) if g is not None else np.empty((len(COLUMNS), 0)))
+                    written += 1
+        return written
+
+    def load(self, ticker: str, start, end, timeframe: str = "5Min", fill: bool = True) -> pd.DataFrame:
+        """Bars with start <= time <= end (naive timestamps are UTC); empty frame when there are none."""
+        ticker = ticker.upper()
+        start, end = _ts(start), _ts(end)
+        if fill:
+            self.fill({ticker: (start, end)}, timeframe)
+        today = datetime.now(PT).date()
+        parts = [a for a in (self._read_day(ticker, timeframe, d) for d in self._days(_pt_day(start), min(_pt_day(end), today)))
+                 if a is not None and a.shape[1]]
+        arr = np.concatenate(parts, axis=1) if parts else np.empty((len(COLUMNS), 0))
+        lo, hi = start.timestamp(), end.timestamp()
+        i, j = np.searchsorted(arr[0], lo, "left"), np.searchsorted(arr[0], hi, "right")
+        df = _to_frame(arr[:, i:j])
+        if _pt_day(end) >= today:
+            start_iso, _ = _day_bounds_utc(today, today)
+            live = self.fetch([ticker], start_iso=max(start, pd.Timestamp(start_iso)).tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ"),
+                              timeframe=timeframe, limit=None, end_iso=end.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ"))
+            if ticker in live:
+                df = pd.concat([df, live[ticker][list(COLUMNS)]], ignore_index=True)
+        return df
+
+    def window(self, ticker: str, at, lookback=pd.Timedelta(days=5), horizon=pd.Timedelta(days=1),
+               timeframe: str = "5Min", fill: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Point-in-time split of [at - lookback, at + horizon] around `at` (e.g. a news timestamp).
+
+        Returns (history, future): history holds only bars that had closed by `at`
+        (bar time + timeframe <= at); future holds the rest, starting with the bar
+        still forming at `at`.
+        """
+        at = _ts(at)
+        df = self.load(ticker, at - lookback, at + horizon, timeframe=timeframe, fill=fill)
+        closed = df["time"] + pd.Timedelta(seconds=timeframe_seconds(timeframe)) <= at
+        return df[closed].reset_index(drop=True), df[~closed].reset_index(drop=True)
+
+    def stats(self) -> dict:
+        return {"fetches": self.fetches, "failures": self.failures, "days_written": self.days_written, "days_read": self.days_read}
+
+
+_store = None
+
+
+def get_store() -> BarStore:
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
@@ -1,4 +1,5 @@
-import os, requests
+import os
+from . import http_client
 
 def get_alpaca_keys():
     return os.getenv("ALPACA_API_KEY",""), os.getenv("ALPACA_SECRET_KEY","")
@@ -10,7 +11,7 @@ def get_account_balance_alpaca():
     url = "https://paper-api.alpaca.markets/v2/account"
     headers = {"APCA-API-KEY-ID": api, "APCA-API-SECRET-KEY": secret}
     try:
-        r = requests.get(url, headers=headers, timeout=15)
+        r = http_client.get(url, headers=headers, timeout=15)
         if r.status_code != 200:
             return None
         data = r.json()
@@ -1,24 +1,156 @@
-import sqlite3, json, datetime
+import os, sqlite3, json, datetime, threading, hashlib
+from contextlib import contextmanager
 
-DB_PATH = "data/trades.db"
+DB_PATH = os.getenv("BNBOT_DB_PATH", "data/trades.db")
+BUSY_TIMEOUT_MS = int(os.getenv("BNBOT_DB_BUSY_MS", "10000"))
 
-def get_conn():
-    return sqlite3.connect(DB_PATH)
+_local = threading.local()
+
+def _open(path: str, readonly: bool) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+    else:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+def get_conn(readonly: bool = False, path: str | None = None) -> sqlite3.Connection:
+    """Persistent connection for this process/thread (WAL, synchronous=NORMAL, busy timeout).
+
+    Connections are reused across calls: commit, but don't close them.
+    readonly=True opens the file in SQLite read-only mode (for dashboards/readers).
+    """
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None or getattr(_local, "pid", None) != os.getpid():
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    key = (path, readonly)
+    conn = conns.get(key)
+    if conn is None:
+        conn = conns[key] = _open(path, readonly)
+    return conn
+
+def close_conns():
+    """Close this thread's cached connections (e.g. before a worker thread exits)."""
+    for conn in (getattr(_local, "conns", None) or {}).values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conns = {}
+
+@contextmanager
+def savepoint(conn: sqlite3.Connection, name: str = "bn_write"):
+    """Atomic block for helpers writing on the shared connection.
+
+    Unlike conn.commit() it never commits a transaction the caller has open: RELEASE
+    only commits when no transaction was active, otherwise the rows go in with the
+    caller's commit (or rollback). Errors roll back just the block.
+    """
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+
+def headline_hash(headline: str | None) -> str:
+    """Stable hash of a headline, used for the (ticker, headline_hash) unique index."""
+    return hashlib.sha1((headline or "").encode("utf-8")).hexdigest()
+
+def _columns(conn, table: str) -> set[str]:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+def _m001_news_headline_hash(conn):
+    # backfill hashes, drop existing duplicates (keep the first row), then enforce uniqueness
+    if "headline_hash" not in _columns(conn, "news"):
+        conn.execute("ALTER TABLE news ADD COLUMN headline_hash TEXT")
+    conn.create_function("bn_headline_hash", 1, headline_hash, deterministic=True)
+    conn.execute("UPDATE news SET headline_hash = bn_headline_hash(headline) WHERE headline_hash IS NULL")
+    conn.execute("""
+        DELETE FROM news WHERE id NOT IN (SELECT MIN(id) FROM news GROUP BY ticker, headline_hash)
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_news_ticker_hash ON news(ticker, headline_hash)")
+
+def _m002_trades_news_id_index(conn):
+    # pipeline's NOT EXISTS guard and the exit worker's open-trade scan
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_trades_news_id ON trades(news_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_trades_open ON trades(exit_price, skip_reason)")
+
+# Tables whose writes bump their row in table_versions (the dashboard's cache keys)
+VERSIONED_TABLES = ("news", "trades", "logs", "settings", "capital_usage")
+
+def _m003_table_versions(conn):
+    # per-table change counters kept by triggers, so readers can tell which tables changed
+    # (PRAGMA data_version can't: the log writer touches the file every few seconds)
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)")
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions(name, version) VALUES (?, 0)", (table,))
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS tv_{table}_{op.lower()} AFTER {op} ON {table}
+                BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END
+            """)
+
+def _m004_trades_finished_index(conn):
+    # keyset pages of skipped/closed trades ordered by when they finished (dashboard history)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS ix_trades_finished ON trades(COALESCE(exit_time, entry_time), id)
+        WHERE exit_price IS NOT NULL OR skip_reason IS NOT NULL
+    """)
+
+def table_versions(conn: sqlite3.Connection) -> dict[str, int] | None:
+    """{table: change counter} for VERSIONED_TABLES; None before migration 3 has run."""
+    try:
+        return dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    _m001_news_headline_hash,
+    _m002_trades_news_id_index,
+    _m003_table_versions,
+    _m004_trades_finished_index,
+]
+
+_migrated: set[str] = set()
+
+def apply_migrations(conn: sqlite3.Connection | None = None):
+    """Bring the schema up to date (idempotent; tables must already exist)."""
+    conn = conn or get_conn()
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if path in _migrated:
+        return
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version={i}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    _migrated.add(path)
 
 def get_setting(key: str, default: str | None = None) -> str | None:
-    conn = get_conn(); cur = conn.cursor()
+    cur = get_conn().cursor()
     cur.execute("SELECT value FROM settings WHERE key=?", (key,))
     row = cur.fetchone()
-    conn.close()
     return row[0] if row else default
 
 def set_setting(key: str, value: str):
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("INSERT OR REPLACE INTO settings(key,value) VALUES(?,?)", (key, value))
-    conn.commit(); conn.close()
+    with savepoint(get_conn()) as conn:
+        conn.execute("INSERT OR REPLACE INTO settings(key,value) VALUES(?,?)", (key, value))
 
 def record_capital_usage(ticker: str, amount: float):
-    conn = get_conn(); cur = conn.cursor()
+    # inside a pipeline cycle this joins the trade insert's transaction
     date = datetime.date.today().isoformat()
-    cur.execute("INSERT INTO capital_usage(date,ticker,amount) VALUES(?,?,?)", (date, ticker, amount))
-    conn.commit(); conn.close()
+    with savepoint(get_conn()) as conn:
+        conn.execute("INSERT INTO capital_usage(date,ticker,amount) VALUES(?,?,?)", (date, ticker, amount))
@@ -0,0 +1,138 @@
+import os, time, random, threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class HttpClient:
+    """Shared outbound HTTP client.
+
+    One requests.Session per host keeps a keep-alive pool (POOL_SIZE connections),
+    sends gzip Accept-Encoding, applies a default timeout, and retries 429/5xx and
+    connection errors with exponential backoff plus jitter (honouring Retry-After).
+    Non-idempotent methods (POST, e.g. a Telegram sendMessage) are only retried when
+    the request never reached the server (connect failure, 429), unless the caller
+    passes idempotent=True. Per-host call counts, errors, retries and latency are kept
+    in stats().
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._sessions: dict[str, requests.Session] = {}
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host: str) -> requests.Session:
+        s = self._sessions.get(host)
+        if s is None:
+            with self._lock:
+                s = self._sessions.get(host)
+                if s is None:
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    s.mount("https://", adapter)
+                    s.mount("http://", adapter)
+                    s.headers.update({"Accept-Encoding": "gzip, deflate"})
+                    self._sessions[host] = s
+        return s
+
+    def _record(self, host: str, elapsed_ms: float, ok: bool, retry: bool = False):
+        with self._lock:
+            st = self._stats.setdefault(host, {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0})
+            st["calls"] += 1
+            st["errors"] += 0 if ok else 1
+            st["retries"] += 1 if retry else 0
+            st["total_ms"] += elapsed_ms
+            st["max_ms"] = max(st["max_ms"], elapsed_ms)
+
+    def _sleep_for(self, attempt: int, resp=None) -> float:
+        if resp is not None:
+            ra = resp.headers.get("Retry-After")
+            if ra:
+                try:
+                    return min(float(ra), self.max_backoff)
+                except ValueError:
+                    pass
+        base = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return base / 2 + random.uniform(0, base / 2)
+
+    def request(self, method: str, url: str, retries: int | None = None, idempotent: bool | None = None,
+                **kwargs) -> requests.Response:
+        """Send a request; returns the last response (callers still check status_code).
+
+        Raises the last exception if every attempt failed at the connection level.
+        """
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                resp = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry = attempt < retries and (idempotent or _not_sent(e))
+                self._record(host, (time.perf_counter() - start) * 1000, False, retry)
+                if not retry:
+                    raise
+                time.sleep(self._sleep_for(attempt))
+                attempt += 1
+                continue
+            retry = attempt < retries and (resp.status_code in RETRY_STATUSES if idempotent else resp.status_code == 429)
+            self._record(host, (time.perf_counter() - start) * 1000, resp.status_code < 400, retry)
+            if retry:
+                time.sleep(self._sleep_for(attempt, resp))
+                attempt += 1
+                continue
+            return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                host: {**st, "avg_ms": round(st["total_ms"] / st["calls"], 1) if st["calls"] else 0.0,
+                       "total_ms": round(st["total_ms"], 1), "max_ms": round(st["max_ms"], 1)}
+                for host, st in self._stats.items()
+            }
+
+
+def _not_sent(exc: Exception) -> bool:
+    """True when the request failed before any byte reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+
+_client = HttpClient()
+
+
+def get_client() -> HttpClient:
+    return _client
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return _client.get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return _client.post(url, **kwargs)
@@ -0,0 +1,174 @@
+import math, threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class IndicatorState:
+    """Streaming VWAP / RVOL / resistance for one ticker, O(1) per bar.
+
+    Fed the same bars, it reproduces calc_vwap(df).iloc[-1], calc_rvol(df, window)
+    and breaks_recent_resistance(df, lookback) from utils.price, including the
+    short-history fallbacks (exact for whole-share volumes, as Alpaca reports them).
+    update() with the timestamp of the current bar replaces it (still-forming bar);
+    trim() drops bars older than a time, for frames that slide (tail(limit)).
+    """
+
+    def __init__(self, rvol_window: int = 30, lookback: int = 20):
+        self.rvol_window = rvol_window
+        self.lookback = lookback
+        self.count = 0            # bars in the window, including the current one
+        self.first_time = None
+        self.current = None       # (time, close, high, volume) of the latest bar
+        self._seq = 0             # bars ever seen (indices for the highs deque)
+        # sums over committed (older) bars still in the window, and their (time, pv, v)
+        self._pv = 0.0
+        self._v = 0.0
+        self._window: deque = deque()
+        # ring buffer of the last `rvol_window` committed volumes
+        self._vols = np.zeros(max(rvol_window, 1), dtype=np.float64)
+        self._vol_head = 0
+        self._vol_n = 0
+        self._vol_sum = 0.0
+        # monotonic deque (index, high) over the last lookback-1 committed highs
+        self._highs: deque = deque()
+
+    def _commit(self, bar):
+        _, close, high, volume = bar
+        idx = self._seq - 1       # index of the bar being committed
+        self._pv += close * volume
+        self._v += volume
+        self._window.append((bar[0], close * volume, volume))
+        if self.rvol_window > 0:
+            if self._vol_n == self.rvol_window:
+                self._vol_sum -= self._vols[self._vol_head]
+            else:
+                self._vol_n += 1
+            self._vols[self._vol_head] = volume
+            self._vol_sum += volume
+            self._vol_head = (self._vol_head + 1) % self.rvol_window
+        span = self.lookback - 1
+        if span > 0 and not math.isnan(high):
+            while self._highs and self._highs[-1][1] <= high:
+                self._highs.pop()
+            self._highs.append((idx, high))
+        while self._highs and self._highs[0][0] <= idx - span:
+            self._highs.popleft()
+
+    def update(self, time, close: float, high: float, volume: float):
+        bar = (time, float(close), float(high), float(volume))
+        if self.current is not None and time == self.current[0]:
+            self.current = bar
+            return
+        if self.current is not None:
+            self._commit(self.current)
+        else:
+            self.first_time = time
+        self.current = bar
+        self.count += 1
+        self._seq += 1
+
+    def trim(self, first_time):
+        """Forget committed bars older than first_time (VWAP sums and bar count)."""
+        w = self._window
+        while w and w[0][0] < first_time:
+            _, pv, v = w.popleft()
+            self._pv -= pv
+            self._v -= v
+            self.count -= 1
+        self.first_time = w[0][0] if w else self.last_time
+        if not w:  # nothing older than the current bar: drop rounding residue
+            self._pv = self._v = 0.0
+
+    @property
+    def last_time(self):
+        return self.current[0] if self.current else None
+
+    @property
+    def close(self) -> float:
+        return self.current[1]
+
+    def vwap(self) -> float:
+        _, close, _, volume = self.current
+        pv = self._pv + close * volume
+        vv = self._v + volume
+        if vv == 0:
+            return math.nan if pv == 0 else math.copysign(math.inf, pv)
+        return pv / vv
+
+    def rvol(self) -> float:
+        if self.count < self.rvol_window + 1: return 1.0
+        avg = self._vol_sum / self.rvol_window
+        if avg == 0: return 1.0
+        return self.current[3] / avg
+
+    def breaks_resistance(self) -> bool:
+        hist_high = self._highs[0][1] if self._highs else math.nan
+        if self.count > self.lookback:
+            recent_high = hist_high
+        else:
+            highs = [h for h in (hist_high, self.current[2]) if not math.isnan(h)]
+            recent_high = max(highs) if highs else math.nan
+        return self.current[1] > recent_high
+
+    def snapshot(self) -> dict:
+        return {"close": self.close, "vwap": self.vwap(), "rvol": self.rvol(),
+                "breaks_resistance": bool(self.breaks_resistance())}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, rvol_window: int = 30, lookback: int = 20) -> "IndicatorState":
+        state = cls(rvol_window, lookback)
+        state.feed(df)
+        return state
+
+    def feed(self, df: pd.DataFrame):
+        for t, c, h, v in zip(df["time"].tolist(), df["close"].to_numpy(), df["high"].to_numpy(), df["volume"].to_numpy()):
+            self.update(t, c, h, v)
+
+
+class IndicatorBook:
+    """One IndicatorState per ticker, kept in step with successive bar frames.
+
+    Continuity is keyed on the last bar applied: when a frame still contains it,
+    only that bar and the newer ones are fed, and bars that slid out of the front
+    of the frame are trimmed, so a sliding tail(limit) window costs O(1) state
+    steps per new bar. A gap (last bar missing) or a frame reaching further back
+    than the state (history rewritten) rebuilds it.
+    """
+
+    def __init__(self, rvol_window: int = 30, lookback: int = 20):
+        self.rvol_window = rvol_window
+        self.lookback = lookback
+        self._states: dict[str, IndicatorState] = {}
+        self._lock = threading.Lock()
+
+    def update(self, ticker: str, df: pd.DataFrame) -> IndicatorState:
+        times = df["time"]
+        with self._lock:
+            state = self._states.get(ticker)
+            last = state.last_time if state is not None else None
+            if last is None or times.iloc[0] < state.first_time or not (times == last).any():
+                state = IndicatorState.from_frame(df, self.rvol_window, self.lookback)
+                self._states[ticker] = state
+            else:
+                state.feed(df[times >= last])
+                state.trim(times.iloc[0])
+            return state
+
+    def evaluate(self, ticker: str, df: pd.DataFrame) -> dict:
+        return self.update(ticker, df).snapshot()
+
+    def drop(self, ticker: str):
+        with self._lock:
+            self._states.pop(ticker, None)
+
+
+_books: dict[tuple, IndicatorBook] = {}
+
+
+def get_book(rvol_window: int = 30, lookback: int = 20) -> IndicatorBook:
+    """Process-wide IndicatorBook for the given parameters (shared by pipeline and backtest)."""
+    key = (rvol_window, lookback)
+    if key not in _books:
+        _books[key] = IndicatorBook(rvol_window, lookback)
+    return _books[key]
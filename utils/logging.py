@@ -1,16 +1,70 @@
-import sqlite3
+import os, time, atexit, threading, sqlite3
 from datetime import datetime, timezone
+from .db import get_conn, savepoint
+
+LOG_BATCH_SIZE = int(os.getenv("BNBOT_LOG_BATCH_SIZE", "50"))
+LOG_FLUSH_SECS = float(os.getenv("BNBOT_LOG_FLUSH_SECS", "2.0"))
+# e.g. BNBOT_LOG_DROP_LEVELS="DEBUG" in production drops PARSED_SAMPLE rows
+LOG_DROP_LEVELS = {l.strip().upper() for l in os.getenv("BNBOT_LOG_DROP_LEVELS", "").split(",") if l.strip()}
+
+INSERT_SQL = "INSERT INTO logs (timestamp, level, component, event, message, ticker) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class LogBuffer:
+    """Buffered sink for the logs table.
+
+    Rows are written with one executemany per flush, when `batch_size` rows are
+    pending or `flush_secs` have passed since the last flush (checked on write),
+    on flush() and at interpreter exit. ERROR rows flush immediately together
+    with anything pending, so ordering is kept. Rows are written in a savepoint on
+    the thread's shared connection: a flush in the middle of a caller's transaction
+    doesn't commit it, the rows are committed with it.
+    """
+
+    def __init__(self, batch_size: int = LOG_BATCH_SIZE, flush_secs: float = LOG_FLUSH_SECS,
+                 drop_levels: set[str] | None = None):
+        self.batch_size = batch_size
+        self.flush_secs = flush_secs
+        self.drop_levels = LOG_DROP_LEVELS if drop_levels is None else drop_levels
+        self._rows = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def write(self, row: tuple):
+        level = (row[1] or "").upper()
+        if level in self.drop_levels:
+            return
+        with self._lock:
+            self._rows.append(row)
+            due = (level == "ERROR" or len(self._rows) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_secs)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            try:
+                with savepoint(get_conn()) as conn:
+                    conn.executemany(INSERT_SQL, rows)
+            except sqlite3.Error:
+                self._rows = rows + self._rows  # keep them for the next flush
+                raise
+
+
+_buffer = LogBuffer()
+atexit.register(_buffer.flush)
 
-DB_PATH = "data/trades.db"
 
 def log_db(level: str, component: str, event: str, message: str, ticker: str | None = None):
-    """Write a single log line to the DB (UTC timestamp)."""
+    """Queue a log line for the DB (UTC timestamp); ERROR lines are written immediately."""
     ts = datetime.now(timezone.utc).isoformat()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO logs (timestamp, level, component, event, message, ticker) VALUES (?, ?, ?, ?, ?, ?)",
-        (ts, level, component, event, message, ticker),
-    )
-    conn.commit()
-    conn.close()
+    _buffer.write((ts, level, component, event, message, ticker))
+
+
+def flush_logs():
+    """Write any buffered log lines now (call at the end of a poll/cycle)."""
+    _buffer.flush()
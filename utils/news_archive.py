@@ -0,0 +1,198 @@
+import os, json, time, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+import pytz
+from . import http_client
+
+NEWS_DIR = os.getenv("BNBOT_NEWS_DIR", os.path.join("data", "news"))
+NEWS_URL = "https://api.benzinga.com/api/v2/news"
+ET = pytz.timezone("US/Eastern")  # a day is finished (archivable) once it has ended in ET
+MAX_PAGES_PER_DAY = 50
+DONE_FILE = "_complete.json"
+
+
+class RateLimiter:
+    """Thread-safe pacing: at most `rate` acquire() calls per second across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def tickers_key(tickers: list[str] | None) -> str:
+    """Archive directory name for a ticker filter ("all" when unfiltered)."""
+    if not tickers:
+        return "all"
+    syms = sorted({t.upper().strip() for t in tickers if t and t.strip()})
+    return "t_" + hashlib.sha1(",".join(syms).encode("utf-8")).hexdigest()[:12]
+
+
+def _day_end_utc(day: date) -> str:
+    """ISO UTC time at which an ET day ends (pages fetched later are final)."""
+    return ET.localize(datetime.combine(day + timedelta(days=1), datetime.min.time())).astimezone(timezone.utc).isoformat()
+
+
+def _read_page(path: str) -> tuple[str | None, list]:
+    """(fetched_at, articles) of a stored page; older archives stored a bare list."""
+    with open(path) as f:
+        page = json.load(f)
+    if isinstance(page, list):
+        return None, page
+    return page.get("fetched_at"), page.get("articles") or []
+
+
+def _write_json(path: str, obj):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+class NewsArchive:
+    """Benzinga news pages on disk, keyed by ticker set and calendar day (ET).
+
+    Layout: {root}/{tickers_key}_p{pagesize}/{YYYY-MM-DD}/page_NNNN.json ({"fetched_at", "articles"}),
+    plus _complete.json once a short (last) page has been stored for a finished day. Every
+    page is saved as soon as it arrives, so an interrupted run resumes at the first missing
+    page; only pages fetched after the day ended (ET) are reused, earlier ones may have
+    shifted as news arrived and are fetched again. Complete days are never requested again.
+    Missing days are fetched concurrently (`workers`) with all requests paced by one
+    RateLimiter; transient errors are retried by the HTTP client, then up to `retries` more
+    times per page. A day that still fails, or that stops at MAX_PAGES_PER_DAY without a
+    short page (truncated), is reported in `failed_days` and picked up by the next run.
+    """
+
+    def __init__(self, root: str | None = None, token: str | None = None, pagesize: int = 100,
+                 workers: int = 4, rate: float = 5.0, retries: int = 2, get=None):
+        self.root = root or NEWS_DIR
+        self.token = token or os.getenv("BENZINGA_API_KEY") or os.getenv("BENZINGA__API_KEY") or "YOUR_BENZINGA_API_KEY"
+        self.pagesize = pagesize
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.get = get or http_client.get
+        self.requests = 0
+        self.pages_cached = 0
+        self.failed_days: list[str] = []
+        self._lock = threading.Lock()
+
+    def day_dir(self, key: str, day: date) -> str:
+        return os.path.join(self.root, key, day.isoformat())
+
+    def is_complete(self, key: str, day: date) -> bool:
+        return os.path.exists(os.path.join(self.day_dir(key, day), DONE_FILE))
+
+    def _stored_pages(self, d: str, final_after: str | None = None) -> list[list]:
+        """Stored pages in order; with final_after (ISO UTC), only the leading run fetched after it."""
+        pages = []
+        while True:
+            path = os.path.join(d, f"page_{len(pages):04d}.json")
+            if not os.path.exists(path):
+                return pages
+            fetched_at, articles = _read_page(path)
+            if final_after is not None and (fetched_at is None or fetched_at < final_after):
+                return pages
+            pages.append(articles)
+
+    @staticmethod
+    def _drop_pages(d: str, first: int):
+        """Delete stale pages numbered `first` and up (left over from a longer earlier fetch)."""
+        while os.path.exists(path := os.path.join(d, f"page_{first:04d}.json")):
+            os.remove(path)
+            first += 1
+
+    def _request(self, day: date, page: int, tickers: list[str] | None) -> list:
+        params = {
+            "token": self.token,
+            "pagesize": self.pagesize,
+            "display_tickers": "true",
+            "dateFrom": day.isoformat(),
+            "dateTo": day.isoformat(),
+        }
+        if tickers:
+            params["tickers"] = ",".join(t.upper() for t in tickers)
+        if page > 0:
+            params["page"] = page
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            with self._lock:
+                self.requests += 1
+            try:
+                r = self.get(NEWS_URL, params=params, headers={"Accept": "application/json"}, timeout=30)
+                if r.status_code == 200:
+                    data = r.json()
+                    return (data.get("articles") or []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
+                err = RuntimeError(f"Benzinga HTTP {r.status_code}")
+            except Exception as e:
+                err = e
+            if attempt < self.retries:
+                time.sleep(min(2 ** attempt, 10))
+        raise err
+
+    def _fetch_day(self, key: str, day: date, tickers: list[str] | None):
+        d = self.day_dir(key, day)
+        os.makedirs(d, exist_ok=True)
+        finished = day < datetime.now(ET).date()
+        # pages fetched before the day ended shift as news arrives: refetch from the first of them
+        pages = self._stored_pages(d, final_after=_day_end_utc(day)) if finished else []
+        with self._lock:
+            self.pages_cached += len(pages)
+        # resume after the last final page, unless it was already the short last one
+        while (not pages or len(pages[-1]) >= self.pagesize) and len(pages) < MAX_PAGES_PER_DAY:
+            articles = self._request(day, len(pages), tickers)
+            _write_json(os.path.join(d, f"page_{len(pages):04d}.json"),
+                        {"fetched_at": datetime.now(timezone.utc).isoformat(), "articles": articles})
+            pages.append(articles)
+        self._drop_pages(d, len(pages))
+        if len(pages[-1]) >= self.pagesize:
+            raise RuntimeError(f"{day}: stopped at MAX_PAGES_PER_DAY={MAX_PAGES_PER_DAY} full pages, day is truncated")
+        if finished:
+            _write_json(os.path.join(d, DONE_FILE), {"pages": len(pages), "fetched_at": datetime.now(timezone.utc).isoformat()})
+
+    def fetch_range(self, start: date, end: date, tickers: list[str] | None = None) -> list[dict]:
+        """All articles for days start..end (inclusive), fetching only what is not on disk."""
+        key = f"{tickers_key(tickers)}_p{self.pagesize}"  # resume logic depends on the page size
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        todo = [d for d in days if not self.is_complete(key, d)]
+        self.failed_days = []
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="news-archive") as pool:
+                futures = {d: pool.submit(self._fetch_day, key, d, tickers) for d in todo}
+            for d, fut in futures.items():
+                if fut.exception() is not None:
+                    self.failed_days.append(d.isoformat())
+
+        # merge in day/page order; pages can overlap when articles shift between requests
+        out, seen = [], set()
+        for d in days:
+            for page in self._stored_pages(self.day_dir(key, d)):
+                for a in page:
+                    aid = a.get("id")
+                    if aid is not None:
+                        if aid in seen:
+                            continue
+                        seen.add(aid)
+                    out.append(a)
+        return out
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "pages_cached": self.pages_cached, "failed_days": list(self.failed_days)}
+
+
+_archive = None
+
+
+def get_archive() -> NewsArchive:
+    global _archive
+    if _archive is None:
+        _archive = NewsArchive()
+    return _archive
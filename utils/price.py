@@ -1,35 +1,84 @@
 import os, time
 import pandas as pd
-import requests
+from . import http_client
 
 def get_alpaca_keys():
     api = os.getenv("ALPACA_API_KEY") or ""
     secret = os.getenv("ALPACA_SECRET_KEY") or ""
     return api, secret
 
-def fetch_intraday_bars(ticker: str, start_iso: str | None = None, timeframe: str = "5Min", limit: int = 300) -> pd.DataFrame | None:
-    """Fetch intraday bars from Alpaca Market Data v2 (Stocks)."""
+BARS_URL = "https://data.alpaca.markets/v2/stocks/bars"
+
+def _bars_to_frame(bars: list[dict]) -> pd.DataFrame | None:
+    if not bars: return None
+    df = pd.DataFrame(bars)
+    if df.empty: return None
+    # Expected columns: t (time), o,h,l,c,v, etc.
+    df["t"] = pd.to_datetime(df["t"])
+    df.rename(columns={"t":"time","o":"open","h":"high","l":"low","c":"close","v":"volume"}, inplace=True)
+    df.sort_values("time", inplace=True)
+    return df
+
+def fetch_intraday_bars(ticker: str, start_iso: str | None = None, timeframe: str = "5Min", limit: int = 300,
+                        end_iso: str | None = None) -> pd.DataFrame | None:
+    """Fetch intraday bars from Alpaca Market Data v2 (Stocks), optionally within [start_iso, end_iso]."""
     api, secret = get_alpaca_keys()
     if not api or not secret:
         return None
-    base = "https://data.alpaca.markets/v2/stocks/bars"
     params = {"symbols": ticker.upper(), "timeframe": timeframe, "limit": limit}
     if start_iso: params["start"] = start_iso
+    if end_iso: params["end"] = end_iso
     headers = {"APCA-API-KEY-ID": api, "APCA-API-SECRET-KEY": secret}
-    r = requests.get(base, params=params, headers=headers, timeout=15)
+    r = http_client.get(BARS_URL, params=params, headers=headers, timeout=15)
     if r.status_code != 200:
         return None
     data = r.json()
     if "bars" not in data: return None
-    bars = data["bars"].get(ticker.upper(), [])
-    if not bars: return None
-    df = pd.DataFrame(bars)
-    if df.empty: return None
-    # Expected columns: t (time), o,h,l,c,v, etc.
-    df["t"] = pd.to_datetime(df["t"])
-    df.rename(columns={"t":"time","o":"open","h":"high","l":"low","c":"close","v":"volume"}, inplace=True)
-    df.sort_values("time", inplace=True)
-    return df
+    return _bars_to_frame((data["bars"] or {}).get(ticker.upper(), []))
+
+def fetch_intraday_bars_multi(tickers: list[str], start_iso: str | None = None, timeframe: str = "5Min",
+                              limit: int | None = 300, chunk_size: int = 100, page_limit: int = 10000,
+                              end_iso: str | None = None, strict: bool = False) -> dict[str, pd.DataFrame]:
+    """Fetch bars for many tickers with one request per chunk of symbols.
+
+    Follows next_page_token until each chunk is exhausted and keeps the most recent
+    `limit` bars per symbol (all of them when limit is None). Returns {TICKER: DataFrame};
+    symbols without data are omitted. With strict=True missing keys or a failed page raise
+    instead of returning what was collected so far (for callers that persist the result),
+    so an empty result means Alpaca has no bars.
+    """
+    api, secret = get_alpaca_keys()
+    symbols = sorted({(t or "").upper().strip() for t in tickers} - {""})
+    if strict and symbols and (not api or not secret):
+        raise RuntimeError("Alpaca keys not set (ALPACA_API_KEY / ALPACA_SECRET_KEY)")
+    if not api or not secret or not symbols:
+        return {}
+    headers = {"APCA-API-KEY-ID": api, "APCA-API-SECRET-KEY": secret}
+    out = {}
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        params = {"symbols": ",".join(chunk), "timeframe": timeframe, "limit": page_limit}
+        if start_iso: params["start"] = start_iso
+        if end_iso: params["end"] = end_iso
+        collected: dict[str, list] = {}
+        while True:
+            r = http_client.get(BARS_URL, params=params, headers=headers, timeout=15)
+            if r.status_code != 200:
+                if strict:
+                    raise RuntimeError(f"Alpaca bars HTTP {r.status_code}: {r.text[:200]}")
+                break
+            data = r.json()
+            for sym, bars in (data.get("bars") or {}).items():
+                collected.setdefault(sym, []).extend(bars or [])
+            token = data.get("next_page_token")
+            if not token:
+                break
+            params["page_token"] = token
+        for sym, bars in collected.items():
+            df = _bars_to_frame(bars)
+            if df is not None:
+                out[sym] = (df.tail(limit) if limit else df).reset_index(drop=True)
+    return out
 
 def calc_vwap(df: pd.DataFrame) -> pd.Series:
     pv = (df["close"] * df["volume"]).cumsum()
@@ -0,0 +1,181 @@
+import time, json, random, asyncio
+from datetime import datetime, date
+import pytz
+from .logging import log_db, flush_logs
+
+PT = pytz.timezone("US/Pacific")
+
+# NYSE full-day closures and 1pm ET early closes (update yearly)
+NYSE_HOLIDAYS = {
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19",
+    "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18",
+    "2027-07-05", "2027-09-06", "2027-11-25", "2027-12-24",
+}
+NYSE_EARLY_CLOSES = {
+    "2025-07-03", "2025-11-28", "2025-12-24",
+    "2026-11-27", "2026-12-24",
+    "2027-11-26",
+}
+
+# Session boundaries in PT minutes since midnight (04:00 / 09:30 / 16:00 / 20:00 ET)
+PREMARKET_OPEN = 1 * 60
+REGULAR_OPEN = 6 * 60 + 30
+REGULAR_CLOSE = 13 * 60
+AFTERHOURS_CLOSE = 17 * 60
+EARLY_CLOSE_SHIFT = 3 * 60  # early closes end regular and after-hours three hours sooner
+
+PHASES = ("premarket", "regular", "afterhours", "closed", "holiday")
+
+
+def now_pt() -> datetime:
+    return datetime.now(PT)
+
+
+def market_phase(now: datetime | None = None) -> str:
+    """Session phase at `now` (PT): premarket, regular, afterhours, closed or holiday."""
+    now = now.astimezone(PT) if now is not None else now_pt()
+    day = now.date().isoformat()
+    if now.weekday() >= 5:
+        return "closed"
+    if day in NYSE_HOLIDAYS:
+        return "holiday"
+    shift = EARLY_CLOSE_SHIFT if day in NYSE_EARLY_CLOSES else 0
+    minute = now.hour * 60 + now.minute
+    if PREMARKET_OPEN <= minute < REGULAR_OPEN:
+        return "premarket"
+    if REGULAR_OPEN <= minute < REGULAR_CLOSE - shift:
+        return "regular"
+    if REGULAR_CLOSE - shift <= minute < AFTERHOURS_CLOSE - shift:
+        return "afterhours"
+    return "closed"
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d.isoformat() not in NYSE_HOLIDAYS
+
+
+# Seconds between cycles per phase, per loop
+NEWS_INTERVALS = {"premarket": 10, "regular": 5, "afterhours": 15, "closed": 120, "holiday": 300}
+PIPELINE_INTERVALS = {"premarket": 10, "regular": 5, "afterhours": 15, "closed": 120, "holiday": 300}
+EXIT_INTERVALS = {"premarket": 10, "regular": 5, "afterhours": 10, "closed": 60, "holiday": 300}
+
+
+class AdaptiveScheduler:
+    """Runs a job in a loop with a market-phase-aware cadence.
+
+    The job returns a count of work done (e.g. rows inserted) or None on failure.
+    Failures and exceptions back off exponentially (with jitter) up to
+    `max_backoff`; a result of at least `burst_threshold` tightens the interval by
+    `burst_factor` for the next `burst_cycles` cycles. Cycles run on a fixed
+    schedule: a cycle longer than its interval is logged as OVERRUN and the
+    slots it covered as SKIPPED (they are not made up).
+    """
+
+    def __init__(self, name: str, intervals: dict, burst_threshold: int = 10, burst_factor: float = 0.5,
+                 burst_cycles: int = 6, min_interval: float = 1.0, max_backoff: float = 300.0,
+                 stats_every: int = 60, clock=time.monotonic, sleep=time.sleep, phase_fn=market_phase):
+        self.name = name
+        self.intervals = intervals
+        self.burst_threshold = burst_threshold
+        self.burst_factor = burst_factor
+        self.burst_cycles = burst_cycles
+        self.min_interval = min_interval
+        self.max_backoff = max_backoff
+        self.stats_every = stats_every
+        self._clock = clock
+        self._sleep = sleep
+        self._phase_fn = phase_fn
+        self.failures = 0
+        self.burst_left = 0
+        self.phase = None
+        self.cycles = 0
+        self.errors = 0
+        self.overruns = 0
+        self.skipped = 0
+
+    def next_interval(self, phase: str, result) -> float:
+        """Seconds until the next cycle, given this cycle's result (None = failure)."""
+        base = float(self.intervals.get(phase, self.intervals.get("closed", 60)))
+        if result is None:
+            self.failures += 1
+            self.burst_left = 0
+            backoff = min(base * 2 ** self.failures, self.max_backoff)
+            return max(base, backoff * random.uniform(0.8, 1.0))
+        self.failures = 0
+        if isinstance(result, int) and not isinstance(result, bool) and result >= self.burst_threshold:
+            self.burst_left = self.burst_cycles
+        elif self.burst_left:
+            self.burst_left -= 1
+        if self.burst_left:
+            base *= self.burst_factor
+        return max(self.min_interval, base)
+
+    def stats(self) -> dict:
+        return {"phase": self.phase, "cycles": self.cycles, "errors": self.errors, "overruns": self.overruns,
+                "skipped": self.skipped, "failures": self.failures, "burst_left": self.burst_left}
+
+    def _begin(self) -> str:
+        phase = self._phase_fn()
+        if phase != self.phase:
+            log_db("INFO", "scheduler", "PHASE", json.dumps({"loop": self.name, "from": self.phase, "to": phase}))
+            self.phase = phase
+        return phase
+
+    def _finish(self, phase: str, result, elapsed: float) -> float:
+        if result is None:
+            self.errors += 1
+        self.cycles += 1
+
+        interval = self.next_interval(phase, result)
+        wait = interval - elapsed
+        if wait < 0:
+            missed = int(elapsed // interval)
+            self.overruns += 1
+            self.skipped += missed
+            log_db("INFO", "scheduler", "OVERRUN", json.dumps(
+                {"loop": self.name, "elapsed_s": round(elapsed, 3), "interval_s": round(interval, 3)}))
+            if missed:
+                log_db("INFO", "scheduler", "SKIPPED", json.dumps({"loop": self.name, "cycles": missed}))
+            # realign to the next slot on the original grid
+            wait = interval - (elapsed % interval)
+        if self.stats_every and self.cycles % self.stats_every == 0:
+            log_db("INFO", "scheduler", "SCHEDULER_STATS", json.dumps({"loop": self.name, **self.stats()}))
+        flush_logs()
+        return wait
+
+    def _job_error(self, e: Exception):
+        log_db("ERROR", "scheduler", "JOB_ERROR", f"{self.name}: {type(e).__name__}: {e}")
+
+    def run_once(self, job) -> float:
+        """Run one cycle; returns the seconds to wait before the next one."""
+        phase = self._begin()
+        start = self._clock()
+        try:
+            result = job()
+        except Exception as e:
+            self._job_error(e)
+            result = None
+        return self._finish(phase, result, self._clock() - start)
+
+    async def run_once_async(self, job, executor=None):
+        """run_once() for an asyncio loop: the job runs in `executor`; returns (result, wait)."""
+        phase = self._begin()
+        start = self._clock()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, job)
+        except Exception as e:
+            self._job_error(e)
+            result = None
+        return result, self._finish(phase, result, self._clock() - start)
+
+    def run(self, job, cycles: int | None = None):
+        """Run `job` forever (or `cycles` times)."""
+        n = 0
+        while cycles is None or n < cycles:
+            wait = self.run_once(job)
+            n += 1
+            if cycles is None or n < cycles:
+                self._sleep(wait)
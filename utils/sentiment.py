@@ -1,47 +1,231 @@
-def score_sentiment(headline: str, benzinga_item: dict | None = None):
-    """Return (label, score, source). Prefers Benzinga; falls back to FinBERT, then VADER."""
-    # 1) Benzinga sentiment if present
-    if benzinga_item:
-        bz_sent = benzinga_item.get("sentiment")
-        if bz_sent:
-            # Normalize
-            label = str(bz_sent).lower()
-            if label in ("bullish","positive","very bullish"): 
-                return "bullish", 0.8, "benzinga"
-            if label in ("bearish","negative","very bearish"): 
-                return "bearish", -0.8, "benzinga"
-            if label in ("neutral",): 
-                return "neutral", 0.0, "benzinga"
-
-    # 2) FinBERT via transformers
-    try:
-        from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+import threading, time, queue
+from concurrent.futures import Future
+from .sentiment_cache import get_cache, headline_key
+
+FINBERT_MODEL = "yiyanghkust/finbert-tone"
+MODEL_VERSION = f"{FINBERT_MODEL}@1"  # bump to invalidate cached scores
+
+
+def _label(score: float, source: str):
+    if score > 0.1: return "bullish", score, source
+    if score < -0.1: return "bearish", score, source
+    return "neutral", score, source
+
+
+def benzinga_sentiment(benzinga_item: dict | None):
+    """Normalize a Benzinga sentiment tag; None when absent or unrecognized."""
+    if not benzinga_item:
+        return None
+    bz_sent = benzinga_item.get("sentiment")
+    if not bz_sent:
+        return None
+    label = str(bz_sent).lower()
+    if label in ("bullish","positive","very bullish"):
+        return "bullish", 0.8, "benzinga"
+    if label in ("bearish","negative","very bearish"):
+        return "bearish", -0.8, "benzinga"
+    if label in ("neutral",):
+        return "neutral", 0.0, "benzinga"
+    return None
+
+
+class FinbertEngine:
+    """Process-resident FinBERT: tokenizer and model are loaded once, warmed up and reused.
+
+    score_batch() runs the whole batch through one padded forward pass.
+    """
+
+    def __init__(self, model_name: str = FINBERT_MODEL, max_length: int = 64, batch_size: int = 32):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self._tokenizer = None
+        self._model = None
+        self._labels = {}
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> bool:
+        """Load and warm up the model once. Returns False if FinBERT is unavailable."""
+        if self._model is not None:
+            return True
+        if self._failed:
+            return False
+        with self._lock:
+            if self._model is not None:
+                return True
+            try:
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                import torch
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                model.eval()
+                self._tokenizer, self._model = tokenizer, model
+                self._labels = {i: str(l).lower() for i, l in model.config.id2label.items()}
+                self._forward(["Company reports quarterly results"])  # warm-up
+            except Exception:
+                self._tokenizer = self._model = None
+                self._failed = True
+                return False
+        return True
+
+    def _forward(self, texts: list[str]) -> list[float]:
         import torch
-        model_name = "yiyanghkust/finbert-tone"
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        clf = pipeline("text-classification", model=model, tokenizer=tokenizer, return_all_scores=True)
-        out = clf(headline)[0]  # list of dicts with label & score
-        scores = {d['label'].lower(): d['score'] for d in out}
-        pos = scores.get("positive", 0.0)
-        neg = scores.get("negative", 0.0)
-        neu = scores.get("neutral", 0.0)
-        score = round(pos - neg, 4)
-        if score > 0.1: return "bullish", score, "finbert"
-        if score < -0.1: return "bearish", score, "finbert"
-        return "neutral", score, "finbert"
-    except Exception:
-        pass
+        enc = self._tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt")
+        with torch.no_grad():
+            probs = torch.softmax(self._model(**enc).logits, dim=-1).tolist()
+        out = []
+        for row in probs:
+            scores = {self._labels.get(i, str(i)): p for i, p in enumerate(row)}
+            out.append(round(scores.get("positive", 0.0) - scores.get("negative", 0.0), 4))
+        return out
+
+    def score_batch(self, texts: list[str]) -> list[float] | None:
+        """Return pos-neg scores for texts, or None if the model can't be used."""
+        if not texts:
+            return []
+        if not self.load():
+            return None
+        try:
+            out = []
+            for i in range(0, len(texts), self.batch_size):
+                out.extend(self._forward(texts[i:i + self.batch_size]))
+            return out
+        except Exception:
+            return None
+
+
+_finbert = FinbertEngine()
+_vader = None
+
+
+def get_finbert() -> FinbertEngine:
+    return _finbert
+
 
-    # 3) VADER fallback
+def warmup() -> bool:
+    """Load FinBERT ahead of the first headline (call at process start)."""
+    return _finbert.load()
+
+
+def _vader_score(headline: str):
+    global _vader
     try:
-        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-        analyzer = SentimentIntensityAnalyzer()
-        vs = analyzer.polarity_scores(headline)
-        score = round(vs['compound'], 4)
-        if score > 0.1: return "bullish", score, "vader"
-        if score < -0.1: return "bearish", score, "vader"
-        return "neutral", score, "vader"
+        if _vader is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            _vader = SentimentIntensityAnalyzer()
+        vs = _vader.polarity_scores(headline)
+        return _label(round(vs['compound'], 4), "vader")
     except Exception:
         # Last resort
         return "neutral", 0.0, "unknown"
+
+
+def score_sentiment_batch(headlines: list[str], benzinga_items: list[dict | None] | None = None) -> list[tuple]:
+    """Score many headlines at once. Returns [(label, score, source), ...] in input order.
+
+    Benzinga tags win; the rest go through FinBERT in one batch, then VADER if FinBERT is unavailable.
+    """
+    if benzinga_items is None:
+        benzinga_items = [None] * len(headlines)
+    results = [benzinga_sentiment(item) for item in benzinga_items]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if not pending:
+        return results
+
+    # each distinct headline is scored once: cache first, then model for the misses
+    cache = get_cache()
+    keys = {i: headline_key(headlines[i], (benzinga_items[i] or {}).get("sentiment"), MODEL_VERSION) for i in pending}
+    cached = cache.get_many(list(keys.values()))
+    todo = {}
+    for i in pending:
+        hit = cached.get(keys[i])
+        # the key already pins MODEL_VERSION; older rows may still hold a VADER fallback
+        if hit and hit[2] == "finbert":
+            results[i] = tuple(hit[:3])
+        else:
+            todo.setdefault(keys[i], headlines[i])
+    if todo:
+        texts = list(todo.values())
+        scores = _finbert.score_batch(texts)
+        fresh = {}
+        for j, k in enumerate(todo):
+            fresh[k] = _label(scores[j], "finbert") if scores is not None else _vader_score(texts[j])
+        # a VADER fallback is not cached: once FinBERT loads, those headlines get a real score
+        cache.put_many({k: (*r, MODEL_VERSION) for k, r in fresh.items() if r[2] == "finbert"})
+        for i in pending:
+            if results[i] is None:
+                results[i] = fresh[keys[i]]
+    return results
+
+
+def score_sentiment(headline: str, benzinga_item: dict | None = None):
+    """Return (label, score, source). Prefers Benzinga; falls back to FinBERT, then VADER."""
+    return score_sentiment_batch([headline], [benzinga_item])[0]
+
+
+class SentimentBatcher:
+    """Micro-batcher for live callers: collects requests for up to max_wait seconds
+    (or max_batch items) and scores them in a single batch on a background thread."""
+
+    def __init__(self, max_batch: int = 16, max_wait: float = 0.05):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._q: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, headline: str, benzinga_item: dict | None = None) -> Future:
+        self._ensure_started()
+        fut = Future()
+        self._q.put((headline, benzinga_item, fut))
+        return fut
+
+    def score(self, headline: str, benzinga_item: dict | None = None, timeout: float | None = None):
+        return self.submit(headline, benzinga_item).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                results = score_sentiment_batch([b[0] for b in batch], [b[1] for b in batch])
+                for (_, _, fut), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> SentimentBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = SentimentBatcher()
+    return _batcher
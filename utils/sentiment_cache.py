@@ -0,0 +1,135 @@
+import sqlite3, hashlib, threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from .db import get_conn, savepoint
+
+
+def headline_key(headline: str, benzinga_tag: str | None, model_version: str) -> str:
+    """Content hash of a headline (whitespace-normalized) plus the inputs that change its score."""
+    text = " ".join((headline or "").split())
+    raw = f"{model_version}\x1f{(benzinga_tag or '').lower()}\x1f{text}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """Two-tier headline sentiment cache: in-memory LRU in front of the `sentiment_cache` SQLite table.
+
+    Values are (label, score, source, model_version).
+    """
+
+    def __init__(self, db_path: str | None = None, max_entries: int = 50_000, readonly: bool = False):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.readonly = readonly
+        self._mem: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self.hits_mem = 0
+        self.hits_db = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connect(self):
+        conn = get_conn(readonly=self.readonly, path=self.db_path)
+        if not self.readonly and not self._table_ready:
+            with savepoint(conn):
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sentiment_cache (
+                      key TEXT PRIMARY KEY,
+                      label TEXT,
+                      score REAL,
+                      source TEXT,
+                      model_version TEXT,
+                      created_at TEXT
+                    )
+                """)
+            self._table_ready = True
+        return conn
+
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Return {key: (label, score, source, model_version)} for every cached key."""
+        found = {}
+        missing = []
+        with self._lock:
+            for k in dict.fromkeys(keys):
+                if k in self._mem:
+                    self._mem.move_to_end(k)
+                    found[k] = self._mem[k]
+                    self.hits_mem += 1
+                else:
+                    missing.append(k)
+        if missing:
+            try:
+                conn = self._connect()
+                cur = conn.cursor()
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    cur.execute(
+                        f"SELECT key, label, score, source, model_version FROM sentiment_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    for k, label, score, source, version in cur.fetchall():
+                        found[k] = (label, score, source, version)
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                for k in missing:
+                    if k in found:
+                        self._remember(k, found[k])
+                        self.hits_db += 1
+                    else:
+                        self.misses += 1
+        return found
+
+    def put_many(self, items: dict):
+        """Store {key: (label, score, source, model_version)} in both tiers."""
+        if not items:
+            return
+        with self._lock:
+            for k, v in items.items():
+                self._remember(k, v)
+        if self.readonly:
+            return
+        ts = datetime.now(timezone.utc).isoformat()
+        try:
+            with savepoint(self._connect()) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment_cache(key, label, score, source, model_version, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(k, *v, ts) for k, v in items.items()],
+                )
+            self.writes += len(items)
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict:
+        lookups = self.hits_mem + self.hits_db + self.misses
+        return {
+            "hits_mem": self.hits_mem,
+            "hits_db": self.hits_db,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round((self.hits_mem + self.hits_db) / lookups * 100.0, 2) if lookups else 0.0,
+            "mem_entries": len(self._mem),
+        }
+
+
+_cache = None
+
+
+def get_cache() -> SentimentCache:
+    global _cache
+    if _cache is None:
+        _cache = SentimentCache()
+    return _cache
+
+
+def set_cache(cache: SentimentCache):
+    """Swap the process-wide cache (e.g. a read-only one in backtest workers)."""
+    global _cache
+    _cache = cache
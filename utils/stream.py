@@ -0,0 +1,249 @@
+import os, json, time, threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+
+class PriceStream(ABC):
+    """Websocket-style trade feed.
+
+    subscribe()/unsubscribe() may be called at any time (also while disconnected);
+    handlers registered with on_trade() receive (symbol, price, timestamp) for
+    subscribed symbols only. start() runs run_forever() on a daemon thread.
+    Transports implement _open() / _pump() / _close(); the base loop reconnects
+    with exponential backoff and resubscribes the current symbols every time.
+    """
+
+    def __init__(self, min_backoff: float = 1.0, max_backoff: float = 30.0):
+        self._symbols: set[str] = set()
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.ticks = 0
+
+    @property
+    def symbols(self) -> set[str]:
+        with self._lock:
+            return set(self._symbols)
+
+    def on_trade(self, fn):
+        self._handlers.append(fn)
+        return fn
+
+    def subscribe(self, symbols) -> set[str]:
+        """Add symbols; returns the ones that were not subscribed yet."""
+        with self._lock:
+            added = {s.upper() for s in symbols if s} - self._symbols
+            self._symbols |= added
+        if added:
+            self._send_subscription("subscribe", added)
+        return added
+
+    def unsubscribe(self, symbols) -> set[str]:
+        with self._lock:
+            removed = {s.upper() for s in symbols if s} & self._symbols
+            self._symbols -= removed
+        if removed:
+            self._send_subscription("unsubscribe", removed)
+        return removed
+
+    def _send_subscription(self, action: str, symbols: set[str]):
+        """Hook for connected transports; the new set is also replayed on reconnect."""
+
+    def _emit(self, symbol: str, price: float, ts=None):
+        symbol = (symbol or "").upper()
+        with self._lock:
+            if symbol not in self._symbols:
+                return
+        self.ticks += 1
+        for fn in list(self._handlers):
+            try:
+                fn(symbol, float(price), ts)
+            except Exception as e:
+                print("Stream handler error:", e)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name=type(self).__name__, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @abstractmethod
+    def _open(self):
+        """Connect (and authenticate); raise on failure."""
+
+    @abstractmethod
+    def _pump(self):
+        """Wait briefly for messages and _emit() their trades; raise when the connection drops."""
+
+    def _close(self):
+        """Release the connection (also called after a failed _open)."""
+
+    def connect(self):
+        """Open the connection and replay the current subscriptions."""
+        self._open()
+        self.connected.set()
+        symbols = self.symbols
+        if symbols:
+            self._send_subscription("subscribe", symbols)
+
+    def run_forever(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            try:
+                self.connect()
+                backoff = self.min_backoff
+                while not self._stop.is_set():
+                    self._pump()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"Stream disconnected ({type(e).__name__}: {e}); reconnecting in {backoff:.0f}s")
+                self.reconnects += 1
+                self._stop.wait(backoff)
+                backoff = min(max(backoff * 2, 0.1), self.max_backoff)
+            finally:
+                self.connected.clear()
+                self._close()
+
+
+class AlpacaStream(PriceStream):
+    """Alpaca market data v2 trade stream."""
+
+    def __init__(self, feed: str | None = None, max_backoff: float = 30.0):
+        super().__init__(max_backoff=max_backoff)
+        self.url = f"wss://stream.data.alpaca.markets/v2/{feed or os.getenv('ALPACA_DATA_FEED', 'iex')}"
+        self._ws = None
+        self._ws_lock = threading.Lock()
+
+    def _send(self, payload: dict):
+        with self._ws_lock:
+            if self._ws is not None:
+                self._ws.send(json.dumps(payload))
+
+    def _send_subscription(self, action, symbols):
+        try:
+            self._send({"action": action, "trades": sorted(symbols)})
+        except Exception:
+            pass  # picked up by the resubscribe on reconnect
+
+    def _open(self):
+        import websocket  # websocket-client
+        api = os.getenv("ALPACA_API_KEY") or ""
+        secret = os.getenv("ALPACA_SECRET_KEY") or ""
+        ws = websocket.create_connection(self.url, timeout=10)
+        ws.recv()  # [{"T":"success","msg":"connected"}]
+        ws.send(json.dumps({"action": "auth", "key": api, "secret": secret}))
+        msgs = json.loads(ws.recv())
+        if not any(m.get("T") == "success" and m.get("msg") == "authenticated" for m in msgs):
+            ws.close()
+            raise ConnectionError(f"Alpaca stream auth failed: {msgs}")
+        ws.settimeout(1.0)
+        with self._ws_lock:
+            self._ws = ws
+
+    def _pump(self):
+        import websocket
+        try:
+            raw = self._ws.recv()
+        except websocket.WebSocketTimeoutException:
+            return
+        if not raw:
+            raise ConnectionError("stream closed")
+        for m in json.loads(raw):
+            if m.get("T") == "t":
+                self._emit(m.get("S"), m.get("p"), m.get("t"))
+            elif m.get("T") == "error":
+                print("Alpaca stream error:", m)
+
+    def _close(self):
+        with self._ws_lock:
+            if self._ws is not None:
+                try:
+                    self._ws.close()
+                except Exception:
+                    pass
+            self._ws = None
+
+
+class ReplayStream(PriceStream):
+    """Local stand-in for tests and offline runs: replays (symbol, price[, ts]) ticks.
+
+    Behaves like a server-side feed: only symbols subscribed on the current
+    connection are delivered. disconnect() drops the connection and forgets those
+    subscriptions, so ticks only flow again after the base loop reconnects and
+    resubscribes. Ticks pushed while disconnected wait for the next connection.
+    Use start() for the threaded loop, or connect() + replay() to drive it
+    synchronously. `delay` spaces out replayed ticks.
+    """
+
+    def __init__(self, ticks=None, delay: float = 0.0, min_backoff: float = 0.01):
+        super().__init__(min_backoff=min_backoff, max_backoff=0.5)
+        self._pending = list(ticks or [])
+        self._cond = threading.Condition()
+        self._server_symbols: set[str] = set()  # subscriptions the "server" knows on this connection
+        self._dropped = False
+        self.delay = delay
+
+    def push(self, symbol: str, price: float, ts=None):
+        with self._cond:
+            self._pending.append((symbol, price, ts))
+            self._cond.notify()
+
+    def _send_subscription(self, action: str, symbols: set[str]):
+        with self._cond:
+            if not self.connected.is_set():
+                return  # replayed by connect()
+            if action == "subscribe":
+                self._server_symbols |= symbols
+            else:
+                self._server_symbols -= symbols
+
+    def _open(self):
+        with self._cond:
+            self._dropped = False
+            self._server_symbols = set()
+
+    def _close(self):
+        with self._cond:
+            self._server_symbols = set()
+
+    def disconnect(self):
+        """Drop the connection: the running loop sees an error and reconnects."""
+        with self._cond:
+            self.connected.clear()
+            self._server_symbols = set()
+            self._dropped = True
+            self._cond.notify_all()
+
+    def replay(self):
+        """Deliver pending ticks on the caller's thread (they stay queued while disconnected)."""
+        with self._cond:
+            if not self.connected.is_set():
+                return
+            ticks, self._pending = self._pending, []
+            server = set(self._server_symbols)
+        for t in ticks:
+            symbol, price = t[0], t[1]
+            if (symbol or "").upper() not in server:
+                continue
+            ts = t[2] if len(t) > 2 and t[2] is not None else datetime.now(timezone.utc).isoformat()
+            self._emit(symbol, price, ts)
+            if self.delay:
+                time.sleep(self.delay)
+
+    def _pump(self):
+        with self._cond:
+            if not self._pending and not self._dropped:
+                self._cond.wait(timeout=0.5)
+            if self._dropped:
+                raise ConnectionError("replay stream disconnected")
+        self.replay()
@@ -0,0 +1,130 @@
+import itertools, random
+import numpy as np
+import pandas as pd
+from .backtest import (_usable, _score, simulate_exits, summary_from_arrays, HISTORY_BARS,
+                       LOOKBACK, HORIZON)
+from .bar_store import BarStore, get_store
+
+# Values tried per parameter (grid = full product; random = a seeded sample of it)
+DEFAULT_GRID = {
+    "rvol_threshold": [1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0],
+    "rvol_window": [20, 30, 45],
+    "lookback": [10, 20, 30],
+    "tsl_pct": [5.0, 7.5, 10.0, 12.5, 15.0, 20.0],
+    "exit_bars": [10, 20, 30, 40],
+}
+PARAMS = tuple(DEFAULT_GRID)
+METRICS = ("trades", "wins", "win_rate", "avg_roi", "total_pnl", "max_drawdown")
+
+
+class SweepData:
+    """Bars for every bullish (article, ticker) candidate, loaded once into padded arrays.
+
+    History is right-aligned (last HISTORY_BARS closed bars at news time, `count` of them
+    valid); future closes are left-aligned and NaN-padded to `max_exit_bars`. Rows keep
+    the serial (article, ticker) order of simulate_for_news, so metrics match summarize().
+    """
+
+    def __init__(self, articles: list[dict], max_exit_bars: int, timeframe: str = "5Min",
+                 store: BarStore | None = None):
+        store = store or get_store()
+        usable = _usable(articles)
+        scored = _score(usable)
+        spans = {}
+        for (_, _, _, tickers, at), (label, _, _) in zip(usable, scored):
+            if label not in ("bullish", "very bullish"):
+                continue
+            for t in tickers:
+                lo, hi = spans.get(t, (at, at))
+                spans[t] = (min(lo, at), max(hi, at))
+        store.fill({t: (lo - LOOKBACK, hi + HORIZON) for t, (lo, hi) in spans.items()}, timeframe)
+
+        close, high, vol, count, future = [], [], [], [], []
+        for (_, _, _, tickers, at), (label, _, _) in zip(usable, scored):
+            if label not in ("bullish", "very bullish"):
+                continue
+            for t in tickers:
+                hist, fut = store.window(t, at, LOOKBACK, HORIZON, timeframe=timeframe, fill=False)
+                if hist.empty or fut.empty:
+                    continue  # never a trade, whatever the parameters
+                hist = hist.tail(HISTORY_BARS)
+                close.append(hist["close"].to_numpy(dtype=float))
+                high.append(hist["high"].to_numpy(dtype=float))
+                vol.append(hist["volume"].to_numpy(dtype=float))
+                count.append(len(hist))
+                future.append(fut["close"].to_numpy(dtype=float)[:max_exit_bars])
+
+        n = len(count)
+        self.count = np.array(count, dtype=int)
+        self.close = np.zeros((n, HISTORY_BARS))
+        self.high = np.full((n, HISTORY_BARS), np.nan)
+        self.volume = np.zeros((n, HISTORY_BARS))
+        self.future = np.full((n, max_exit_bars), np.nan)
+        for k in range(n):
+            c = count[k]
+            self.close[k, HISTORY_BARS - c:] = close[k]
+            self.high[k, HISTORY_BARS - c:] = high[k]
+            self.volume[k, HISTORY_BARS - c:] = vol[k]
+            self.future[k, :len(future[k])] = future[k]
+        self.entry = self.close[:, -1] if n else np.empty(0)
+
+    def __len__(self):
+        return len(self.count)
+
+    def above_vwap(self) -> np.ndarray:
+        # sequential cumulative sums, as IndicatorState (zero padding adds nothing)
+        pv = np.add.accumulate(self.close * self.volume, axis=1)[:, -1] if len(self) else np.empty(0)
+        vv = np.add.accumulate(self.volume, axis=1)[:, -1] if len(self) else np.empty(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.entry > pv / vv
+
+    def rvol(self, window: int) -> np.ndarray:
+        """calc_rvol for every row: last volume / mean of the `window` before it (1.0 if short or zero)."""
+        if window < 1:
+            raise ValueError("rvol_window must be >= 1")
+        avg = self.volume[:, -(window + 1):-1].sum(axis=1) / window
+        ok = (self.count >= window + 1) & (avg != 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(ok, self.volume[:, -1] / np.where(ok, avg, 1.0), 1.0)
+
+    def breaks_resistance(self, lookback: int) -> np.ndarray:
+        """breaks_recent_resistance for every row."""
+        if lookback < 2:
+            raise ValueError("lookback must be >= 2")
+        recent = np.fmax.reduce(self.high[:, -lookback:-1], axis=1)
+        full = np.fmax.reduce(self.high, axis=1)
+        return self.entry > np.where(self.count > lookback, recent, full)
+
+
+def param_grid(grid: dict, mode: str = "grid", samples: int = 500, seed: int = 0) -> list[dict]:
+    combos = [dict(zip(PARAMS, values)) for values in itertools.product(*(grid[p] for p in PARAMS))]
+    if mode == "random" and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def run_sweep(data: SweepData, combos: list[dict], rank_by: str = "total_pnl") -> pd.DataFrame:
+    """Evaluate every parameter combination over the cached arrays; best first.
+
+    Indicators are computed once per rvol_window / lookback and exits once per
+    (tsl_pct, exit_bars); each combination is then a boolean mask plus summary metrics.
+    """
+    above = data.above_vwap()
+    rvol = {w: data.rvol(w) for w in {c["rvol_window"] for c in combos}}
+    resistance = {lb: data.breaks_resistance(lb) for lb in {c["lookback"] for c in combos}}
+    exits = {}
+    for tsl, bars in {(c["tsl_pct"], c["exit_bars"]) for c in combos}:
+        exit_px, _ = simulate_exits(data.entry, data.future[:, :bars], tsl)
+        roi = np.array([round((x - e) / e * 100.0, 2) if e else np.nan for x, e in zip(exit_px.tolist(), data.entry.tolist())])
+        exits[(tsl, bars)] = (exit_px, roi)
+
+    rows = []
+    for c in combos:
+        mask = above & resistance[c["lookback"]] & (rvol[c["rvol_window"]] > c["rvol_threshold"])
+        exit_px, roi = exits[(c["tsl_pct"], c["exit_bars"])]
+        rows.append({**c, **summary_from_arrays(data.entry[mask], exit_px[mask], roi[mask])})
+    df = pd.DataFrame(rows, columns=list(PARAMS) + list(METRICS))
+    ascending = rank_by == "max_drawdown"
+    df = df.sort_values([rank_by, "trades"], ascending=[ascending, False], kind="stable").reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df